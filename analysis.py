@@ -0,0 +1,301 @@
+"""
+    Author: lefkovitj (https://lefkovitzj.com)
+    File Last Modified: 10/19/2026
+    Project Name: PyPdfApp
+    File Name: analysis.py
+"""
+
+# Python Standard Library Imports.
+from array import array
+import hashlib
+import json
+import os
+
+# Third-party Module Imports.
+import fitz
+from PIL import Image
+
+# Project Imports.
+from cache import TEXT_PAGES, get_page_resource_hash
+
+RASTER_HASH_SIZE = 32 # The raster hash compares a (RASTER_HASH_SIZE + 1) x RASTER_HASH_SIZE render.
+
+
+def get_raster_hash(page, text=None):
+    """Get a difference hash of the page's look combined with a hash of its text"""
+    # Alike pages (such as two scans of one sheet) get the same hash, the text part keeps pages
+    # that only differ in a few words apart.
+    zoom = 4 * RASTER_HASH_SIZE / max(page.rect.width, page.rect.height)
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csGRAY, alpha=False)
+    img = Image.frombytes("L", (pix.width, pix.height), pix.samples)
+    pixels = list(img.resize((RASTER_HASH_SIZE + 1, RASTER_HASH_SIZE)).getdata())
+    difference_bits = 0
+    for row_start in range(0, len(pixels), RASTER_HASH_SIZE + 1):
+        for pixel_i in range(row_start, row_start + RASTER_HASH_SIZE):
+            difference_bits = (difference_bits << 1) | (pixels[pixel_i] > pixels[pixel_i + 1])
+    if not difference_bits: # A blank page, not a duplicate of other blank pages.
+        return ""
+    if text is None:
+        text = page.get_text("text")
+    text_hash = hashlib.sha1(text.encode("utf-8")).hexdigest()
+    return f"{difference_bits:x}:{text_hash}"
+
+def find_duplicate_pages(documents):
+    """Group the pages that are duplicates of each other, within and across documents"""
+    # documents is a list of (key, fitz_doc, index), each group is a list of (key, page_i). Pages
+    # are compared by content first, pages without an exact copy are then compared by look.
+    content_groups = {}
+    for key, fitz_doc, index in documents:
+        for page_i in range(len(fitz_doc)):
+            content_hash = index.get_content_hash(fitz_doc, page_i)
+            if content_hash:
+                content_groups.setdefault(content_hash, []).append((key, page_i))
+    groups = [members for members in content_groups.values() if len(members) > 1]
+    unmatched_pages = {
+        members[0] for members in content_groups.values() if len(members) == 1}
+    raster_groups = {}
+    for key, fitz_doc, index in documents:
+        for page_i in range(len(fitz_doc)):
+            if (key, page_i) in unmatched_pages:
+                raster_hash = index.get_raster_hash(fitz_doc, page_i)
+                if raster_hash:
+                    raster_groups.setdefault(raster_hash, []).append((key, page_i))
+    groups += [members for members in raster_groups.values() if len(members) > 1]
+    document_order = {key: document_i for document_i, (key, _doc, _index) in enumerate(documents)}
+    return sorted(groups, key=lambda members: (document_order[members[0][0]], members[0][1]))
+
+def get_index_path(cache_dir, file_path):
+    """Get the cache file used for the analysis index of a file as it is on disk now"""
+    file_stat = os.stat(file_path)
+    file_key = f"{os.path.abspath(file_path)}|{file_stat.st_mtime_ns}|{file_stat.st_size}"
+    file_hash = hashlib.sha1(file_key.encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir, "analysis", f"{file_hash}.json")
+
+
+class DocumentIndex():
+    """Per-page facts about a document (rects, links, images, fonts), analysed once per page"""
+    # Page structure changes (insert, delete, move) come through the PdfDocInstance page data
+    # methods, page content changes through the manipulate.py operations that are given the index.
+    def __init__(self, page_count=0):
+        """Initialize an index with no analysed pages"""
+        self.analysed = bytearray(page_count) # 1 once the page's entries are filled in.
+        self.rects = array("d", bytes(8 * 4 * page_count)) # x0, y0, x1, y1 per page.
+        self.rotations = array("h", bytes(2 * page_count))
+        self.link_rects = [array("d") for _page_i in range(page_count)] # x0, y0, x1, y1 per link.
+        self.link_uris = [() for _page_i in range(page_count)] # None for internal links.
+        self.image_xrefs = [array("l") for _page_i in range(page_count)]
+        self.font_xrefs = [array("l") for _page_i in range(page_count)]
+        self.font_names = {} # Font xref -> base font name, shared by every page.
+        self.content_hashes = ["" for _page_i in range(page_count)] # Content and resources.
+        self.object_hashes = {} # Xref -> cache.get_object_hash(), shared by every page.
+        self.raster_hashes = [None for _page_i in range(page_count)] # Filled in when first asked.
+        self.next_page = 0 # Where build_step() continues from.
+
+    def __len__(self):
+        return len(self.analysed)
+
+    def is_complete(self):
+        """Return True if every page has been analysed"""
+        return 0 not in self.analysed
+
+    def analyse_page(self, fitz_doc, page_i):
+        """Fill in the page's entries from the document"""
+        page = fitz_doc[page_i]
+        self.rects[4 * page_i:4 * page_i + 4] = array("d", tuple(page.rect))
+        self.rotations[page_i] = page.rotation
+        link_rects = array("d")
+        link_uris = []
+        for link in page.get_links():
+            link_rects.extend(tuple(link["from"]))
+            link_uris.append(link.get("uri"))
+        self.link_rects[page_i] = link_rects
+        self.link_uris[page_i] = tuple(link_uris)
+        self.image_xrefs[page_i] = array("l", [image[0] for image in page.get_images()])
+        font_xrefs = array("l")
+        for font in page.get_fonts():
+            font_xrefs.append(font[0])
+            self.font_names[font[0]] = font[3]
+        self.font_xrefs[page_i] = font_xrefs
+        # Copies of a page (such as the same cover sheet merged twice) share the content hash,
+        # empty pages get none (they are not duplicates of each other). Besides the content
+        # stream it covers every form, image, and font the page uses and its annotations, pages
+        # placed with show_pdf_page() all have the content "q /fzFrm0 Do Q".
+        contents = page.read_contents()
+        value_type, _annots = fitz_doc.xref_get_key(page.xref, "Annots")
+        if contents.strip() or value_type != "null":
+            content_hash = hashlib.sha1(contents)
+            content_hash.update(
+                f"{tuple(page.rect)} {tuple(page.mediabox)} {page.rotation}".encode("utf-8"))
+            content_hash.update(
+                get_page_resource_hash(fitz_doc, page, self.object_hashes).encode("utf-8"))
+            self.content_hashes[page_i] = content_hash.hexdigest()
+        else:
+            self.content_hashes[page_i] = ""
+        self.analysed[page_i] = 1
+
+    def build_step(self, fitz_doc, max_pages=20):
+        """Analyse up to max_pages more pages, returning True once the index is complete"""
+        page_count = len(self.analysed)
+        analysed_pages = 0
+        while self.next_page < page_count and analysed_pages < max_pages:
+            if not self.analysed[self.next_page]:
+                self.analyse_page(fitz_doc, self.next_page)
+                analysed_pages += 1
+            self.next_page += 1
+        if self.next_page >= page_count:
+            if self.is_complete():
+                return True
+            self.next_page = 0 # Pages invalidated behind the build position, go around again.
+        return False
+
+    def _ensure(self, fitz_doc, page_i):
+        """Analyse the page now if the background build has not reached it yet"""
+        if not self.analysed[page_i]:
+            self.analyse_page(fitz_doc, page_i)
+
+    def get_rect(self, fitz_doc, page_i):
+        """Get the page's (x0, y0, x1, y1) rect"""
+        self._ensure(fitz_doc, page_i)
+        return tuple(self.rects[4 * page_i:4 * page_i + 4])
+
+    def get_links(self, fitz_doc, page_i):
+        """Get the page's links as ((x0, y0, x1, y1), uri) pairs"""
+        self._ensure(fitz_doc, page_i)
+        link_rects = self.link_rects[page_i]
+        return [
+            (tuple(link_rects[4 * link_i:4 * link_i + 4]), uri)
+            for link_i, uri in enumerate(self.link_uris[page_i])
+        ]
+
+    def get_image_xrefs(self, fitz_doc, page_i):
+        """Get the xrefs of the images used by the page"""
+        self._ensure(fitz_doc, page_i)
+        return list(self.image_xrefs[page_i])
+
+    def get_font_xrefs(self, fitz_doc, page_i):
+        """Get the xrefs of the fonts used by the page"""
+        self._ensure(fitz_doc, page_i)
+        return list(self.font_xrefs[page_i])
+
+    def get_content_hash(self, fitz_doc, page_i):
+        """Get the hash of the page's content streams, resources, and annotations"""
+        self._ensure(fitz_doc, page_i)
+        return self.content_hashes[page_i]
+
+    def get_raster_hash(self, fitz_doc, page_i):
+        """Get the page's get_raster_hash(), rendering it only the first time"""
+        if self.raster_hashes[page_i] is None:
+            page = fitz_doc[page_i]
+            page_text = TEXT_PAGES.get(page, self.get_content_hash(fitz_doc, page_i))
+            self.raster_hashes[page_i] = get_raster_hash(page, page_text.text)
+        return self.raster_hashes[page_i]
+
+    def get_font_name(self, xref):
+        """Get the base font name of a font xref returned by get_font_xrefs()"""
+        return self.font_names.get(xref, "")
+
+    def invalidate(self, page_i):
+        """Forget the page's entries (and its cached text) after its content has changed"""
+        TEXT_PAGES.invalidate(self.content_hashes[page_i])
+        self.analysed[page_i] = 0
+        self.raster_hashes[page_i] = None
+        self.object_hashes = {} # The edit may have changed objects other pages share.
+
+    def forget_xrefs(self):
+        """Analyse every page again after a garbage collecting save has renumbered the objects"""
+        self.analysed = bytearray(len(self.analysed))
+        self.font_names = {}
+        self.object_hashes = {}
+        self.next_page = 0
+
+    def insert_pages(self, at_index, count=1):
+        """Make room for pages inserted at at_index (not yet analysed)"""
+        self.analysed[at_index:at_index] = bytes(count)
+        self.rects[4 * at_index:4 * at_index] = array("d", bytes(8 * 4 * count))
+        self.rotations[at_index:at_index] = array("h", bytes(2 * count))
+        self.link_rects[at_index:at_index] = [array("d") for _page_i in range(count)]
+        self.link_uris[at_index:at_index] = [() for _page_i in range(count)]
+        self.image_xrefs[at_index:at_index] = [array("l") for _page_i in range(count)]
+        self.font_xrefs[at_index:at_index] = [array("l") for _page_i in range(count)]
+        self.content_hashes[at_index:at_index] = ["" for _page_i in range(count)]
+        self.raster_hashes[at_index:at_index] = [None for _page_i in range(count)]
+        self.next_page = min(self.next_page, at_index)
+
+    def remove_page(self, page_i):
+        """Drop the entries of a deleted page"""
+        del self.analysed[page_i]
+        del self.rects[4 * page_i:4 * page_i + 4]
+        del self.rotations[page_i]
+        del self.link_rects[page_i]
+        del self.link_uris[page_i]
+        del self.image_xrefs[page_i]
+        del self.font_xrefs[page_i]
+        del self.content_hashes[page_i]
+        del self.raster_hashes[page_i]
+        if self.next_page > page_i:
+            self.next_page -= 1
+
+    def select(self, order):
+        """Get the index for the pages after fitz.Document.select(order), repeats not analysed"""
+        selected = DocumentIndex(0)
+        seen_pages = set()
+        for page_i in order:
+            selected.analysed.append(self.analysed[page_i] if page_i not in seen_pages else 0)
+            seen_pages.add(page_i)
+            selected.rects.extend(self.rects[4 * page_i:4 * page_i + 4])
+            selected.rotations.append(self.rotations[page_i])
+            selected.link_rects.append(self.link_rects[page_i])
+            selected.link_uris.append(self.link_uris[page_i])
+            selected.image_xrefs.append(self.image_xrefs[page_i])
+            selected.font_xrefs.append(self.font_xrefs[page_i])
+            selected.content_hashes.append(self.content_hashes[page_i])
+            selected.raster_hashes.append(self.raster_hashes[page_i])
+        selected.font_names = dict(self.font_names)
+        selected.object_hashes = dict(self.object_hashes)
+        return selected
+
+    def save(self, index_path):
+        """Write the index to index_path, for reuse while the file is unchanged"""
+        index_data = {
+            "analysed": list(self.analysed),
+            "rects": self.rects.tolist(),
+            "rotations": self.rotations.tolist(),
+            "link_rects": [link_rects.tolist() for link_rects in self.link_rects],
+            "link_uris": [list(link_uris) for link_uris in self.link_uris],
+            "image_xrefs": [image_xrefs.tolist() for image_xrefs in self.image_xrefs],
+            "font_xrefs": [font_xrefs.tolist() for font_xrefs in self.font_xrefs],
+            "font_names": [[xref, name] for xref, name in self.font_names.items()],
+            "content_hashes": self.content_hashes,
+            "object_hashes": [
+                [xref, object_hash] for xref, object_hash in self.object_hashes.items()],
+            "raster_hashes": self.raster_hashes,
+        }
+        os.makedirs(os.path.dirname(index_path), exist_ok=True)
+        with open(index_path + ".tmp", "w", encoding="utf-8") as index_file:
+            json.dump(index_data, index_file)
+        os.replace(index_path + ".tmp", index_path)
+
+    @classmethod
+    def load(cls, index_path, page_count):
+        """Read an index written by save(), returning None if it is missing or does not fit"""
+        try:
+            with open(index_path, "r", encoding="utf-8") as index_file:
+                index_data = json.load(index_file)
+        except (OSError, ValueError):
+            return None
+        if len(index_data["analysed"]) != page_count or "object_hashes" not in index_data:
+            return None # Written for another version of the file, or by an older version.
+        index = cls(0)
+        index.analysed = bytearray(index_data["analysed"])
+        index.rects = array("d", index_data["rects"])
+        index.rotations = array("h", index_data["rotations"])
+        index.link_rects = [array("d", link_rects) for link_rects in index_data["link_rects"]]
+        index.link_uris = [tuple(link_uris) for link_uris in index_data["link_uris"]]
+        index.image_xrefs = [array("l", image_xrefs) for image_xrefs in index_data["image_xrefs"]]
+        index.font_xrefs = [array("l", font_xrefs) for font_xrefs in index_data["font_xrefs"]]
+        index.font_names = {xref: name for xref, name in index_data["font_names"]}
+        index.content_hashes = index_data["content_hashes"]
+        index.object_hashes = {
+            xref: object_hash for xref, object_hash in index_data["object_hashes"]}
+        index.raster_hashes = index_data["raster_hashes"]
+        return index
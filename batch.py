@@ -0,0 +1,213 @@
+"""
+    Author: lefkovitj (https://lefkovitzj.com)
+    File Last Modified: 10/19/2026
+    Project Name: PyPdfApp
+    File Name: batch.py
+"""
+
+# Python Standard Library Imports.
+import copy
+
+# Third-party Module Imports.
+import fitz
+
+# Project Imports.
+from history import JournalEntry
+
+
+class PageBatch():
+    """Page operations collected into a plan, applied later as a single select() pass"""
+    def __init__(self, page_count, marked_pages=()):
+        """Initialize an empty plan for a document of page_count pages"""
+        self.page_count = page_count
+        self.order = list(range(page_count)) # Source page of each page in the result.
+        self.rotations = [0] * page_count # Degrees added to each page in the result.
+        marked_pages = set(marked_pages)
+        self.marks = [page_i in marked_pages for page_i in range(page_count)] # Follow the pages.
+
+    def __len__(self):
+        return len(self.order)
+
+    def _take(self, positions):
+        """Rebuild the plan from positions in the result so far"""
+        self.order = [self.order[position] for position in positions]
+        self.rotations = [self.rotations[position] for position in positions]
+        self.marks = [self.marks[position] for position in positions]
+
+    def delete(self, pages):
+        """Delete pages (positions in the result so far)"""
+        deleted_pages = set(pages)
+        if len(deleted_pages) >= len(self.order):
+            raise ValueError("A PDF must keep at least one page")
+        self._take([
+            position for position in range(len(self.order)) if position not in deleted_pages])
+
+    def delete_range(self, start_page, end_page):
+        """Delete the pages from start_page to end_page (inclusive)"""
+        self.delete(range(start_page, end_page + 1))
+
+    def permute(self, new_order):
+        """Reorder the pages, new_order listing every position of the result so far once"""
+        if sorted(new_order) != list(range(len(self.order))):
+            raise ValueError("new_order must list every page exactly once")
+        self._take(new_order)
+
+    def move(self, pages, to_index):
+        """Move pages (keeping their order) so that the first of them ends up at to_index"""
+        moved_pages = sorted(set(pages))
+        other_pages = [
+            position for position in range(len(self.order)) if position not in moved_pages]
+        to_index = max(0, min(to_index, len(other_pages)))
+        self._take(other_pages[:to_index] + moved_pages + other_pages[to_index:])
+
+    def shift(self, pages, step):
+        """Move each page one position up (step -1) or down (step 1), keeping the gaps"""
+        shifted_pages = set(pages)
+        positions = list(range(len(self.order)))
+        scan = range(len(positions)) if step < 0 else range(len(positions) - 1, -1, -1)
+        for position in scan:
+            target = position + step
+            if (0 <= target < len(positions)
+                and positions[position] in shifted_pages
+                and positions[target] not in shifted_pages):
+                positions[position], positions[target] = positions[target], positions[position]
+        self._take(positions)
+
+    def rotate(self, pages, degrees):
+        """Rotate pages by a multiple of 90 degrees"""
+        if degrees % 90:
+            raise ValueError("Pages can only be rotated by multiples of 90 degrees")
+        for position in set(pages):
+            self.rotations[position] += degrees
+
+    def duplicate(self, pages):
+        """Insert a copy of each page directly after it"""
+        duplicated_pages = set(pages)
+        positions = []
+        for position in range(len(self.order)):
+            positions.append(position)
+            if position in duplicated_pages:
+                positions.append(position)
+        self._take(positions)
+
+    def get_marked_pages(self):
+        """Get the result positions of the pages marked when the batch was created"""
+        return [position for position, marked in enumerate(self.marks) if marked]
+
+    def is_empty(self):
+        """Return True if applying the batch would not change the document"""
+        return self.order == list(range(self.page_count)) and not any(
+            degrees % 360 for degrees in self.rotations)
+
+    def apply(self, pdf_doc, page_i=None):
+        """Apply every operation to the PdfDocInstance at once, returning its journal entry"""
+        if page_i is None:
+            page_i = pdf_doc.page_i
+        batch_entry = PageBatchEntry(self, page_i)
+        batch_entry.redo(pdf_doc)
+        return batch_entry
+
+
+class PageBatchEntry(JournalEntry):
+    """A PageBatch applied to a document, undone with a second select() pass"""
+    description = "Page batch"
+    changes_page_count = True
+
+    def __init__(self, batch, page_i):
+        super().__init__(page_i)
+        self.order = list(batch.order)
+        self.rotations = list(batch.rotations)
+        self.old_page_count = batch.page_count
+        self.deleted_pages = sorted(set(range(batch.page_count)) - set(batch.order))
+        # Filled in by redo(), everything undo() needs to restore the document.
+        self.side_doc = None
+        self.old_rotations = {}
+        self.old_page_data = None
+        self.old_index = None
+
+    def redo(self, pdf_doc):
+        """Apply the plan, either completely or (if MuPDF refuses it) not at all"""
+        fitz_doc = pdf_doc.doc
+        if len(fitz_doc) != self.old_page_count:
+            raise ValueError("The PDF has changed since the batch was planned")
+
+        # Pages used more than once are copied first, select() would share one page object.
+        copies_start = len(fitz_doc)
+        select_order = []
+        used_pages = set()
+        try:
+            for source_page in self.order:
+                if source_page in used_pages:
+                    fitz_doc.fullcopy_page(source_page)
+                    select_order.append(len(fitz_doc) - 1)
+                else:
+                    used_pages.add(source_page)
+                    select_order.append(source_page)
+            side_doc = fitz.open()
+            for page_i in self.deleted_pages: # Kept for undo().
+                side_doc.insert_pdf(fitz_doc, from_page=page_i, to_page=page_i)
+            old_rotations = {
+                source_page: fitz_doc[source_page].rotation
+                for source_page, degrees in zip(self.order, self.rotations) if degrees % 360
+            }
+            fitz_doc.select(select_order)
+        except Exception: # Nothing has been changed but the copies, remove them again.
+            if len(fitz_doc) > copies_start:
+                fitz_doc.delete_pages(copies_start, len(fitz_doc) - 1)
+            raise
+        self.side_doc = side_doc
+        self.old_rotations = old_rotations
+        for page_i, degrees in enumerate(self.rotations):
+            if degrees % 360:
+                page = fitz_doc[page_i]
+                page.set_rotation((page.rotation + degrees) % 360)
+
+        # Keep the markup and the analysis index aligned with the new page order.
+        self.old_page_data = [
+            pdf_doc.get_page_data(page_i) for page_i in range(self.old_page_count)]
+        page_data = []
+        used_pages = set()
+        for source_page in self.order:
+            source_data = self.old_page_data[source_page]
+            if source_page in used_pages: # Each copy gets markup of its own.
+                source_data = copy.deepcopy(source_data)
+            page_data.append(source_data)
+            used_pages.add(source_page)
+        pdf_doc.freehand_points = [data[0] for data in page_data]
+        pdf_doc.redact_points = [data[1] for data in page_data]
+        pdf_doc.highlight_points = [data[2] for data in page_data]
+        pdf_doc.markup_loaded = [data[3] for data in page_data]
+        self.old_index = pdf_doc.index
+        pdf_doc.index = pdf_doc.index.select(self.order)
+        for page_i, degrees in enumerate(self.rotations):
+            if degrees % 360:
+                pdf_doc.index.invalidate(page_i)
+
+    def undo(self, pdf_doc):
+        """Restore the pages as they were before the plan was applied"""
+        fitz_doc = pdf_doc.doc
+        first_positions = {}
+        for page_i, source_page in enumerate(self.order):
+            first_positions.setdefault(source_page, page_i)
+        for source_page, rotation in self.old_rotations.items():
+            fitz_doc[first_positions[source_page]].set_rotation(rotation)
+        deleted_start = len(fitz_doc)
+        if self.deleted_pages: # MuPDF refuses to insert an empty document.
+            fitz_doc.insert_pdf(self.side_doc)
+        deleted_positions = {
+            source_page: deleted_start + deleted_i
+            for deleted_i, source_page in enumerate(self.deleted_pages)
+        }
+        fitz_doc.select([
+            first_positions[source_page] if source_page in first_positions
+            else deleted_positions[source_page]
+            for source_page in range(self.old_page_count)
+        ])
+
+        pdf_doc.freehand_points = [data[0] for data in self.old_page_data]
+        pdf_doc.redact_points = [data[1] for data in self.old_page_data]
+        pdf_doc.highlight_points = [data[2] for data in self.old_page_data]
+        pdf_doc.markup_loaded = [data[3] for data in self.old_page_data]
+        pdf_doc.index = self.old_index
+        for source_page in self.deleted_pages + list(self.old_rotations):
+            pdf_doc.index.invalidate(source_page) # Copied back with new xrefs, or rotated back.
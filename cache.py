@@ -0,0 +1,263 @@
+"""
+    Author: lefkovitj (https://lefkovitzj.com)
+    File Last Modified: 10/19/2026
+    Project Name: PyPdfApp
+    File Name: cache.py
+"""
+
+# Python Standard Library Imports.
+from collections import OrderedDict
+import hashlib
+import os
+import re
+import sys
+
+# Third-party Module Imports.
+import fitz
+import numpy as np
+from PIL import Image
+
+
+# An indirect reference ("12 0 R") within the source of a PDF object.
+REFERENCE_PATTERN = re.compile(r"\b(\d+) \d+ R\b")
+# References back up the object tree (an annotation's page, a popup's parent annotation), which
+# are left out so that hashing an object never hashes the page it belongs to.
+BACK_REFERENCE_PATTERN = re.compile(r"/(?:P|Parent)\s*\d+ \d+ R\b")
+
+
+def get_object_hash(fitz_doc, xref, object_hashes=None, visiting=None):
+    """Hash an object, its stream, and every object it references (images, forms, fonts)"""
+    # Objects are hashed by what they hold rather than by their xref, so copies of a page in
+    # different files hash the same. object_hashes is an optional xref -> hash memo, it must be
+    # emptied whenever objects of the document may have been changed.
+    if object_hashes is not None and xref in object_hashes:
+        return object_hashes[xref]
+    if visiting is None:
+        visiting = set()
+    if xref in visiting: # A reference cycle, its start is already being hashed.
+        return "cycle"
+    visiting.add(xref)
+    object_hash = hashlib.sha1(hash_object_source(
+        fitz_doc, fitz_doc.xref_object(xref, compressed=True), object_hashes, visiting))
+    if fitz_doc.xref_is_stream(xref):
+        object_hash.update(fitz_doc.xref_stream_raw(xref) or b"")
+    visiting.discard(xref)
+    if object_hashes is not None:
+        object_hashes[xref] = object_hash.hexdigest()
+    return object_hash.hexdigest()
+
+def hash_object_source(fitz_doc, source, object_hashes=None, visiting=None):
+    """Get the source of a PDF object or value, each reference replaced by its object's hash"""
+    source = BACK_REFERENCE_PATTERN.sub("", source)
+    return REFERENCE_PATTERN.sub(
+        lambda match: get_object_hash(fitz_doc, int(match[1]), object_hashes, visiting),
+        source).encode("utf-8")
+
+def get_page_resources(fitz_doc, page):
+    """Get the source of the page's /Resources value, inherited from the page tree if need be"""
+    xref = page.xref
+    while xref:
+        value_type, value = fitz_doc.xref_get_key(xref, "Resources")
+        if value_type != "null":
+            return value
+        value_type, value = fitz_doc.xref_get_key(xref, "Parent")
+        xref = int(value.split()[0]) if value_type == "xref" else 0
+    return ""
+
+def get_page_resource_hash(fitz_doc, page, object_hashes=None):
+    """Hash the resources (recursively, forms, images, fonts) and the annotations of a page"""
+    # Two pages with the same content stream (such as "q /fzFrm0 Do Q") can differ in all of these.
+    resource_hash = hashlib.sha1(
+        hash_object_source(fitz_doc, get_page_resources(fitz_doc, page), object_hashes))
+    value_type, annots = fitz_doc.xref_get_key(page.xref, "Annots")
+    if value_type != "null":
+        resource_hash.update(b"Annots")
+        resource_hash.update(hash_object_source(fitz_doc, annots, object_hashes))
+    return resource_hash.hexdigest()
+
+def page_fingerprint(fitz_doc, page_i, object_hashes=None):
+    """Hash the page's definition, content streams, and resources, which change with its render"""
+    page = fitz_doc[page_i]
+    page_hash = hashlib.sha1()
+    page_hash.update(fitz_doc.xref_object(page.xref, compressed=True).encode("utf-8"))
+    page_hash.update(page.read_contents())
+    page_hash.update(f"{page.rotation} {tuple(page.rect)}".encode("utf-8"))
+    page_hash.update(get_page_resource_hash(fitz_doc, page, object_hashes).encode("utf-8"))
+    return page_hash.hexdigest()
+
+
+class ThumbnailCache():
+    """On-disk cache of page thumbnails, keyed by page fingerprint so edits never go stale"""
+    # The least recently used thumbnails are deleted once the cache is over max_mb (0 = no limit).
+    def __init__(self, cache_dir, width=200, max_mb=256):
+        """Initialize the cache in the thumbnails folder of cache_dir"""
+        self.cache_dir = os.path.join(cache_dir, "thumbnails")
+        self.width = width
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.size = sum(size for _mtime, size, _path in self.list_thumbnails())
+        self.prune()
+
+    def list_thumbnails(self):
+        """Get (last use time, size, path) of every cached thumbnail"""
+        thumbnails = []
+        for folder, _folders, file_names in os.walk(self.cache_dir):
+            for file_name in file_names:
+                thumbnail_path = os.path.join(folder, file_name)
+                try:
+                    file_stat = os.stat(thumbnail_path)
+                except OSError:
+                    continue
+                thumbnails.append((file_stat.st_mtime, file_stat.st_size, thumbnail_path))
+        return thumbnails
+
+    def prune(self):
+        """Delete the least recently used thumbnails until the cache is under 90% of max_mb"""
+        if not self.max_bytes or self.size <= self.max_bytes:
+            return
+        for _mtime, size, thumbnail_path in sorted(self.list_thumbnails()):
+            if self.size <= 0.9 * self.max_bytes:
+                break
+            try:
+                os.remove(thumbnail_path)
+            except OSError:
+                continue
+            self.size -= size
+
+    def get_path(self, fingerprint):
+        """Get the file path used for a fingerprint"""
+        return os.path.join(self.cache_dir, fingerprint[:2], f"{fingerprint}-{self.width}.png")
+
+    def get(self, fitz_doc, page_i, fingerprint=None):
+        """Get the page's thumbnail as a PIL image, rendering and storing it if not cached"""
+        if fingerprint is None:
+            fingerprint = page_fingerprint(fitz_doc, page_i)
+        thumbnail_path = self.get_path(fingerprint)
+        if os.path.isfile(thumbnail_path):
+            try:
+                img = Image.open(thumbnail_path)
+                img.load()
+                os.utime(thumbnail_path) # Its modification time is its last use.
+                return img
+            except OSError: # Partially written or corrupted, render it again.
+                pass
+
+        page = fitz_doc[page_i]
+        zoom = self.width / page.rect.width
+        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+        try:
+            os.makedirs(os.path.dirname(thumbnail_path), exist_ok=True)
+            img.save(thumbnail_path)
+            self.size += os.path.getsize(thumbnail_path)
+            self.prune()
+        except OSError: # The cache is an optimization only, keep going without it.
+            pass
+        return img
+
+    def discard(self, fingerprint):
+        """Remove a cached thumbnail"""
+        thumbnail_path = self.get_path(fingerprint)
+        try:
+            size = os.path.getsize(thumbnail_path)
+            os.remove(thumbnail_path)
+        except OSError:
+            return
+        self.size -= size
+
+
+class PageText():
+    """The text, blocks, and words of a page, extracted from one MuPDF TextPage"""
+    # The words are kept as arrays and one string rather than tuples, a few bytes per word.
+    __slots__ = ("text", "blocks", "word_text", "word_rects", "word_numbers", "nbytes")
+
+    def __init__(self, page):
+        """Extract the page's text (the text, blocks, and words flags of MuPDF are the same)"""
+        textpage = page.get_textpage()
+        words = page.get_text("words", textpage=textpage)
+        self.text = page.get_text("text", textpage=textpage)
+        self.blocks = page.get_text("blocks", textpage=textpage)
+        self.word_text = "\n".join(word[4] for word in words) # Words never hold white space.
+        self.word_rects = np.array([word[:4] for word in words], dtype=np.float32).reshape(-1, 4)
+        self.word_numbers = np.array([word[5:] for word in words], dtype=np.int32).reshape(-1, 3)
+        self.nbytes = (
+            sys.getsizeof(self.text) + sys.getsizeof(self.word_text)
+            + self.word_rects.nbytes + self.word_numbers.nbytes
+            + sum(sys.getsizeof(block[4]) + 120 for block in self.blocks))
+
+    def get_word_strings(self):
+        """Get the page's words, in the order of page.get_text("words")"""
+        return self.word_text.split("\n") if len(self.word_rects) else []
+
+    def get_words(self):
+        """Get the page's words as page.get_text("words") gives them"""
+        return [
+            (*rect, word, *numbers) for rect, word, numbers in zip(
+                self.word_rects.tolist(), self.get_word_strings(), self.word_numbers.tolist())
+        ]
+
+
+class TextPageCache():
+    """In-memory least-recently-used cache of PageText, keyed by page content hash"""
+    # Shared by everything that reads the text of pages (see TEXT_PAGES), so each page's TextPage
+    # is built once. A page's content hash covers its content stream, page box, and everything its
+    # resources and annotations reference, so pages of any open document only share an entry when
+    # they hold the same text. It changes with the page's content, and DocumentIndex.invalidate()
+    # drops the old entry. A budget of 0 keeps nothing, as in worker processes.
+    def __init__(self, budget_mb=0):
+        """Initialize an empty cache"""
+        self.budget = int(budget_mb * 1024 * 1024)
+        self.entries = OrderedDict() # Content hash -> PageText, least recently used first.
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def set_budget(self, budget_mb):
+        """Set the memory budget in MB, evicting pages to fit it"""
+        self.budget = int(budget_mb * 1024 * 1024)
+        self.evict()
+
+    def get(self, page, content_hash=None):
+        """Get the page's PageText, extracting it only if its content hash is not cached"""
+        page_text = self.entries.get(content_hash) if content_hash else None
+        if page_text is not None:
+            self.hits += 1
+            self.entries.move_to_end(content_hash)
+            return page_text
+        self.misses += 1
+        page_text = PageText(page)
+        if content_hash and page_text.nbytes <= self.budget:
+            self.entries[content_hash] = page_text
+            self.size += page_text.nbytes
+            self.evict()
+        return page_text
+
+    def invalidate(self, content_hash):
+        """Forget the page with this content hash"""
+        page_text = self.entries.pop(content_hash, None)
+        if page_text is not None:
+            self.size -= page_text.nbytes
+
+    def evict(self):
+        """Forget the least recently used pages until the cache fits its budget"""
+        while self.entries and self.size > self.budget:
+            _content_hash, page_text = self.entries.popitem(last=False)
+            self.size -= page_text.nbytes
+            self.evictions += 1
+
+    def get_stats(self):
+        """Get the hit rate and size of the cache, to choose its budget"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "pages": len(self.entries),
+            "bytes": self.size,
+            "budget_bytes": self.budget,
+        }
+
+# The cache shared within a process, the GUI sets its budget from settings.json.
+TEXT_PAGES = TextPageCache()
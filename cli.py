@@ -0,0 +1,213 @@
+"""
+    Author: lefkovitj (https://lefkovitzj.com)
+    File Last Modified: 10/19/2026
+    Project Name: PyPdfApp
+    File Name: cli.py
+"""
+
+# Python Standard Library Imports.
+import argparse
+import sys
+
+# Project Imports.
+from extract import extract_text, extract_words, parse_page_ranges
+from pagescan import open_scan_source
+from rasterize import rasterize_pages
+from mailmerge import iter_records, load_fields, mail_merge
+from merge import merge_pdfs
+from split import split_pdf
+
+
+def run_merge(args):
+    """Merge the source files and folders into one PDF"""
+    stats = merge_pdfs(
+        args.sources,
+        args.output,
+        chunk_pages=args.chunk_pages,
+        max_handles=args.open_files)
+    peak_rss = stats["process_peak_rss_mb"]
+    peak_rss = f"{peak_rss:.0f} MB" if peak_rss is not None else "unknown"
+    print(f"Merged {stats['pages']} pages from {stats['sources']} sources into {args.output} "
+          f"in {stats['seconds']:.2f}s ({stats['pages_per_second']:.0f} pages/s, "
+          f"process peak memory {peak_rss})")
+
+def run_split(args):
+    """Split one PDF into parts"""
+    stats = split_pdf(
+        args.source,
+        args.output_dir,
+        pages_per_part=args.pages,
+        max_bytes=int(args.max_mb * 1024 * 1024) if args.max_mb else None,
+        by_outline=args.outline,
+        password=args.password,
+        workers=args.workers)
+    for part_path, part_bytes in zip(stats["part_paths"], stats["part_bytes"]):
+        print(f"{part_path} ({part_bytes / 1024:.0f} KB)")
+    print(f"Split {stats['pages']} pages into {len(stats['part_paths'])} parts "
+          f"in {stats['seconds']:.2f}s")
+
+def run_mail_merge(args):
+    """Stamp every record onto a copy of the template"""
+    stats = mail_merge(
+        args.template,
+        iter_records(args.records),
+        load_fields(args.fields),
+        output_pattern=args.output,
+        combined_path=args.combined,
+        password=args.password,
+        workers=args.workers,
+        batch_size=args.batch_size)
+    print(f"Wrote {stats['documents']} documents in {stats['seconds']:.2f}s "
+          f"({stats['documents_per_second']:.0f} documents/s)")
+
+def run_extract_text(args):
+    """Extract the text of a PDF (or a range of its pages) to a file"""
+    with open_scan_source(args.source, args.password) as source_doc:
+        pages = parse_page_ranges(args.pages, len(source_doc))
+    def show_progress(pages_done, page_count):
+        print(f"\rExtracted {pages_done}/{page_count} pages", end="", file=sys.stderr, flush=True)
+    stats = extract_text(
+        args.source,
+        args.output,
+        pages=pages,
+        text_format=args.format,
+        password=args.password,
+        workers=args.workers,
+        progress=show_progress)
+    print(file=sys.stderr)
+    print(f"Extracted {stats['pages']} pages into {args.output} in {stats['seconds']:.2f}s "
+          f"({stats['pages_per_second']:.0f} pages/s)")
+
+def run_extract_words(args):
+    """Extract every word and block of a PDF (or a range of its pages) with its box"""
+    with open_scan_source(args.source, args.password) as source_doc:
+        pages = parse_page_ranges(args.pages, len(source_doc))
+    def show_progress(pages_done, page_count):
+        print(f"\rExtracted {pages_done}/{page_count} pages", end="", file=sys.stderr, flush=True)
+    stats = extract_words(
+        args.source,
+        args.output,
+        pages=pages,
+        password=args.password,
+        workers=args.workers,
+        progress=show_progress)
+    print(file=sys.stderr)
+    print(f"Extracted the words of {stats['pages']} pages into {args.output} in "
+          f"{stats['seconds']:.2f}s ({stats['pages_per_second']:.0f} pages/s)")
+
+def run_rasterize(args):
+    """Render the pages of a PDF (or a range of them) to image files"""
+    with open_scan_source(args.source, args.password) as source_doc:
+        pages = parse_page_ranges(args.pages, len(source_doc))
+    def show_progress(pages_done, page_count):
+        print(f"\rRendered {pages_done}/{page_count} pages", end="", file=sys.stderr, flush=True)
+    stats = rasterize_pages(
+        args.source,
+        args.output,
+        pages=pages,
+        dpi=args.dpi,
+        grayscale=args.gray,
+        quality=args.quality,
+        password=args.password,
+        workers=args.workers,
+        progress=show_progress)
+    print(file=sys.stderr)
+    print(f"Rendered {stats['pages']} pages ({stats['output_bytes'] / 1024 / 1024:.1f} MB) in "
+          f"{stats['seconds']:.2f}s ({stats['pages_per_second']:.1f} pages/s)")
+
+def get_parser():
+    """Build the command-line argument parser"""
+    parser = argparse.ArgumentParser(
+        prog="cli.py",
+        description="Run PyPdfApp batch operations without the GUI.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    merge_parser = commands.add_parser("merge", help="merge PDF files and folders into one")
+    merge_parser.add_argument("output", help="the merged PDF file to write")
+    merge_parser.add_argument("sources", nargs="+", help="PDF files, or folders of PDF files")
+    merge_parser.add_argument("--chunk-pages", type=int, default=500,
+                              help="pages held in memory before they are written (default 500)")
+    merge_parser.add_argument("--open-files", type=int, default=8,
+                              help="source files kept open at once (default 8)")
+    merge_parser.set_defaults(run=run_merge)
+
+    split_parser = commands.add_parser("split", help="split a PDF file into parts")
+    split_parser.add_argument("source", help="the PDF file to split")
+    split_parser.add_argument("output_dir", help="the folder to write the parts to")
+    split_by = split_parser.add_mutually_exclusive_group(required=True)
+    split_by.add_argument("--pages", type=int, help="pages per part")
+    split_by.add_argument("--max-mb", type=float, help="largest estimated part size in MB")
+    split_by.add_argument("--outline", action="store_true",
+                          help="start a part at each top-level bookmark")
+    split_parser.add_argument("--password", help="password of an encrypted PDF")
+    split_parser.add_argument("--workers", type=int, default=0,
+                              help="worker processes (default 0 = one per CPU)")
+    split_parser.set_defaults(run=run_split)
+
+    mail_merge_parser = commands.add_parser(
+        "mailmerge",
+        help="stamp the fields of each record onto a copy of a template PDF")
+    mail_merge_parser.add_argument("template", help="the template PDF file")
+    mail_merge_parser.add_argument("records", help="a .csv, .json, or .jsonl file of records")
+    mail_merge_parser.add_argument("fields", help="a .json file with the field layout")
+    merge_into = mail_merge_parser.add_mutually_exclusive_group(required=True)
+    merge_into.add_argument("--output",
+                            help="file name per record, such as out/{_index}.pdf or out/{id}.pdf")
+    merge_into.add_argument("--combined", help="one PDF file for every record")
+    mail_merge_parser.add_argument("--password", help="password of an encrypted template")
+    mail_merge_parser.add_argument("--workers", type=int, default=0,
+                                   help="worker processes (default 0 = one per CPU)")
+    mail_merge_parser.add_argument("--batch-size", type=int, default=50,
+                                   help="records sent to a worker at a time (default 50)")
+    mail_merge_parser.set_defaults(run=run_mail_merge)
+
+    text_parser = commands.add_parser("extract-text", help="extract the text of a PDF file")
+    text_parser.add_argument("source", help="the PDF file to extract from")
+    text_parser.add_argument("output", help="the .txt, .jsonl, or .md file to write")
+    text_parser.add_argument("--pages", help="pages to extract, such as 1-5,8,10- (default all)")
+    text_parser.add_argument("--format", choices=["text", "jsonl", "markdown"],
+                             help="the output format (default from the output file extension)")
+    text_parser.add_argument("--password", help="password of an encrypted PDF")
+    text_parser.add_argument("--workers", type=int, default=0,
+                             help="worker processes (default 0 = one per CPU)")
+    text_parser.set_defaults(run=run_extract_text)
+
+    words_parser = commands.add_parser(
+        "extract-words",
+        help="extract every word and block with its box, as columns or NDJSON")
+    words_parser.add_argument("source", help="the PDF file to extract from")
+    words_parser.add_argument("output", help="the .npz (NumPy columns) or .ndjson file to write")
+    words_parser.add_argument("--pages", help="pages to extract, such as 1-5,8,10- (default all)")
+    words_parser.add_argument("--password", help="password of an encrypted PDF")
+    words_parser.add_argument("--workers", type=int, default=0,
+                              help="worker processes (default 0 = one per CPU)")
+    words_parser.set_defaults(run=run_extract_words)
+
+    rasterize_parser = commands.add_parser("rasterize", help="render pages to image files")
+    rasterize_parser.add_argument("source", help="the PDF file to render")
+    rasterize_parser.add_argument(
+        "output",
+        help="a .png or .jpg file (numbered per page, such as page_0001.png), or one .tif file")
+    rasterize_parser.add_argument("--pages", help="pages to render, such as 1-5,8,10- (default all)")
+    rasterize_parser.add_argument("--dpi", type=int, default=150, help="resolution (default 150)")
+    rasterize_parser.add_argument("--gray", action="store_true", help="render in grayscale")
+    rasterize_parser.add_argument("--quality", type=int, default=85,
+                                  help="JPEG quality from 1 to 95 (default 85)")
+    rasterize_parser.add_argument("--password", help="password of an encrypted PDF")
+    rasterize_parser.add_argument("--workers", type=int, default=0,
+                                  help="worker processes (default 0 = one per CPU)")
+    rasterize_parser.set_defaults(run=run_rasterize)
+    return parser
+
+def main(argv=None):
+    """Run the command given on the command line"""
+    args = get_parser().parse_args(argv)
+    try:
+        args.run(args)
+    except (OSError, ValueError, KeyError, RuntimeError) as err:
+        print(f"Error: {err}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
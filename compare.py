@@ -0,0 +1,138 @@
+"""
+    Author: lefkovitj (https://lefkovitzj.com)
+    File Last Modified: 10/19/2026
+    Project Name: PyPdfApp
+    File Name: compare.py
+"""
+
+# Python Standard Library Imports.
+import difflib
+import time
+
+# Third-party Module Imports.
+import numpy as np
+
+# Project Imports.
+from analysis import DocumentIndex, get_index_path
+from pagescan import open_scan_source, render_gray
+from workers import create_worker_pool
+
+
+def load_index(fitz_doc, file_path, cache_dir=None):
+    """Get the index saved for the file (by the GUI or an earlier comparison), else a new index"""
+    if cache_dir is not None:
+        index = DocumentIndex.load(get_index_path(cache_dir, file_path), len(fitz_doc))
+        if index is not None:
+            return index
+    return DocumentIndex(len(fitz_doc))
+
+def save_index(index, file_path, cache_dir=None):
+    """Keep a complete index of the file for the next comparison"""
+    if cache_dir is not None and index.is_complete():
+        index.save(get_index_path(cache_dir, file_path))
+
+def pair_pages(old_doc, old_index, new_doc, new_index):
+    """Pair the pages of two documents as (old_page, new_page, same), None for added/removed pages"""
+    # Pages with the same content hash (which covers the forms, images, fonts, and annotations
+    # they use) are the same and are never rendered. Empty pages have no content hash, they are
+    # paired but left to the pixel diff like changed pages.
+    old_hashes = [old_index.get_content_hash(old_doc, page_i) for page_i in range(len(old_doc))]
+    new_hashes = [new_index.get_content_hash(new_doc, page_i) for page_i in range(len(new_doc))]
+    pairs = []
+    matcher = difflib.SequenceMatcher(None, old_hashes, new_hashes, autojunk=False)
+    for tag, old_start, old_end, new_start, new_end in matcher.get_opcodes():
+        if tag == "equal":
+            pairs += [
+                (old_i, new_i, bool(old_hashes[old_i]))
+                for old_i, new_i in zip(range(old_start, old_end), range(new_start, new_end))
+            ]
+        else:
+            pairs += pair_changed_pages(
+                old_doc, old_index, list(range(old_start, old_end)),
+                new_doc, new_index, list(range(new_start, new_end)))
+    return pairs
+
+def pair_changed_pages(old_doc, old_index, old_pages, new_doc, new_index, new_pages):
+    """Pair a run of differing pages by their raster hashes, then by position"""
+    # Keeps a page whose content was rewritten (but looks the same) paired with its old version
+    # when pages were also added or removed around it.
+    old_hashes = [old_index.get_raster_hash(old_doc, page_i) for page_i in old_pages]
+    new_hashes = [new_index.get_raster_hash(new_doc, page_i) for page_i in new_pages]
+    pairs = []
+    matcher = difflib.SequenceMatcher(None, old_hashes, new_hashes, autojunk=False)
+    for _tag, old_start, old_end, new_start, new_end in matcher.get_opcodes():
+        old_run = old_pages[old_start:old_end]
+        new_run = new_pages[new_start:new_end]
+        pairs += [(old_i, new_i, False) for old_i, new_i in zip(old_run, new_run)]
+        pairs += [(old_i, None, False) for old_i in old_run[len(new_run):]]
+        pairs += [(None, new_i, False) for new_i in new_run[len(old_run):]]
+    return pairs
+
+def get_change_boxes(changed, scale, gap=8):
+    """Get boxes around the changed pixels, one per band of changed rows, scaled to points"""
+    rows = np.flatnonzero(changed.any(axis=1))
+    if not rows.size:
+        return []
+    boxes = []
+    # A new band starts wherever more than gap unchanged rows separate two changed rows.
+    for band in np.split(rows, np.flatnonzero(np.diff(rows) > gap) + 1):
+        columns = np.flatnonzero(changed[band[0]:band[-1] + 1].any(axis=0))
+        boxes.append((
+            float(columns[0] * scale),
+            float(band[0] * scale),
+            float((columns[-1] + 1) * scale),
+            float((band[-1] + 1) * scale)))
+    return boxes
+
+def diff_page(old_page, new_page, dpi=72, threshold=48):
+    """Get the boxes (in points, on the new page as shown) where the two renders differ"""
+    old_gray = render_gray(old_page, dpi)
+    new_gray = render_gray(new_page, dpi)
+    height = max(old_gray.shape[0], new_gray.shape[0])
+    width = max(old_gray.shape[1], new_gray.shape[1])
+    # Pages of different sizes are compared on white padding, the extra area counts as changed.
+    padded = np.full((2, height, width), 255, dtype=np.int16)
+    padded[0, :old_gray.shape[0], :old_gray.shape[1]] = old_gray
+    padded[1, :new_gray.shape[0], :new_gray.shape[1]] = new_gray
+    changed = np.abs(padded[0] - padded[1]) > threshold
+    return get_change_boxes(changed, 72 / dpi)
+
+def compare_pdfs(old_path, old_password, new_path, new_password, dpi=72, cache_dir=None,
+                 new_index=None):
+    """Compare two PDF files page by page, rendering only the pages whose content differs"""
+    # Each pair is (old_page, new_page, change_boxes), with None for an added or removed page and
+    # no change boxes for an unchanged page. new_index is the index of the new file if the caller
+    # has one (such as the GUI's index of the open PDF), so its pages are not hashed again.
+    start_time = time.perf_counter()
+    old_doc = open_scan_source(old_path, old_password)
+    try:
+        new_doc = open_scan_source(new_path, new_password)
+        try:
+            old_index = load_index(old_doc, old_path, cache_dir)
+            old_was_complete = old_index.is_complete()
+            if new_index is None:
+                new_index = load_index(new_doc, new_path, cache_dir)
+            pairs = []
+            rendered_pages = 0
+            for old_i, new_i, same in pair_pages(old_doc, old_index, new_doc, new_index):
+                if same or old_i is None or new_i is None:
+                    pairs.append((old_i, new_i, []))
+                else:
+                    pairs.append((old_i, new_i, diff_page(old_doc[old_i], new_doc[new_i], dpi)))
+                    rendered_pages += 1
+            if not old_was_complete:
+                save_index(old_index, old_path, cache_dir)
+        finally:
+            new_doc.close()
+    finally:
+        old_doc.close()
+    return {
+        "pairs": pairs,
+        "rendered_pages": rendered_pages,
+        "seconds": time.perf_counter() - start_time,
+    }
+
+def compare_pdfs_in_worker(*args, **kwargs):
+    """Run compare_pdfs() in a worker process, keeping its renders off the calling process"""
+    with create_worker_pool(1, 1) as pool:
+        return pool.submit(compare_pdfs, *args, **kwargs).result()
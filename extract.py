@@ -0,0 +1,231 @@
+"""
+    Author: lefkovitj (https://lefkovitzj.com)
+    File Last Modified: 10/19/2026
+    Project Name: PyPdfApp
+    File Name: extract.py
+"""
+
+# Python Standard Library Imports.
+import json
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+
+# Third-party Module Imports.
+import numpy as np
+
+# Project Imports.
+from manipulate import TEXT_FORMATS, format_page_text
+from pagescan import get_pages, open_scan_source, stream_page_chunks
+
+# Columns of extract_words(), each item's text is stored separately (see NpzColumnWriter).
+WORD_COLUMNS = {
+    "page": np.int32, "block": np.int32, "line": np.int32, "word": np.int32,
+    "x0": np.float32, "y0": np.float32, "x1": np.float32, "y1": np.float32,
+}
+BLOCK_COLUMNS = {
+    "page": np.int32, "block": np.int32, "type": np.int8, # Type 0 is text, 1 is an image.
+    "x0": np.float32, "y0": np.float32, "x1": np.float32, "y1": np.float32,
+}
+
+
+def parse_page_ranges(ranges_text, page_count):
+    """Get the page indices of a range list such as "1-5, 8, 10-" (numbered from 1), in order"""
+    # An empty range list means every page, a range without an end runs to the last page.
+    if not ranges_text or not ranges_text.strip():
+        return list(range(page_count))
+    pages = []
+    for range_text in ranges_text.split(","):
+        start_text, dash, end_text = range_text.partition("-")
+        try:
+            start_page = int(start_text) if start_text.strip() else 1
+            end_page = int(end_text) if end_text.strip() else page_count
+            if not dash:
+                end_page = start_page
+        except ValueError:
+            raise ValueError(f"{range_text.strip()!r} is not a page or a range of pages") from None
+        if not 1 <= start_page <= end_page <= page_count:
+            raise ValueError(f"{range_text.strip()!r} is not within pages 1-{page_count}")
+        pages.extend(range(start_page - 1, end_page))
+    return pages
+
+def get_text_format(output_path):
+    """Get the text format written to output_path, from its extension (plain text if unknown)"""
+    return TEXT_FORMATS.get(os.path.splitext(output_path)[1].lower(), "text")
+
+def extract_text_pages(source_path, password, pages, text_format):
+    """Get the formatted text of a list of pages as one string (run in a worker)"""
+    source_doc = open_scan_source(source_path, password)
+    try:
+        return "".join(format_page_text(source_doc[page_i], text_format) for page_i in pages)
+    finally:
+        source_doc.close()
+
+def extract_word_pages(source_path, password, pages, output_format):
+    """Get the words and blocks of a list of pages, as NDJSON or column arrays (run in a worker)"""
+    source_doc = open_scan_source(source_path, password)
+    try:
+        if output_format == "ndjson":
+            records = []
+            for page_i in pages:
+                page = source_doc[page_i]
+                for x0, y0, x1, y1, text, block_i, block_type in page.get_text("blocks"):
+                    records.append({
+                        "kind": "block", "page": page_i + 1, "block": block_i, "type": block_type,
+                        "x0": x0, "y0": y0, "x1": x1, "y1": y1, "text": text})
+                for x0, y0, x1, y1, text, block_i, line_i, word_i in page.get_text("words"):
+                    records.append({
+                        "kind": "word", "page": page_i + 1, "block": block_i, "line": line_i,
+                        "word": word_i, "x0": x0, "y0": y0, "x1": x1, "y1": y1, "text": text})
+            return "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+        words = []
+        blocks = []
+        for page_i in pages:
+            page = source_doc[page_i]
+            blocks += [
+                (page_i + 1, block_i, block_type, x0, y0, x1, y1, text)
+                for x0, y0, x1, y1, text, block_i, block_type in page.get_text("blocks")
+            ]
+            words += [
+                (page_i + 1, block_i, line_i, word_i, x0, y0, x1, y1, text)
+                for x0, y0, x1, y1, text, block_i, line_i, word_i in page.get_text("words")
+            ]
+        return {
+            "word": get_columns(words, WORD_COLUMNS),
+            "block": get_columns(blocks, BLOCK_COLUMNS),
+        }
+    finally:
+        source_doc.close()
+
+def get_columns(rows, columns):
+    """Turn (column values..., text) rows into a dict of arrays, the text as UTF-8 bytes"""
+    # "text" holds every item's text back to back, "text_length" the byte length of each one.
+    # (extract_words() stores the lengths as running ends, counted across all chunks.)
+    encoded_text = [row[-1].encode("utf-8") for row in rows]
+    column_arrays = {
+        name: np.array([row[column_i] for row in rows], dtype=dtype)
+        for column_i, (name, dtype) in enumerate(columns.items())
+    }
+    column_arrays["text"] = np.frombuffer(b"".join(encoded_text), dtype=np.uint8)
+    column_arrays["text_length"] = np.array([len(text) for text in encoded_text], dtype=np.int64)
+    return column_arrays
+
+
+class NpzColumnWriter():
+    """Write 1-D arrays to an .npz file a chunk at a time, never holding a whole column"""
+    # Each column is appended to a temporary file, close() then copies them into the .npz (an
+    # uncompressed zip of .npy files) behind headers giving their final lengths.
+    def __init__(self, output_path):
+        """Initialize a writer with no columns"""
+        self.output_path = output_path
+        self.temp_dir = tempfile.mkdtemp(
+            prefix="pypdfapp-", dir=os.path.dirname(os.path.abspath(output_path)))
+        self.column_files = {}
+        self.dtypes = {}
+        self.lengths = {}
+
+    def append(self, name, values):
+        """Add values to the end of a column, creating it on first use"""
+        if name not in self.column_files:
+            self.column_files[name] = open(os.path.join(self.temp_dir, f"{name}.bin"), "wb")
+            self.dtypes[name] = values.dtype
+            self.lengths[name] = 0
+        self.column_files[name].write(np.ascontiguousarray(values, self.dtypes[name]).tobytes())
+        self.lengths[name] += len(values)
+
+    def close(self):
+        """Write the .npz file and remove the temporary files"""
+        try:
+            with zipfile.ZipFile(self.output_path, "w", zipfile.ZIP_STORED) as npz_file:
+                for name, column_file in self.column_files.items():
+                    column_file.close()
+                    with npz_file.open(f"{name}.npy", "w", force_zip64=True) as member:
+                        np.lib.format.write_array_header_1_0(member, {
+                            "descr": np.lib.format.dtype_to_descr(self.dtypes[name]),
+                            "fortran_order": False,
+                            "shape": (self.lengths[name],),
+                        })
+                        with open(column_file.name, "rb") as column_data:
+                            shutil.copyfileobj(column_data, member, 1024 * 1024)
+        finally:
+            self.discard()
+
+    def discard(self):
+        """Remove the temporary files without writing the .npz file"""
+        for column_file in self.column_files.values():
+            column_file.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+
+def extract_text(source_path, output_path, pages=None, text_format=None, password=None,
+                 workers=0, progress=None, cancel=None, max_chunk_pages=50):
+    """Extract the text of the pages to output_path, across the worker pool, in page order"""
+    # Cancelling (see pagescan.stream_page_chunks()) removes the output, part of the text would
+    # pass for all of it.
+    start_time = time.perf_counter()
+    if text_format is None:
+        text_format = get_text_format(output_path)
+    pages = get_pages(source_path, password, pages)
+    with open(output_path, "w", encoding="utf-8", newline="") as output_file:
+        pages_done, cancelled = stream_page_chunks(
+            extract_text_pages, (text_format,), source_path, password, pages, output_file.write,
+            workers, progress, cancel, max_chunk_pages)
+    if cancelled:
+        os.remove(output_path)
+
+    seconds = time.perf_counter() - start_time
+    return {
+        "pages": pages_done,
+        "seconds": seconds,
+        "pages_per_second": pages_done / seconds if seconds else 0.0,
+        "cancelled": cancelled,
+    }
+
+def extract_words(source_path, output_path, pages=None, password=None, workers=0,
+                  progress=None, cancel=None, max_chunk_pages=50):
+    """Extract every word and block with its box to an .npz (columns) or .ndjson file"""
+    # The .npz has word_* and block_* columns (see WORD_COLUMNS and BLOCK_COLUMNS), pages
+    # numbered from 1. Word i's text is word_text[word_text_end[i - 1]:word_text_end[i]] (from 0
+    # for the first word) as UTF-8, and the same for blocks. Each .ndjson line is one block or
+    # word, blocks first for each page.
+    start_time = time.perf_counter()
+    pages = get_pages(source_path, password, pages)
+    if os.path.splitext(output_path)[1].lower() != ".npz":
+        with open(output_path, "w", encoding="utf-8", newline="") as output_file:
+            pages_done, cancelled = stream_page_chunks(
+                extract_word_pages, ("ndjson",), source_path, password, pages, output_file.write,
+                workers, progress, cancel, max_chunk_pages)
+        if cancelled:
+            os.remove(output_path)
+    else:
+        writer = NpzColumnWriter(output_path)
+        text_ends = {"word": 0, "block": 0}
+        def write_columns(chunk_columns):
+            for kind, columns in chunk_columns.items():
+                for name, values in columns.items():
+                    if name != "text_length":
+                        writer.append(f"{kind}_{name}", values)
+                writer.append(
+                    f"{kind}_text_end", text_ends[kind] + np.cumsum(columns["text_length"]))
+                text_ends[kind] += len(columns["text"])
+        try:
+            pages_done, cancelled = stream_page_chunks(
+                extract_word_pages, ("npz",), source_path, password, pages, write_columns,
+                workers, progress, cancel, max_chunk_pages)
+        except BaseException:
+            writer.discard()
+            raise
+        if cancelled:
+            writer.discard()
+        else:
+            writer.close()
+
+    seconds = time.perf_counter() - start_time
+    return {
+        "pages": pages_done,
+        "seconds": seconds,
+        "pages_per_second": pages_done / seconds if seconds else 0.0,
+        "cancelled": cancelled,
+    }
@@ -0,0 +1,315 @@
+"""
+    Author: lefkovitj (https://lefkovitzj.com)
+    File Last Modified: 10/19/2026
+    Project Name: PyPdfApp
+    File Name: history.py
+"""
+
+# Python Standard Library Imports.
+from abc import ABC, abstractmethod
+from collections import deque
+import copy
+
+# Third-party Module Imports.
+import fitz
+
+# Project Imports.
+from manipulate import (
+    PageCropPDF,
+    PageDeletePDF,
+    PageInsertBlankPDF,
+    PageMovePDF,
+    PageRotatePDF
+)
+
+
+def move_page_to(pdf_doc, from_page, to_page):
+    """Move a page (and its markup) so that it ends up at index to_page"""
+    mover = PageMovePDF(pdf_doc.doc, None)
+    if to_page > from_page: # PyMuPDF inserts in front of the target page.
+        if to_page + 1 >= len(pdf_doc.doc):
+            mover.move(from_page, -1)
+        else:
+            mover.move(from_page, to_page + 1)
+    else:
+        mover.move(from_page, to_page)
+    pdf_doc.move_page_data(from_page, to_page)
+
+def copy_pages(fitz_doc, from_page, to_page):
+    """Copy a page range into a new (small) side document"""
+    side_doc = fitz.open()
+    side_doc.insert_pdf(fitz_doc, from_page=from_page, to_page=to_page)
+    return side_doc
+
+
+class JournalEntry(ABC):
+    """A single reversible operation, holding only the data needed to undo or redo it"""
+    description = "Edit"
+    changes_page_count = False
+    changes_page_sizes = False # The page list shows the pages at their size, so it is redrawn.
+
+    def __init__(self, page_i):
+        self.page_i = page_i # The page to show after the entry is undone or redone.
+
+    @abstractmethod
+    def undo(self, pdf_doc):
+        """Revert the operation"""
+
+    @abstractmethod
+    def redo(self, pdf_doc):
+        """Re-apply the operation"""
+
+class PageRotateEntry(JournalEntry):
+    """A page rotation by a number of degrees"""
+    description = "Rotate page"
+    def __init__(self, page_i, degrees):
+        super().__init__(page_i)
+        self.degrees = degrees
+
+    def undo(self, pdf_doc):
+        """Rotate the page back"""
+        page = pdf_doc.doc[self.page_i]
+        page.set_rotation(page.rotation - self.degrees)
+        pdf_doc.index.invalidate(self.page_i)
+
+    def redo(self, pdf_doc):
+        """Rotate the page again"""
+        rotater = PageRotatePDF(pdf_doc.doc, None, pdf_doc.index)
+        if self.degrees < 0:
+            rotater.rotate_l(self.page_i)
+        else:
+            rotater.rotate_r(self.page_i)
+
+class PageMoveEntry(JournalEntry):
+    """A page moved from one index to another"""
+    description = "Move page"
+    def __init__(self, from_page, to_page):
+        super().__init__(to_page)
+        self.from_page = from_page
+        self.to_page = to_page
+
+    def undo(self, pdf_doc):
+        """Move the page back to where it was"""
+        move_page_to(pdf_doc, self.to_page, self.from_page)
+        self.page_i = self.from_page
+
+    def redo(self, pdf_doc):
+        """Move the page again"""
+        move_page_to(pdf_doc, self.from_page, self.to_page)
+        self.page_i = self.to_page
+
+class PageInsertBlankEntry(JournalEntry):
+    """A blank page inserted at an index"""
+    description = "Insert blank page"
+    changes_page_count = True
+
+    def undo(self, pdf_doc):
+        """Remove the inserted page"""
+        PageDeletePDF(pdf_doc.doc, None).delete(self.page_i)
+        pdf_doc.remove_page_data(self.page_i)
+
+    def redo(self, pdf_doc):
+        """Insert the blank page again"""
+        PageInsertBlankPDF(pdf_doc.doc, None).insert(self.page_i)
+        pdf_doc.add_page_data(self.page_i)
+
+class PageDeleteEntry(JournalEntry):
+    """A deleted page, kept in a one page side document along with its markup"""
+    description = "Delete page"
+    changes_page_count = True
+
+    def __init__(self, pdf_doc, page_i):
+        """Capture the page before it is deleted"""
+        super().__init__(page_i)
+        self.side_doc = copy_pages(pdf_doc.doc, page_i, page_i)
+        self.markup = pdf_doc.get_page_data(page_i)
+
+    def undo(self, pdf_doc):
+        """Re-insert the deleted page from the side document"""
+        pdf_doc.doc.insert_pdf(self.side_doc, start_at=self.page_i)
+        pdf_doc.add_page_data(self.page_i, self.markup)
+
+    def redo(self, pdf_doc):
+        """Delete the page again"""
+        self.markup = pdf_doc.get_page_data(self.page_i)
+        PageDeletePDF(pdf_doc.doc, None).delete(self.page_i)
+        pdf_doc.remove_page_data(self.page_i)
+
+class PdfInsertEntry(JournalEntry):
+    """A range of pages inserted from another PDF"""
+    description = "Insert PDF"
+    changes_page_count = True
+
+    def __init__(self, pdf_doc, start_page, page_count):
+        """Capture the pages after they have been inserted"""
+        super().__init__(start_page)
+        self.page_count = page_count
+        self.side_doc = copy_pages(pdf_doc.doc, start_page, start_page + page_count - 1)
+
+    def undo(self, pdf_doc):
+        """Remove the inserted pages"""
+        pdf_doc.doc.delete_pages(self.page_i, self.page_i + self.page_count - 1)
+        for _i in range(self.page_count):
+            pdf_doc.remove_page_data(self.page_i)
+
+    def redo(self, pdf_doc):
+        """Insert the pages again from the side document"""
+        pdf_doc.doc.insert_pdf(self.side_doc, start_at=self.page_i)
+        for _i in range(self.page_count):
+            pdf_doc.add_page_data(self.page_i)
+
+class WatermarkEntry(JournalEntry):
+    """A watermark stamped onto one or more pages, stored as each page's /Contents value"""
+    description = "Watermark"
+    def __init__(self, pdf_doc, page_i, page_indices):
+        """Capture the page contents before the watermark is applied"""
+        super().__init__(page_i)
+        self.page_indices = page_indices
+        self.contents_before = self._get_contents(pdf_doc)
+        self.contents_after = None
+
+    def _get_contents(self, pdf_doc):
+        """Get the /Contents value of each affected page"""
+        return [
+            pdf_doc.doc.xref_get_key(pdf_doc.doc[page_i].xref, "Contents")[1]
+            for page_i in self.page_indices
+        ]
+
+    def _set_contents(self, pdf_doc, contents):
+        """Point each affected page at the given /Contents value"""
+        for page_i, page_contents in zip(self.page_indices, contents):
+            pdf_doc.doc.xref_set_key(pdf_doc.doc[page_i].xref, "Contents", page_contents)
+            pdf_doc.index.invalidate(page_i)
+
+    def capture_result(self, pdf_doc):
+        """Capture the page contents after the watermark is applied"""
+        self.contents_after = self._get_contents(pdf_doc)
+
+    def undo(self, pdf_doc):
+        """Restore the original page contents"""
+        self._set_contents(pdf_doc, self.contents_before)
+
+    def redo(self, pdf_doc):
+        """Restore the watermarked page contents (the stamp streams are still in the file)"""
+        self._set_contents(pdf_doc, self.contents_after)
+
+class PageCropEntry(JournalEntry):
+    """New cropboxes for a set of pages, with their markup moved to stay where it was drawn"""
+    description = "Crop pages"
+    changes_page_sizes = True
+    def __init__(self, page_i, crop_boxes):
+        super().__init__(page_i)
+        self.crop_boxes = crop_boxes # Page index -> (x0, y0, x1, y1), as for PageCropPDF.crop().
+        self.old_boxes = {}
+        self.old_markup = {} # Page index -> copies of the markup lists, restored by undo().
+
+    def redo(self, pdf_doc):
+        """Crop the pages, moving the markup by as much as the page origin moved"""
+        cropper = PageCropPDF(pdf_doc.doc, None, pdf_doc.index)
+        for page_i, crop_box in self.crop_boxes.items():
+            self.old_boxes[page_i] = tuple(pdf_doc.doc[page_i].cropbox)
+            page_data = pdf_doc.get_page_data(page_i)
+            self.old_markup[page_i] = copy.deepcopy(page_data[:3])
+            dx, dy = cropper.crop(page_i, crop_box)
+            freehand_points, redact_points, highlight_points, _markup_loaded = page_data
+            freehand_points[:] = [
+                [(x - dx, y - dy) for x, y in stroke] for stroke in freehand_points]
+            for rectlikes in (redact_points, highlight_points):
+                rectlikes[:] = [
+                    (x0 - dx, y0 - dy, x1 - dx, y1 - dy) for x0, y0, x1, y1 in rectlikes]
+
+    def undo(self, pdf_doc):
+        """Restore the old cropboxes and markup"""
+        cropper = PageCropPDF(pdf_doc.doc, None, pdf_doc.index)
+        for page_i, old_box in self.old_boxes.items():
+            cropper.crop(page_i, old_box)
+            freehand_points, redact_points, highlight_points = self.old_markup[page_i]
+            pdf_doc.freehand_points[page_i] = freehand_points
+            pdf_doc.redact_points[page_i] = redact_points
+            pdf_doc.highlight_points[page_i] = highlight_points
+
+class MetadataEntry(JournalEntry):
+    """A change to one of the custom metadata fields"""
+    description = "Set metadata"
+    def __init__(self, pdf_doc, key, new_value):
+        """Capture the field's value before it is changed"""
+        super().__init__(pdf_doc.page_i)
+        self.key = key
+        self.old_value = pdf_doc.custom_metadata.get(key)
+        self.had_key = key in pdf_doc.custom_metadata
+        self.new_value = new_value
+
+    def undo(self, pdf_doc):
+        """Restore the field's previous value"""
+        if self.had_key:
+            pdf_doc.custom_metadata[self.key] = self.old_value
+        else:
+            pdf_doc.custom_metadata.pop(self.key, None)
+
+    def redo(self, pdf_doc):
+        """Set the field's new value again"""
+        pdf_doc.custom_metadata[self.key] = self.new_value
+
+class MarkupEntry(JournalEntry):
+    """A freehand stroke, redaction, or highlight added to a page"""
+    description = "Markup"
+    def __init__(self, page_i, markup_type, item):
+        super().__init__(page_i)
+        self.markup_type = markup_type # "freehand_points", "redact_points" or "highlight_points".
+        self.item = item
+
+    def undo(self, pdf_doc):
+        """Remove the most recent copy of the item from the page's markup"""
+        page_markup = getattr(pdf_doc, self.markup_type)[self.page_i]
+        for item_i in range(len(page_markup) - 1, -1, -1):
+            if page_markup[item_i] == self.item:
+                del page_markup[item_i]
+                return
+
+    def redo(self, pdf_doc):
+        """Add the item back to the page's markup"""
+        getattr(pdf_doc, self.markup_type)[self.page_i].append(self.item)
+
+
+class OperationJournal():
+    """Bounded undo/redo history for a single PdfDocInstance"""
+    def __init__(self, max_depth=50):
+        """Initialize the journal, keeping at most max_depth entries in each direction"""
+        self.undo_stack = deque(maxlen=max(0, int(max_depth)))
+        self.redo_stack = deque(maxlen=max(0, int(max_depth)))
+
+    def record(self, entry):
+        """Record an operation that has just been applied"""
+        self.undo_stack.append(entry)
+        self.redo_stack.clear()
+
+    def undo(self, pdf_doc):
+        """Undo the most recent operation, returning its entry (or None)"""
+        if not self.undo_stack:
+            return None
+        entry = self.undo_stack.pop()
+        entry.undo(pdf_doc)
+        self.redo_stack.append(entry)
+        return entry
+
+    def redo(self, pdf_doc):
+        """Redo the most recently undone operation, returning its entry (or None)"""
+        if not self.redo_stack:
+            return None
+        entry = self.redo_stack.pop()
+        entry.redo(pdf_doc)
+        self.undo_stack.append(entry)
+        return entry
+
+    def can_undo(self):
+        """Return True if there is an operation to undo"""
+        return bool(self.undo_stack)
+
+    def can_redo(self):
+        """Return True if there is an operation to redo"""
+        return bool(self.redo_stack)
+
+    def clear(self):
+        """Forget all recorded operations"""
+        self.undo_stack.clear()
+        self.redo_stack.clear()
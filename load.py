@@ -1,12 +1,14 @@
 """
     Author: lefkovitj (https://lefkovitzj.com)
-    File Last Modified: 8/31/2025
+    File Last Modified: 10/19/2026
     Project Name: PyPdfApp
     File Name: load.py
 """
 
 # Python Standard Library Imports.
+import os
 import sys
+import time
 import traceback
 
 # Third-party Module Imports.
@@ -15,28 +17,73 @@ import customtkinter as ctk
 
 # Project imports.
 from manipulate import gui_get_file
+from utils import open_mapped_pdf
 
-def open_pdf():
-    """Open and load a PDF via the system filedialog"""
-    if len(sys.argv) == 1: # No argument provided, request file path.
+def ask_pdf_password(fitz_doc, title="Open PDF"):
+    """Prompt until an encrypted PDF is authenticated, returning the password (None if cancelled)"""
+    doc_password = ""
+    while fitz_doc.is_encrypted:
+        pass_dialog = ctk.CTkInputDialog(text="Password", title=title)
+        doc_password = pass_dialog.get_input()
+        if doc_password is None:
+            return None
+        fitz_doc.authenticate(doc_password)
+    return doc_password
+
+def get_open_info(fitz_doc):
+    """Read what the first paint needs (page count, first page size, metadata) and nothing more"""
+    first_page_size = None
+    if fitz_doc.page_count > 0:
+        first_page_rect = fitz_doc.load_page(0).rect
+        first_page_size = (first_page_rect.width, first_page_rect.height)
+    return {
+        "page_count": fitz_doc.page_count,
+        "first_page_size": first_page_size,
+        "metadata": fitz_doc.metadata,
+    }
+
+def get_command_line_paths():
+    """Get the PDF file paths included as command-line arguments"""
+    return [file_path for file_path in sys.argv[1:] if not file_path.startswith("-")]
+
+def open_pdf(file_path=None, memory_map=False):
+    """Open and load a PDF, via the system filedialog if no file path is given"""
+    if file_path is None: # Request file path.
         file_path = gui_get_file(limit_filetypes=[("PDF",".pdf")])[0]
         if file_path == "":
             return None
-    else: # File path was included as a command-line argument.
-        file_path = sys.argv[1]
 
     try:
-        fitz_doc = fitz.open(file_path)
-        doc_password = ""
-        while fitz_doc.is_encrypted:
-            if doc_password is None:
-                return None
-            pass_dialog = ctk.CTkInputDialog(text="Password", title="Open PDF")
-            doc_password = pass_dialog.get_input()
-            fitz_doc.authenticate(doc_password)
-        return file_path, fitz_doc, doc_password
+        open_start = time.perf_counter()
+        if memory_map: # Zero-copy, pages are read from the OS page cache as they are needed.
+            fitz_doc = open_mapped_pdf(file_path)
+        else:
+            fitz_doc = fitz.open(file_path)
+        open_seconds = time.perf_counter() - open_start
+        doc_password = ask_pdf_password(fitz_doc, title=f"Open {os.path.basename(file_path)}")
+        if doc_password is None:
+            return None
+        info_start = time.perf_counter() # The password prompt is not part of the open time.
+        open_info = get_open_info(fitz_doc)
+        open_info["open_seconds"] = open_seconds + time.perf_counter() - info_start
+        return file_path, fitz_doc, doc_password, open_info
 
     # Handle any application errors by returning them to the user without crashing.
     except Exception:
         print(f"Error Message: \"{traceback.format_exc()}\"")
         return None
+
+def open_prepared_pdf(prepared, memory_map=False):
+    """Open a PDF that a worker has already validated with workers.prepare_pdf()"""
+    open_start = time.perf_counter()
+    if prepared["repaired_path"] is not None: # Open the repaired copy, the file stays as it is.
+        with open(prepared["repaired_path"], "rb") as repaired_file:
+            fitz_doc = fitz.open(stream=repaired_file.read(), filetype="pdf")
+        os.remove(prepared["repaired_path"])
+    elif memory_map:
+        fitz_doc = open_mapped_pdf(prepared["file_path"])
+    else:
+        fitz_doc = fitz.open(prepared["file_path"])
+    open_info = get_open_info(fitz_doc)
+    open_info["open_seconds"] = time.perf_counter() - open_start
+    return prepared["file_path"], fitz_doc, "", open_info
@@ -0,0 +1,207 @@
+"""
+    Author: lefkovitj (https://lefkovitzj.com)
+    File Last Modified: 10/19/2026
+    Project Name: PyPdfApp
+    File Name: mailmerge.py
+"""
+
+# Python Standard Library Imports.
+import csv
+import functools
+import itertools
+import json
+import os
+import time
+
+# Third-party Module Imports.
+import fitz
+
+# Project Imports.
+from merge import merge_pdfs
+from pagescan import open_scan_source
+from workers import create_worker_pool, get_worker_count
+
+# Templates opened by this (worker) process, parsed once and copied for every record.
+_open_templates = {}
+
+
+def iter_records(records_path):
+    """Yield each record (a dict) of a .csv, .json (a list), or .jsonl file, reading lazily"""
+    extension = os.path.splitext(records_path)[1].lower()
+    with open(records_path, "r", encoding="utf-8", newline="") as records_file:
+        if extension == ".csv":
+            yield from csv.DictReader(records_file)
+        elif extension == ".jsonl":
+            for line in records_file:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from json.load(records_file)
+
+def load_fields(fields_path):
+    """Read the field layout: a list of {"name", "type", "page", "point" or "rect", ...} entries"""
+    with open(fields_path, "r", encoding="utf-8") as fields_file:
+        fields = json.load(fields_file)
+    if isinstance(fields, dict): # Also accept {"fields": [...]}.
+        fields = fields["fields"]
+    for field in fields:
+        if field.get("type", "text") not in ("text", "image"):
+            raise ValueError(f"Unknown field type {field['type']!r} for {field['name']!r}")
+        if "point" not in field and "rect" not in field:
+            raise ValueError(f"Field {field['name']!r} needs a point or a rect")
+    return fields
+
+def get_template(template_path, password=None):
+    """Get the open template, wrapped once so every stamp lands where its coordinates say"""
+    # An encrypted template is authenticated with password, the copies made from it are not
+    # encrypted.
+    if template_path not in _open_templates:
+        template_doc = open_scan_source(template_path, password)
+        for page in template_doc:
+            if not page.is_wrapped:
+                page.wrap_contents()
+        # Compress the template's streams once here, rather than again in every output's save.
+        template_data = template_doc.tobytes(garbage=1, deflate=True)
+        template_doc.close()
+        _open_templates[template_path] = fitz.open(stream=template_data, filetype="pdf")
+    return _open_templates[template_path]
+
+@functools.lru_cache(maxsize=32)
+def read_image(image_path):
+    """Read an image file once per worker, for image fields used by many records"""
+    with open(image_path, "rb") as image_file:
+        return image_file.read()
+
+def copy_dict_object(fitz_doc, source):
+    """Store the source of a dictionary as a new object, returning its xref"""
+    xref = fitz_doc.get_new_xref()
+    fitz_doc.update_object(xref, source)
+    return xref
+
+def make_resources_private(fitz_doc, page):
+    """Give the page its own /Resources and resource subdictionaries (/XObject, /Font, ...)"""
+    # Pages copied with insert_pdf(final=0) share them, and every stamp adds its image or font to
+    # them. The fonts and images they list stay shared.
+    value_type, resources = fitz_doc.xref_get_key(page.xref, "Resources")
+    if value_type == "xref":
+        resources = fitz_doc.xref_object(int(resources.split()[0]), compressed=True)
+    elif value_type != "dict":
+        return
+    resources_xref = copy_dict_object(fitz_doc, resources)
+    for key in fitz_doc.xref_get_keys(resources_xref):
+        value_type, value = fitz_doc.xref_get_key(resources_xref, key)
+        if value_type != "xref":
+            continue
+        xref = int(value.split()[0])
+        source = fitz_doc.xref_object(xref, compressed=True)
+        if not fitz_doc.xref_is_stream(xref) and source.lstrip().startswith("<<"):
+            fitz_doc.xref_set_key(resources_xref, key, f"{copy_dict_object(fitz_doc, source)} 0 R")
+    fitz_doc.xref_set_key(page.xref, "Resources", f"{resources_xref} 0 R")
+
+def stamp_record(output_doc, first_page, record, fields):
+    """Fill in the fields of one record on its copy of the template, starting at first_page"""
+    for field in fields:
+        value = record.get(field["name"], field.get("default"))
+        if value is None or value == "":
+            continue
+        page = output_doc[first_page + field.get("page", 0)]
+        if field.get("type", "text") == "image":
+            page.insert_image(fitz.Rect(field["rect"]), stream=read_image(str(value)))
+        elif "rect" in field:
+            page.insert_textbox(
+                fitz.Rect(field["rect"]),
+                str(value),
+                fontsize=field.get("fontsize", 11),
+                fontname=field.get("fontname", "helv"),
+                color=field.get("color", (0, 0, 0)),
+                align=field.get("align", 0))
+        else:
+            page.insert_text(
+                fitz.Point(field["point"]),
+                str(value),
+                fontsize=field.get("fontsize", 11),
+                fontname=field.get("fontname", "helv"),
+                color=field.get("color", (0, 0, 0)))
+
+def write_record_batch(template_path, fields, records, output_paths=None, combined_path=None,
+                       password=None):
+    """Write a batch of records, one file each or all into combined_path (run in a worker)"""
+    template_doc = get_template(template_path, password)
+    template_pages = len(template_doc)
+    if combined_path is not None:
+        combined_doc = fitz.open()
+        for record_i, record in enumerate(records):
+            # final=0 keeps the graft map, the template's fonts and images are copied once.
+            combined_doc.insert_pdf(template_doc, final=0)
+            for page_i in range(record_i * template_pages, len(combined_doc)):
+                make_resources_private(combined_doc, combined_doc[page_i])
+            stamp_record(combined_doc, record_i * template_pages, record, fields)
+        combined_doc.save(combined_path, garbage=1, deflate=True)
+        combined_doc.close()
+        return len(records)
+    for record, output_path in zip(records, output_paths):
+        output_doc = fitz.open()
+        output_doc.insert_pdf(template_doc)
+        stamp_record(output_doc, 0, record, fields)
+        output_doc.save(output_path, garbage=1, deflate=True)
+        output_doc.close()
+    return len(records)
+
+def get_output_path(output_pattern, record_i, record):
+    """Format the output file name of a record, {_index} being its number (from 1)"""
+    return output_pattern.format(_index=record_i + 1, **record)
+
+def mail_merge(template_path, records, fields, output_pattern=None, combined_path=None,
+               password=None, workers=0, batch_size=50):
+    """Stamp every record onto a copy of the template, across the worker pool"""
+    # records is any iterable of dicts (such as iter_records()), consumed a batch at a time so
+    # that only a few batches per worker are held in memory.
+    if (output_pattern is None) == (combined_path is None):
+        raise ValueError("Give either output_pattern or combined_path")
+    start_time = time.perf_counter()
+    worker_count = get_worker_count(workers)
+    records = iter(records)
+    chunk_paths = []
+    pending = []
+    document_count = 0
+    with create_worker_pool(worker_count) as pool:
+        for batch_i in itertools.count():
+            batch = list(itertools.islice(records, batch_size))
+            if not batch:
+                break
+            if combined_path is not None: # Each batch becomes one chunk file, merged at the end.
+                chunk_paths.append(f"{combined_path}.part{batch_i}")
+                pending.append(pool.submit(
+                    write_record_batch, template_path, fields, batch,
+                    combined_path=chunk_paths[-1], password=password))
+            else:
+                output_paths = [
+                    get_output_path(output_pattern, batch_i * batch_size + record_i, record)
+                    for record_i, record in enumerate(batch)
+                ]
+                for output_dir in {os.path.dirname(path) for path in output_paths}:
+                    if output_dir:
+                        os.makedirs(output_dir, exist_ok=True)
+                pending.append(pool.submit(
+                    write_record_batch, template_path, fields, batch, output_paths,
+                    password=password))
+            while len(pending) >= 2 * worker_count: # Keep the record stream ahead, not in memory.
+                document_count += pending.pop(0).result()
+        for future in pending:
+            document_count += future.result()
+
+    if document_count == 0:
+        raise ValueError("There are no records to merge")
+    if combined_path is not None:
+        try:
+            merge_pdfs(chunk_paths, combined_path)
+        finally:
+            for chunk_path in chunk_paths:
+                if os.path.exists(chunk_path):
+                    os.remove(chunk_path)
+    seconds = time.perf_counter() - start_time
+    return {
+        "documents": document_count,
+        "seconds": seconds,
+        "documents_per_second": document_count / seconds if seconds else 0.0,
+    }
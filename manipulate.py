@@ -1,12 +1,17 @@
 """
     Author: lefkovitj (https://lefkovitzj.com)
-    File Last Modified: 8/28/2025
+    File Last Modified: 10/19/2026
     Project Name: PyPdfApp
     File Name: manipulate.py
 """
 
 # Standard library imports.
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import datetime
+import functools
+import hashlib
+import json
 from tkinter import *
 from tkinter import filedialog
 import os
@@ -15,6 +20,12 @@ import os
 # Third-party imports.
 import fitz
 
+# Project imports.
+from cache import TEXT_PAGES
+
+# Text formats of extract_text(), by output file extension.
+TEXT_FORMATS = {".txt": "text", ".jsonl": "jsonl", ".md": "markdown"}
+
 def create_blank_pdf():
     """Return a PDF item with only one blank page"""
     new_doc = fitz.open()
@@ -36,6 +47,86 @@ def gui_get_file(initial_directory="", limit_filetypes=None):
     _file_path, file_name = os.path.split(complete_file_path)
     return complete_file_path, file_name
 
+def gui_get_files(initial_directory="", limit_filetypes=None):
+    """Open file explorer (using tkinter) to select one or more files"""
+    if limit_filetypes is None:
+        limit_filetypes = []
+    root = Tk()
+    root.withdraw()
+    complete_file_paths = filedialog.askopenfilenames(
+        title="File Select",
+        initialdir = os.getcwd() + "/" + initial_directory,
+        filetypes = limit_filetypes
+    )
+    root.destroy()
+    return list(complete_file_paths)
+
+def create_image_stamp(source_image):
+    """Create a one-page PDF showing the image, for WatermarkPDF.stamp()"""
+    with open(source_image, "rb") as image_file:
+        image_data = image_file.read()
+    with fitz.open(stream=image_data) as image_doc: # Only to get the image's size.
+        image_rect = image_doc[0].rect
+    stamp_doc = fitz.open()
+    stamp_page = stamp_doc.new_page(width=image_rect.width, height=image_rect.height)
+    stamp_page.insert_image(stamp_page.rect, stream=image_data)
+    return stamp_doc
+
+@functools.lru_cache(maxsize=8)
+def _get_cached_image_stamp(source_image, _mtime_ns, _size):
+    """Keep the stamp of an unchanged image, so later watermarks reuse what it embedded"""
+    return create_image_stamp(source_image)
+
+def get_image_stamp(source_image):
+    """Get the (cached) one-page stamp PDF for an image file"""
+    image_stat = os.stat(source_image)
+    return _get_cached_image_stamp(
+        os.path.abspath(source_image),
+        image_stat.st_mtime_ns,
+        image_stat.st_size)
+
+def create_text_stamp(text, fontsize=48, color=(0.5, 0.5, 0.5), opacity=0.3):
+    """Create a one-page PDF showing the text in Helvetica, for WatermarkPDF.stamp()"""
+    text_width = fitz.get_text_length(text, fontname="helv", fontsize=fontsize)
+    stamp_doc = fitz.open()
+    stamp_page = stamp_doc.new_page(width=text_width + fontsize, height=fontsize * 1.5)
+    stamp_page.insert_text(
+        (fontsize / 2, fontsize * 1.1),
+        text,
+        fontsize=fontsize,
+        fontname="helv",
+        color=color,
+        fill_opacity=opacity)
+    return stamp_doc
+
+def format_page_text(page, text_format="text", page_text=None):
+    """Get the page's text as plain text, a JSON line, or a Markdown section"""
+    # page_text is the page's cache.PageText if it was extracted already.
+    page_number = page.number + 1
+    if page_text is not None:
+        text = page_text.text
+        blocks = sorted(page_text.blocks, key=lambda block: (block[3], block[0]))
+    elif text_format == "markdown":
+        blocks = page.get_text("blocks", sort=True)
+    else:
+        text = page.get_text("text")
+    if text_format == "jsonl":
+        page_record = {"page": page_number, "text": text}
+        return json.dumps(page_record, ensure_ascii=False) + "\n"
+    if text_format == "markdown": # A heading per page, a paragraph per text block.
+        paragraphs = [
+            " ".join(block[4].split()) for block in blocks
+            if block[6] == 0 and block[4].strip()
+        ]
+        return f"## Page {page_number}\n\n" + "".join(
+            f"{paragraph}\n\n" for paragraph in paragraphs)
+    return text + "\f" # Pages end with a form feed, as pdftotext writes them.
+
+def write_file(file_path, data):
+    """Write bytes to a file"""
+    with open(file_path, "wb") as output_file:
+        output_file.write(data)
+
 def calculate_pdf_temp_title():
     """Generate a timestamp-based temporary filename"""
     tb = str(datetime.datetime.today()) # Basic timestamp string.
@@ -50,49 +141,108 @@ def calculate_pdf_temp_title():
 
 class PdfExtractor():
     """Extract data from the PDF of page"""
-    def __init__(self, fitz_doc):
+    def __init__(self, fitz_doc, index=None):
         """Initialize the object"""
         # Ensure that the necessary save folder exists.
         if "temporary-files" not in os.listdir(os.getcwd()):
             os.makedirs("temporary-files")
         self.doc = fitz_doc
-    def extract_text(self, file_loc):
-        """Extract text from the PDF"""
-        file_loc.replace(".txt", "")
-        file_loc += ".txt"
-        with open(file_loc, "w", encoding="utf-8") as text_file: # Open the output .txt file.
-            for page_i in self.doc: # Iterate through each page.
-                page_text = page_i.get_text("text")
-                text_file.write(
-                    ("Text extracted from PDF file by PyPdfUtils: "
-                     "\n\nSTART OF EXTRACTED TEXT\n")
-                )
-                text_file.write(page_text + "\n")
-                text_file.write("END OF EXTRACTED TEXT")
-        text_file.close() # Close the .txt file.
+        self.index = index # Optional analysis.DocumentIndex, saves walking the pages again.
+    def extract_text(self, file_loc, pages=None, text_format=None):
+        """Extract text from the PDF (or the listed pages) in this process"""
+        # The format follows the file extension (.txt, .jsonl, .md), .txt is added if there is none.
+        # extract.extract_text() does the same across worker processes, for large files.
+        if not os.path.splitext(file_loc)[1]:
+            file_loc += ".txt"
+        if text_format is None:
+            text_format = TEXT_FORMATS.get(os.path.splitext(file_loc)[1].lower(), "text")
+        if pages is None:
+            pages = range(len(self.doc))
+        with open(file_loc, "w", encoding="utf-8", newline="") as text_file:
+            for page_i in pages:
+                page = self.doc[page_i]
+                page_text = None
+                if self.index is not None: # Shares the text already read by search and analysis.
+                    page_text = TEXT_PAGES.get(page, self.index.get_content_hash(self.doc, page_i))
+                text_file.write(format_page_text(page, text_format, page_text))
         return True, file_loc
-    def extract_images(self, file_dir):
-        """Extract images from the PDF"""
-        os.mkdir(file_dir)
-        img_num = 1
-        for page_i in self.doc: # Iterate through each page.
-            for page_image_list in page_i.get_images():
-                xref_id = page_image_list[0] # Get the xref of the image.
-                page_image = self.doc.extract_image(xref_id) # Extract the image from the page.
-                # Save the extracted image to the temporary file directory.
-                with open(
-                    (file_dir + "\\image_" + str(img_num) + "." + page_image["ext"]),
-                    'wb') as img_bin: 
-                    img_bin.write(page_image["image"])
-                img_bin.close()
-                img_num += 1
+    def get_image_pages(self):
+        """Get {image xref: [page indices]} for every image, in the order they first appear"""
+        image_pages = {}
+        for page_i in range(len(self.doc)):
+            if self.index is not None:
+                page_image_xrefs = self.index.get_image_xrefs(self.doc, page_i)
+            else:
+                page_image_xrefs = [image[0] for image in self.doc[page_i].get_images()]
+            for xref in page_image_xrefs:
+                pages = image_pages.setdefault(xref, [])
+                if not pages or pages[-1] != page_i:
+                    pages.append(page_i)
+        return image_pages
+    def get_image_size(self, xref):
+        """Get the (width, height) in pixels of an image object, without decoding it"""
+        sizes = []
+        for key in ("Width", "Height"):
+            value_type, value = self.doc.xref_get_key(xref, key)
+            if value_type == "xref": # Stored in an object of its own.
+                value = self.doc.xref_object(int(value.split()[0]))
+            sizes.append(int(value) if value.strip().isdigit() else 0)
+        return tuple(sizes)
+    def extract_images(self, file_dir, dedupe_content=False, min_size=0, io_threads=4):
+        """Extract images from the PDF, each once, with a manifest.json of the pages using them"""
+        # Images are found by xref, so an image shown on many pages is extracted once. With
+        # dedupe_content, copies stored in separate objects (such as from merged files) are also
+        # written once. Images narrower or lower than min_size pixels are skipped. The image data
+        # is written as stored (JPEG, JPEG 2000, ...) where possible, PNG otherwise, by a pool of
+        # io_threads threads while the next images are extracted.
+        os.makedirs(file_dir, exist_ok=True)
+        images = {} # Xref, or stream hash with dedupe_content -> manifest entry.
+        with ThreadPoolExecutor(max_workers=io_threads) as writer_pool:
+            writes = []
+            for xref, pages in self.get_image_pages().items():
+                width, height = self.get_image_size(xref)
+                if width < min_size or height < min_size:
+                    continue
+                if dedupe_content:
+                    image_key = hashlib.sha1(self.doc.xref_stream_raw(xref) or b"").hexdigest()
+                else:
+                    image_key = xref
+                if image_key in images:
+                    entry = images[image_key]
+                    entry["xrefs"].append(xref)
+                    entry["pages"] = sorted(set(entry["pages"]) | {page_i + 1 for page_i in pages})
+                    continue
+                page_image = self.doc.extract_image(xref)
+                if not page_image: # Not an image that can be extracted (such as a broken one).
+                    continue
+                file_name = f"image_{len(images) + 1}.{page_image['ext']}"
+                images[image_key] = {
+                    "file": file_name,
+                    "xrefs": [xref],
+                    "pages": [page_i + 1 for page_i in pages],
+                    "width": page_image["width"],
+                    "height": page_image["height"],
+                    "bytes": len(page_image["image"]),
+                }
+                writes.append(writer_pool.submit(
+                    write_file, os.path.join(file_dir, file_name), page_image["image"]))
+            for write in writes:
+                write.result() # Raise any write error here.
+        with open(os.path.join(file_dir, "manifest.json"), "w", encoding="utf-8") as manifest_file:
+            json.dump({"images": list(images.values())}, manifest_file, indent=4)
         return True, file_dir
 
 class PDFManipulator:
     """A base class for PDF manipulation tasks."""
-    def __init__(self, fitz_doc, save_path):
+    def __init__(self, fitz_doc, save_path, index=None):
         self.doc = fitz_doc
         self.save_path = save_path
+        self.index = index # Optional analysis.DocumentIndex to keep up to date.
+
+    def page_changed(self, page_i):
+        """Invalidate the page in the analysis index after changing its content"""
+        if self.index is not None:
+            self.index.invalidate(page_i)
 
     def get(self):
         """Get the updated document object."""
@@ -114,6 +264,35 @@ class PageInsertBlankPDF(PDFManipulator):
         """Insert a blank page"""
         self.doc.insert_page(page_i)
 
+class PageSplitPDF(PDFManipulator):
+    """Write page ranges of the document to separate files"""
+    def write_part(self, start_page, end_page, part_path):
+        """Write pages start_page to end_page (inclusive), with their bookmarks, to part_path"""
+        part_doc = fitz.open()
+        part_doc.insert_pdf(self.doc, from_page=start_page, to_page=end_page)
+        part_toc = []
+        for level, title, page_number in self.doc.get_toc(simple=True):
+            if start_page < page_number <= end_page + 1: # Bookmark page numbers start at 1.
+                # Entries whose parents are in another part move up to a valid level.
+                level = min(level, part_toc[-1][0] + 1 if part_toc else 1)
+                part_toc.append([level, title, page_number - start_page])
+        part_doc.set_toc(part_toc)
+        # Objects shared by the part's pages are copied once, garbage=3 also merges duplicates.
+        part_doc.save(part_path, garbage=3, deflate=True)
+        part_doc.close()
+
+class PageCropPDF(PDFManipulator):
+    """Crop pages within the document"""
+    def crop(self, page_i, crop_box):
+        """Set the page's cropbox (unrotated, from the mediabox's top left), returning (dx, dy)"""
+        # (dx, dy) is how far the origin of the page's coordinates moved.
+        page = self.doc[page_i]
+        old_origin = page.cropbox_position
+        page.set_cropbox(fitz.Rect(crop_box))
+        self.page_changed(page_i)
+        new_origin = page.cropbox_position
+        return new_origin.x - old_origin.x, new_origin.y - old_origin.y
+
 class PageMovePDF(PDFManipulator):
     """Re-arrange pages within the document"""
     def move(self, from_page, to_page):
@@ -127,33 +306,62 @@ class PageRotatePDF(PDFManipulator):
         """Rotate the page (left)"""
         spec_page = self.doc[page_i]
         spec_page.set_rotation(spec_page.rotation - 90)
+        self.page_changed(page_i)
     def rotate_r(self, page_i):
         """Rotate the page (right)"""
         spec_page = self.doc[page_i]
         spec_page.set_rotation(spec_page.rotation + 90)
+        self.page_changed(page_i)
 
 class WatermarkPDF(PDFManipulator):
     """Watermark pages within the document"""
     def watermark(self, page_i, source_image, all_pages=False):
         """Insert a the watermark on the selected page(s)"""
-        if not all_pages:
+        page_indices = range(len(self.doc)) if all_pages else [page_i]
+        self.stamp(get_image_stamp(source_image), page_indices)
+
+    def stamp(self, stamp_doc, page_indices):
+        """Show the first page of stamp_doc over each page, scaled to fit and centered"""
+        # The stamp page becomes one Form XObject (its images and fonts embedded once) that every
+        # page references, the same stamp_doc reuses it on later calls. show_pdf_page() also wraps
+        # the page contents, the solution for flipped/rotated watermarks without reason.
+        # https://pymupdf.readthedocs.io/en/latest/recipes-common-issues-and-their-solutions.html#misplaced-item-insertions-on-pdf-pages
+        for page_i in page_indices:
             page = self.doc[page_i]
-            if not page.is_wrapped:
-                page.wrap_contents()
-            page.insert_image(page.bound(), filename = source_image, overlay = True)
-        else:
-            for page in self.doc:
-                # Solution for flipped/rotated watermark without reason.
-                # https://pymupdf.readthedocs.io/en/latest/recipes-common-issues-and-their-solutions.html#misplaced-item-insertions-on-pdf-pages
-                if not page.is_wrapped:
-                    page.wrap_contents()
-                page.insert_image(page.bound(), filename = source_image, overlay = True)
+            page.show_pdf_page(page.rect, stamp_doc, 0, overlay=True)
+            self.page_changed(page_i)
+
+class SourceHandleCache():
+    """A small least-recently-used cache of open source PDFs, shared by PdfMerger objects"""
+    def __init__(self, max_handles=8):
+        """Initialize the cache, keeping at most max_handles files open"""
+        self.max_handles = max(1, max_handles)
+        self.handles = OrderedDict() # File path -> fitz.Document, most recently used last.
+
+    def get(self, file_path):
+        """Get the open document for a file, opening it (and closing the oldest) if needed"""
+        if file_path in self.handles:
+            self.handles.move_to_end(file_path)
+            return self.handles[file_path]
+        while len(self.handles) >= self.max_handles:
+            _oldest_path, oldest_doc = self.handles.popitem(last=False)
+            oldest_doc.close()
+        self.handles[file_path] = fitz.open(file_path)
+        return self.handles[file_path]
+
+    def close_all(self):
+        """Close every open document"""
+        for source_doc in self.handles.values():
+            source_doc.close()
+        self.handles.clear()
 
 class PdfMerger():
     """An object used to merge two PDF documents (or select pages) into one"""
-    def __init__(self, fitz_doc):
+    def __init__(self, fitz_doc, handles=None):
         """Initialize the object"""
         self.doc = fitz_doc
+        # Optional SourceHandleCache, sources are then opened once and their objects copied once.
+        self.handles = handles
 
     def save(self):
         """Save the document to temporary files"""
@@ -163,23 +371,40 @@ class PdfMerger():
         """Add the pages from the source document between the given indices."""
         if end_page is None: # No end page was specified, assume only one page was intended.
             end_page = start_page
-        source_file = fitz.open(source_file_loc)
+        source_file = self.open_source(source_file_loc)
         if end_page == -1:
             # No to_page argument, default to last page.
-            self.doc.insert_pdf(source_file, from_page=start_page, start_at = start_i)
+            self.doc.insert_pdf(
+                source_file,
+                from_page=start_page,
+                start_at = start_i,
+                final = self.handles is None)
         else:
             self.doc.insert_pdf(
                 source_file,
                 from_page=start_page,
                 to_page=end_page,
-                start_at = start_i)
-        source_file.close()
+                start_at = start_i,
+                final = self.handles is None)
+        self.close_source(source_file)
 
     def add_pdf(self, source_file_loc, start_i):
         """Add all pages from the source document."""
-        source_file = fitz.open(source_file_loc)
-        self.doc.insert_pdf(source_file, start_at = start_i)
-        source_file.close()
+        source_file = self.open_source(source_file_loc)
+        self.doc.insert_pdf(source_file, start_at = start_i, final = self.handles is None)
+        self.close_source(source_file)
+
+    def open_source(self, source_file_loc):
+        """Open a source document, through the handle cache if there is one"""
+        if self.handles is not None:
+            return self.handles.get(source_file_loc)
+        return fitz.open(source_file_loc)
+
+    def close_source(self, source_file):
+        """Close a source document, unless the handle cache keeps it open"""
+        # The graft map of a cached source is kept, so its shared fonts and images are reused.
+        if self.handles is None:
+            source_file.close()
 
     def add_fitz_doc(self, source_fitz_doc, start_i):
         """Add all pages from the source document."""
@@ -189,14 +414,9 @@ class PdfMerger():
     def remove_page(self, page_i):
         """Remove a page at the given index if it exists"""
         doc_len = len(self.doc)
-        if page_i <= doc_len:
-            new_doc = fitz.open()
-            # Add all the pages up to the page that is to be removed.
-            new_doc.insert_pdf(self.doc, from_page = 0, to_page=page_i-1)
-            if page_i != doc_len:
-                # Add all pages after the page to be removed.
-                new_doc.insert_pdf(self.doc, from_page = page_i+1)
-            self.doc = new_doc
+        if 0 <= page_i < doc_len:
+            # Drop the page in place, rather than copying every other page into a new document.
+            self.doc.select([kept_i for kept_i in range(doc_len) if kept_i != page_i])
         else: # The page does not exist at the given index.
             raise IndexError(f"Page index out of range for document of length {doc_len}")
 
@@ -0,0 +1,95 @@
+"""
+    Author: lefkovitj (https://lefkovitzj.com)
+    File Last Modified: 10/19/2026
+    Project Name: PyPdfApp
+    File Name: merge.py
+"""
+
+# Python Standard Library Imports.
+import os
+import time
+
+# Third-party Module Imports.
+import fitz
+
+# Project Imports.
+from manipulate import PdfMerger, SourceHandleCache
+from utils import same_file
+from workers import get_peak_rss_mb
+
+
+def iter_merge_sources(sources):
+    """Yield (file_path, start_page, end_page) for each source, end_page -1 meaning the last page"""
+    # A source is a file path, a folder (every PDF in it, by name), or a
+    # (file_path, start_page) / (file_path, start_page, end_page) tuple.
+    for source in sources:
+        if isinstance(source, (str, os.PathLike)):
+            source = os.fspath(source)
+            if os.path.isdir(source):
+                for file_name in sorted(os.listdir(source)):
+                    if file_name.lower().endswith(".pdf"):
+                        yield os.path.join(source, file_name), 0, -1
+            else:
+                yield source, 0, -1
+        elif len(source) == 2:
+            yield os.fspath(source[0]), source[1], -1
+        else:
+            yield os.fspath(source[0]), source[1], source[2]
+
+def merge_pdfs(sources, output_path, chunk_pages=500, max_handles=8):
+    """Merge the sources into output_path, holding at most about chunk_pages pages in memory"""
+    # Pages are gathered in a small chunk document, which is appended to the output file with an
+    # incremental save and then dropped. Within a chunk the sources are inserted through a
+    # SourceHandleCache, so a file used for several page ranges is opened once and its fonts and
+    # images are copied once (its graft map is kept). Inserting into a small document also keeps
+    # each insert fast, MuPDF slows down as the document being inserted into grows.
+    start_time = time.perf_counter()
+    handles = SourceHandleCache(max_handles)
+    merger = PdfMerger(fitz.open(), handles)
+    written = False # The first chunk is a full save, later ones are appended.
+    page_count = 0
+    source_count = 0
+    try:
+        for file_path, start_page, end_page in iter_merge_sources(sources):
+            if same_file(file_path, output_path):
+                raise ValueError("The merged file cannot also be one of its sources")
+            pages_before = len(merger.doc)
+            merger.add_pages(file_path, -1, start_page, end_page)
+            page_count += len(merger.doc) - pages_before
+            source_count += 1
+            if len(merger.doc) >= chunk_pages:
+                flush_merge_chunk(merger.doc, output_path, written)
+                written = True
+                merger.doc = fitz.open()
+                # The graft maps belonged to the flushed chunk, start again for the next one.
+                handles.close_all()
+        if page_count == 0:
+            raise ValueError("The sources contain no pages to merge")
+        if len(merger.doc) or not written:
+            flush_merge_chunk(merger.doc, output_path, written)
+    finally:
+        merger.doc.close()
+        handles.close_all()
+
+    seconds = time.perf_counter() - start_time
+    return {
+        "sources": source_count,
+        "pages": page_count,
+        "seconds": seconds,
+        "pages_per_second": page_count / seconds if seconds else 0.0,
+        # The peak of the whole process so far (ru_maxrss), not only of this merge.
+        "process_peak_rss_mb": get_peak_rss_mb(),
+        "output_bytes": os.path.getsize(output_path),
+    }
+
+def flush_merge_chunk(chunk_doc, output_path, written):
+    """Write a chunk of merged pages to output_path, appending it if the file was started"""
+    if not written:
+        chunk_doc.save(output_path, deflate=True)
+        return
+    output_doc = fitz.open(output_path)
+    try:
+        output_doc.insert_pdf(chunk_doc) # One insert per chunk, its objects are copied once.
+        output_doc.save(output_path, incremental=True, encryption=fitz.PDF_ENCRYPT_KEEP)
+    finally:
+        output_doc.close()
@@ -0,0 +1,206 @@
+"""
+    Author: lefkovitj (https://lefkovitzj.com)
+    File Last Modified: 10/19/2026
+    Project Name: PyPdfApp
+    File Name: pagescan.py
+"""
+
+# Third-party Module Imports.
+import fitz
+import numpy as np
+
+# Project Imports.
+from analysis import find_duplicate_pages
+from workers import create_worker_pool, get_worker_count
+
+
+def render_gray(page, dpi):
+    """Render the page in grayscale at dpi, as a (height, width) uint8 array"""
+    pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+    samples = np.frombuffer(pix.samples, dtype=np.uint8)
+    return samples.reshape(pix.height, pix.stride)[:, :pix.width]
+
+def open_scan_source(source_path, password):
+    """Open the source file in a worker process"""
+    source_doc = fitz.open(source_path)
+    if source_doc.needs_pass and not source_doc.authenticate(password or ""):
+        source_doc.close()
+        raise ValueError(f"Wrong password for {source_path}")
+    return source_doc
+
+def get_page_chunks(page_count, worker_count):
+    """Split the pages into (start_page, end_page) ranges, a few per worker to balance the load"""
+    chunk_pages = max(1, -(-page_count // (worker_count * 4)))
+    return [
+        (start_page, min(start_page + chunk_pages, page_count) - 1)
+        for start_page in range(0, page_count, chunk_pages)
+    ]
+
+def map_page_chunks(chunk_function, source_path, password, page_count, workers, *args):
+    """Run chunk_function(source_path, password, start_page, end_page, *args) over every page"""
+    worker_count = get_worker_count(workers, page_count)
+    chunks = get_page_chunks(page_count, worker_count)
+    with create_worker_pool(worker_count, len(chunks)) as pool:
+        futures = [
+            pool.submit(chunk_function, source_path, password, start_page, end_page, *args)
+            for start_page, end_page in chunks
+        ]
+        return [future.result() for future in futures]
+
+def stream_page_chunks(chunk_function, chunk_args, source_path, password, pages, write_chunk,
+                       workers=0, progress=None, cancel=None, max_chunk_pages=50):
+    """Run chunk_function(source_path, password, chunk_pages, *chunk_args) over chunks of pages"""
+    # Each result is passed to write_chunk() in page order, as soon as every chunk before it is
+    # written, with only a few chunks per worker in flight so the results are never all held in
+    # memory. progress(pages_done, page_count) is called after each chunk is written, cancel() is
+    # checked before each one. Returns (pages_done, cancelled).
+    worker_count = get_worker_count(workers, len(pages))
+    chunk_pages = max(1, min(max_chunk_pages, -(-len(pages) // (worker_count * 4))))
+    chunks = [pages[chunk_start:chunk_start + chunk_pages]
+              for chunk_start in range(0, len(pages), chunk_pages)]
+    pages_done = 0
+    with create_worker_pool(worker_count, len(chunks)) as pool:
+        pending = []
+        next_chunk = 0
+        while pending or next_chunk < len(chunks):
+            while next_chunk < len(chunks) and len(pending) < 2 * worker_count:
+                pending.append((len(chunks[next_chunk]), pool.submit(
+                    chunk_function, source_path, password, chunks[next_chunk], *chunk_args)))
+                next_chunk += 1
+            if cancel is not None and cancel():
+                for _chunk_size, future in pending:
+                    future.cancel()
+                return pages_done, True
+            chunk_size, future = pending.pop(0)
+            write_chunk(future.result())
+            pages_done += chunk_size
+            if progress is not None:
+                progress(pages_done, len(pages))
+    return pages_done, False
+
+def get_pages(source_path, password, pages=None):
+    """Get the pages to work on as a list, every page of the file if pages is None"""
+    if pages is not None:
+        return list(pages)
+    with open_scan_source(source_path, password) as source_doc:
+        return list(range(len(source_doc)))
+
+def measure_ink(source_path, password, start_page, end_page, dpi, dark_level):
+    """Get the ink coverage and the gray level spread of a range of pages (run in a worker)"""
+    source_doc = open_scan_source(source_path, password)
+    try:
+        coverage = np.zeros(end_page - start_page + 1)
+        spread = np.zeros(end_page - start_page + 1)
+        for page_i in range(start_page, end_page + 1):
+            gray = render_gray(source_doc[page_i], dpi)
+            coverage[page_i - start_page] = np.count_nonzero(gray < dark_level) / gray.size
+            spread[page_i - start_page] = gray.std()
+    finally:
+        source_doc.close()
+    return coverage, spread
+
+def find_blank_pages(source_path, password, page_count, max_coverage=0.001, max_spread=12.0,
+                     dpi=24, dark_level=160, workers=0):
+    """Get the pages with less ink than max_coverage and a gray level spread under max_spread"""
+    # Coverage is the fraction of pixels darker than dark_level, the spread (standard deviation)
+    # keeps a page with faint but real content from passing as scanner noise.
+    results = map_page_chunks(
+        measure_ink, source_path, password, page_count, workers, dpi, dark_level)
+    coverage = np.concatenate([chunk_coverage for chunk_coverage, _spread in results])
+    spread = np.concatenate([chunk_spread for _coverage, chunk_spread in results])
+    return np.flatnonzero((coverage <= max_coverage) & (spread <= max_spread)).tolist()
+
+def get_vector_box(page):
+    """Get the content box from the page's drawing commands, or None if only a raster can tell"""
+    # Unrotated coordinates from the cropbox's top left, like get_text() and get_bboxlog().
+    page_rect = fitz.Rect(0, 0, page.cropbox.width, page.cropbox.height)
+    if page.get_images(): # Images may carry white margins of their own.
+        return None
+    content_box = None
+    for _item_type, item_rect in page.get_bboxlog():
+        item_rect = fitz.Rect(item_rect) & page_rect
+        if item_rect.is_empty:
+            continue
+        if item_rect.get_area() >= 0.95 * page_rect.get_area(): # A background fill.
+            return None
+        content_box = item_rect if content_box is None else content_box | item_rect
+    return content_box if content_box is not None else fitz.Rect()
+
+def get_raster_box(page, dpi, white_level):
+    """Get the content box of the page's render, from NumPy row and column reductions"""
+    gray = render_gray(page, dpi)
+    ink = gray < white_level
+    rows = np.flatnonzero(ink.any(axis=1))
+    if not rows.size:
+        return fitz.Rect()
+    columns = np.flatnonzero(ink.any(axis=0))
+    x_scale = page.rect.width / gray.shape[1]
+    y_scale = page.rect.height / gray.shape[0]
+    shown_box = fitz.Rect(
+        columns[0] * x_scale,
+        rows[0] * y_scale,
+        (columns[-1] + 1) * x_scale,
+        (rows[-1] + 1) * y_scale)
+    return shown_box * page.derotation_matrix # The render is rotated, the cropbox is not.
+
+def measure_content_boxes(source_path, password, start_page, end_page, dpi, white_level):
+    """Get the content box and mediabox of a range of pages (run in a worker)"""
+    # Each row is (x0, y0, x1, y1) of the content, NaN if the page is blank, then the mediabox, in
+    # unrotated coordinates from the mediabox's top left (as used by Page.set_cropbox()).
+    source_doc = open_scan_source(source_path, password)
+    try:
+        boxes = np.full((end_page - start_page + 1, 8), np.nan)
+        for page_i in range(start_page, end_page + 1):
+            page = source_doc[page_i]
+            content_box = get_vector_box(page)
+            if content_box is None:
+                content_box = get_raster_box(page, dpi, white_level)
+            if not content_box.is_empty:
+                origin = page.cropbox_position
+                boxes[page_i - start_page, :4] = tuple(content_box + (origin.x, origin.y) * 2)
+            boxes[page_i - start_page, 4:] = tuple(page.mediabox)
+    finally:
+        source_doc.close()
+    return boxes
+
+def find_content_boxes(source_path, password, page_count, dpi=36, white_level=240, workers=0):
+    """Get every page's content box and mediabox, as two (page_count, 4) arrays"""
+    boxes = np.concatenate(map_page_chunks(
+        measure_content_boxes, source_path, password, page_count, workers, dpi, white_level))
+    return boxes[:, :4], boxes[:, 4:]
+
+def find_duplicate_files(sources):
+    """Group the duplicate pages of several files, as find_duplicate_pages() (run in a worker)"""
+    # sources is a list of (key, source_path, password, index), index a copy of the file's
+    # DocumentIndex, so only the pages it has not analysed yet are hashed. Returns the groups and
+    # {key: raster hashes} for the caller to keep what was rendered.
+    source_docs = []
+    try:
+        for key, source_path, password, index in sources:
+            index.object_hashes = {} # Keyed by object number, the file's may differ.
+            source_docs.append((key, open_scan_source(source_path, password), index))
+        groups = find_duplicate_pages(source_docs)
+    finally:
+        for _key, source_doc, _index in source_docs:
+            source_doc.close()
+    return groups, {key: index.raster_hashes for key, _source_doc, index in source_docs}
+
+def find_duplicate_files_in_worker(sources):
+    """Run find_duplicate_files() in a worker process, keeping its renders off the GUI process"""
+    with create_worker_pool(1, 1) as pool:
+        return pool.submit(find_duplicate_files, sources).result()
+
+def plan_crop_boxes(content_boxes, mediaboxes, margin=6.0, uniform=False):
+    """Get the cropbox of each page (NaN rows are left uncropped), keeping margin points of space"""
+    crop_boxes = content_boxes + np.array([-margin, -margin, margin, margin])
+    if uniform: # One box around the content of every page, used for all of them.
+        if np.isnan(crop_boxes).all():
+            return crop_boxes
+        union_box = np.concatenate([
+            np.nanmin(crop_boxes[:, :2], axis=0),
+            np.nanmax(crop_boxes[:, 2:], axis=0)])
+        crop_boxes = np.broadcast_to(union_box, crop_boxes.shape).copy()
+    # Stay inside the mediabox, which Page.set_cropbox() requires.
+    crop_boxes[:, :2] = np.maximum(crop_boxes[:, :2], mediaboxes[:, :2])
+    crop_boxes[:, 2:] = np.minimum(crop_boxes[:, 2:], mediaboxes[:, 2:])
+    return crop_boxes
@@ -1,11 +1,12 @@
 """
     Author: lefkovitj (https://lefkovitzj.com)
-    File Last Modified: 8/28/2025
+    File Last Modified: 10/19/2026
     Project Name: PyPdfApp
     File Name: pypdfgui.py
 """
 
 # Python Standard Library Imports.
+import bisect
 import json
 import math
 import os
@@ -16,6 +17,7 @@ from tkinter import ttk
 import warnings
 import webbrowser
 import threading
+import time
 
 # Third-party Module Imports.
 import customtkinter as ctk
@@ -25,10 +27,45 @@ import requests
 
 # Project Imports.
 from gui import GuiMenu
-from load import open_pdf
+from history import (
+    MarkupEntry,
+    MetadataEntry,
+    PageDeleteEntry,
+    PageInsertBlankEntry,
+    PageMoveEntry,
+    PageCropEntry,
+    PageRotateEntry,
+    PdfInsertEntry,
+    WatermarkEntry
+)
+from analysis import DocumentIndex, get_index_path
+from batch import PageBatch
+from cache import TEXT_PAGES, ThumbnailCache
+from compare import compare_pdfs_in_worker
+from extract import extract_text, parse_page_ranges
+from load import (
+    ask_pdf_password,
+    get_command_line_paths,
+    open_pdf,
+    open_prepared_pdf
+)
+from mailmerge import iter_records, load_fields, mail_merge
+from merge import merge_pdfs
+from pagescan import (
+    find_blank_pages,
+    find_content_boxes,
+    find_duplicate_files_in_worker,
+    plan_crop_boxes
+)
+from rasterize import get_image_format, rasterize_pages
+from search import ConcurrentSearch, get_search_source
+from split import split_pdf
+from textindex import TextIndex, get_text_index_path
 from manipulate import (
     create_blank_pdf,
+    create_text_stamp,
     gui_get_file,
+    gui_get_files,
     PageDeletePDF,
     PageInsertBlankPDF,
     PageMovePDF,
@@ -38,8 +75,11 @@ from manipulate import (
     PdfMerger
 )
 from save import save_pdf
+from session import load_session, save_session
 from sign import gen_signature_keys, sign_pdf, verify_pdf_signature
 from utils import PdfDocInstance, PdfQueue
+from watcher import FileWatcher, reload_changed_pages
+from workers import create_worker_pool, get_worker_source, prepare_pdf
 
 
 def on_enter(_event, canvas, rect, set_color):
@@ -58,7 +98,6 @@ class App():
     #  APPLICATION STARTUP
     def __init__(self):
         """Internal Application Data & Settings """
-        self.pdfs = PdfQueue()
         self.pdf_id = None
         self.file_selected = ""
         self.signer_private_key_path = None
@@ -66,6 +105,17 @@ class App():
         self.scale = 1.0
         self.link_images = [] # Must be kept otherwise the link icon flashes in and out.
         self.thread = None
+        self.open_pool = None # Worker processes for opening several files at once.
+        self.pending_opens = [] # (future, open start time) of files being prepared.
+        self.password_queue = [] # (file path, open start time) of encrypted files.
+        self.password_prompt_active = False
+        self.prerendered = {} # PDF id -> (scale, first page pixmap) rendered by a worker.
+        self.saved_indices = set() # PDF ids whose analysis index is in the cache directory.
+        self.comparisons = {} # PDF id -> the changes found by Compare, shown on its pages.
+        self.text_index_paths = {} # PDF id -> the cache file of its complete text index.
+        self.searches = {} # PDF id -> the hits of its last Find, shown on its pages.
+        self.search_panel = None # The Search Open PDFs window and its search, while open.
+        self.selected_pages = set() # Pages of the current PDF selected in the quickset.
 
         # Define attributes for later initialization.
         self.tkimgs = None
@@ -83,6 +133,18 @@ class App():
         # Get the settings file data.
         with open("settings.json", "r", encoding="utf-8") as json_settings:
             self.settings = json.load(json_settings)
+        self.pdfs = PdfQueue(memory_budget_mb=self.settings["memory_budget_mb"])
+        self.thumbnails = ThumbnailCache(
+            self.settings["cache_directory"], max_mb=self.settings["thumbnail_cache_mb"])
+        TEXT_PAGES.set_budget(self.settings["text_cache_mb"])
+        # A mapped file that another program rewrites in place crashes the app (SIGBUS) on the
+        # next page read, so files that may be regenerated while open are never mapped.
+        self.memory_map = (
+            bool(self.settings["memory_map_files"]) and not bool(self.settings["watch_open_files"]))
+        self.watcher = None
+        if bool(self.settings["watch_open_files"]):
+            self.watcher = FileWatcher(interval=self.settings["watch_interval_seconds"])
+            self.watcher.start()
         # Startup checks.
         self.needs_update = self.on_startup_update_check()
         self.license_agreed = self.on_startup_license_check()
@@ -110,13 +172,19 @@ class App():
             self.menu,
             values=[
                 "File",
+                "Edit",
                 "Pages",
                 "Encrypt & Compress",
                 "Insert",
                 "Extract",
                 "Meta Data",
                 "Signatures",
-                "Markup"],
+                "Markup",
+                "Batch",
+                "Clean Up",
+                "Compare",
+                "Search",
+                "Help"],
             command=self.set_menu,
             width=175)
         self.mode.grid(row=0, column=0, columnspan=2, padx=5)
@@ -323,6 +391,11 @@ class App():
                 ["New", "Open", "Save", "Close"],
                 [self.open_blank_pdf, self.open_new_pdf, self.save_event, self.close_current_pdf],
                 [True, True, False, False]),
+            "Edit": GuiMenu(
+                "Edit",
+                ["Undo", "Redo", "Save Session", "Duplicate Pages"],
+                [self.event_undo, self.event_redo, self.event_save_session, self.event_duplicate],
+                [True, True, True, True]),
             "Encrypt & Compress": GuiMenu(
                 "Encryption",
                 ["Set Encryption", "Remove Encryption", "Compress", "Compress (max)"],
@@ -365,12 +438,12 @@ class App():
                 [True, True, True, True]),
             "Extract": GuiMenu(
                 "Extract",
-                ["Delete page", "Extract text", "Extract images", "Screenshot Page"],
+                ["Delete page", "Extract text", "Extract images", "Export Pages"],
                 [
                     self.event_delete,
                     self.event_extract_text,
                     self.event_extract_images,
-                    self.event_screenshot_page
+                    self.event_export_pages
                 ],
                 [True, True, True, True]),
             "Signatures": GuiMenu(
@@ -393,6 +466,51 @@ class App():
                     self.event_toggle_highlight
                 ],
                 [True, True, True, True]),
+            "Batch": GuiMenu(
+                "Batch",
+                ["Merge Files", "Split PDF", "Text Watermark", "Mail Merge"],
+                [
+                    self.event_merge_files,
+                    self.event_split_pdf,
+                    self.event_text_watermark,
+                    self.event_mail_merge
+                ],
+                [True, True, True, True]),
+            "Clean Up": GuiMenu(
+                "Clean Up",
+                ["Remove Blank Pages", "Auto Crop", "Auto Crop (uniform)", "Remove Duplicates"],
+                [
+                    self.event_remove_blank_pages,
+                    self.event_auto_crop,
+                    self.event_auto_crop_uniform,
+                    self.event_remove_duplicates
+                ],
+                [True, True, True, True]),
+            "Compare": GuiMenu(
+                "Compare",
+                ["Compare With File", "Next Change", "Previous Change", "Clear Comparison"],
+                [
+                    self.event_compare_file,
+                    self.event_next_change,
+                    self.event_previous_change,
+                    self.event_clear_comparison
+                ],
+                [True, True, True, True]),
+            "Search": GuiMenu(
+                "Search",
+                ["Find", "Find Next", "Find Previous", "Search Open PDFs"],
+                [
+                    self.event_find,
+                    self.event_find_next,
+                    self.event_find_previous,
+                    self.event_search_open_pdfs
+                ],
+                [True, True, True, True]),
+            "Help": GuiMenu(
+                "Help",
+                ["Cache Statistics"],
+                [self.event_cache_statistics],
+                [True]),
         }
         # Set initial menu value.
         self.menu = None
@@ -404,10 +522,22 @@ class App():
         self.active_redact_start = (None, None)
         self.highlight_toggle = False
 
+        # Reopen the PDF files from the last session (each is only loaded once selected).
+        if bool(self.settings["restore_session"]):
+            self.restore_session()
+        if self.watcher is not None: # Check for PDF files changed on disk.
+            self.root.after(
+                int(self.settings["watch_interval_seconds"] * 1000),
+                self.poll_file_changes)
+        # Analyse the open PDFs while the GUI is idle.
+        self.root.after(500, self.index_documents)
+        # Open the PDF files included as command-line arguments.
+        command_line_paths = get_command_line_paths()
+        if command_line_paths:
+            self.root.after(0, lambda: self.open_pdf_files(command_line_paths))
+
         # Render the starting screen contents.
-        if not self.pdfs.is_empty(): # Load the first page if a document is specified.
-            self.update_page(0)
-        else: # No document open, disable all actions that require an open PDF.
+        if self.pdfs.is_empty(): # No document open, disable all actions that require an open PDF.
             self.disable_all_buttons()
             self.disable_all_keybinds()
         self.root.update()
@@ -416,6 +546,10 @@ class App():
         self.root.update()
         # Start the main application loop.
         self.root.mainloop()
+        # The window was closed directly (without app_exit_event).
+        self.save_current_session()
+        if self.search_panel is not None and self.search_panel["pool"] is not None:
+            self.search_panel["pool"].shutdown(wait=False, cancel_futures=True)
 
 
 
@@ -454,6 +588,12 @@ class App():
             self.root.unbind("Control-Key-plus>", self.bind_zoom_out)
             self.root.unbind("Control-Key-minus>", self.bind_zoom_in)
             self.root.unbind("<Control-w>",self.bind_close)
+            self.root.unbind("<Control-z>", self.bind_undo)
+            self.root.unbind("<Control-y>", self.bind_redo)
+            self.root.unbind("<Control-f>", self.bind_find)
+            self.root.unbind("<F3>", self.bind_find_next)
+            self.root.unbind("<Shift-F3>", self.bind_find_previous)
+            self.root.unbind("<Control-F>", self.bind_search_open_pdfs)
 
         self.pdf_canvas.unbind("<B1-Motion>")
         self.pdf_canvas.unbind("<ButtonRelease-1>")
@@ -469,6 +609,13 @@ class App():
             self.bind_zoom_out = self.root.bind("<Control-Key-plus>", self.scale_up)
             self.bind_zoom_in = self.root.bind("<Control-Key-minus>", self.scale_down)
             self.bind_close = self.root.bind("<Control-w>", self.close_current_pdf)
+            self.bind_undo = self.root.bind("<Control-z>", self.event_undo)
+            self.bind_redo = self.root.bind("<Control-y>", self.event_redo)
+            self.bind_find = self.root.bind("<Control-f>", self.event_find)
+            self.bind_find_next = self.root.bind("<F3>", self.event_find_next)
+            self.bind_find_previous = self.root.bind("<Shift-F3>", self.event_find_previous)
+            self.bind_search_open_pdfs = self.root.bind(
+                "<Control-F>", self.event_search_open_pdfs) # Control-Shift-f.
 
         self.freehand_start_bind = self.pdf_canvas.bind(
             "<B1-Motion>",
@@ -477,6 +624,8 @@ class App():
             "<ButtonRelease-1>",
             self.freehand_mouse_set_end)
         self.quickset_canvas.bind("<Button-1>", self.quickset_canvas_clicked)
+        self.quickset_canvas.bind("<Control-Button-1>", self.quickset_canvas_ctrl_clicked)
+        self.quickset_canvas.bind("<Shift-Button-1>", self.quickset_canvas_shift_clicked)
         self.quickset_canvas.bind("<MouseWheel>", self.quickset_on_mousewheel)
 
     def link_edit_popup(self, _event, rect, initial_url):
@@ -505,11 +654,9 @@ class App():
         """Handle click of URL"""
         mydoc = self.pdfs[self.pdf_id].doc
         mypage = self.pdfs[self.pdf_id].page_i
-        for page_i, page in enumerate(mydoc):
-            if page_i == mypage:
-                for link in page.get_links():
-                    if str([corner * self.scale for corner in list(link["from"])]) == rect:
-                        webbrowser.open(link["uri"])
+        for link_from, link_uri in self.pdfs[self.pdf_id].index.get_links(mydoc, mypage):
+            if str([corner * self.scale for corner in list(link_from)]) == rect:
+                webbrowser.open(link_uri)
     def process_link_update(self, rect, popup, url_input):
         """Parse a link update event with a new URL"""
         for page_link in self.pdfs[self.pdf_id].doc[self.pdfs[self.pdf_id].page_i].links():
@@ -518,6 +665,7 @@ class App():
                 self.pdfs[self.pdf_id].doc[self.pdfs[self.pdf_id].page_i].update_link(page_link)
         self.pdfs[self.pdf_id].doc.reload_page(
             self.pdfs[self.pdf_id].doc[self.pdfs[self.pdf_id].page_i])
+        self.pdfs[self.pdf_id].index.invalidate(self.pdfs[self.pdf_id].page_i)
         self.set_unsaved()
         popup.destroy()
     def create_popup(self, popup_title, popup_text, popup_close_message):
@@ -534,6 +682,36 @@ class App():
             text=popup_close_message,
             command=popup.destroy)
         button.pack(pady=10)
+    def create_confirm_popup(self, popup_title, popup_text, confirm_message, on_confirm):
+        """Create a popup asking to go ahead, calling on_confirm() if the user does"""
+        popup = ctk.CTkToplevel(self.root)
+        popup.title("PyPdfApp")
+        popup_title_label = ctk.CTkLabel(popup, text=popup_title)
+        popup_title_label.pack(padx=20, pady=20)
+        label = ctk.CTkLabel(popup, text=popup_text, justify="left")
+        label.pack(padx=20, pady=20)
+        def confirm():
+            popup.destroy()
+            on_confirm()
+        cancel_button = ctk.CTkButton(popup, text="Cancel", command=popup.destroy)
+        cancel_button.pack(pady=10, side="left")
+        confirm_button = ctk.CTkButton(popup, text=confirm_message, command=confirm)
+        confirm_button.pack(pady=10, side="right")
+        popup.grab_set()
+    def create_progress_popup(self, popup_title):
+        """Create a popup with a progress bar and a Cancel button, return (popup, bar, cancel event)"""
+        popup = ctk.CTkToplevel(self.root)
+        popup.title("PyPdfApp")
+        popup_title_label = ctk.CTkLabel(popup, text=popup_title)
+        popup_title_label.pack(padx=20, pady=20)
+        progress_bar = ctk.CTkProgressBar(popup)
+        progress_bar.set(0)
+        progress_bar.pack(padx=20, pady=10)
+        cancel_event = threading.Event()
+        button = ctk.CTkButton(popup, text="Cancel", command=cancel_event.set)
+        button.pack(pady=10)
+        popup.protocol("WM_DELETE_WINDOW", cancel_event.set)
+        return popup, progress_bar, cancel_event
     def window_close_popup(self):
         """Create a popup to offer a chance to save and exit"""
         unsaved = self.pdfs.get_unsaved()
@@ -566,14 +744,16 @@ class App():
     def set_saved(self):
         """Update the file and GUI for a save event"""
         if self.pdfs[self.pdf_id].mods_made:
+            old_label = self.pdfs.get_label(self.pdf_id)
             self.pdfs.set_saved(self.pdf_id)
-            self.file_select_bar.configure(values=self.pdfs.get_keys())
+            self.relabel_file_select(old_label, self.pdfs.get_label(self.pdf_id))
             self.update_file_select()
     def set_unsaved(self):
         """Update the file and GUI for a new modification"""
         if not self.pdfs[self.pdf_id].mods_made:
+            old_label = self.pdfs.get_label(self.pdf_id)
             self.pdfs.set_unsaved(self.pdf_id)
-            self.file_select_bar.configure(values=self.pdfs.get_keys())
+            self.relabel_file_select(old_label, self.pdfs.get_label(self.pdf_id))
             self.update_file_select()
     # Boolean Checks
     def has_open_pdf(self, *_args):
@@ -631,6 +811,7 @@ class App():
     # Window Exit Event
     def app_exit_event(self):
         """Process an appliction exit event"""
+        self.save_current_session()
         if self.has_open_pdf():
             self.window_close_popup()
         else:
@@ -642,22 +823,15 @@ class App():
         updated_texts = self.menu.get_button_texts()
         updated_binds = self.menu.get_button_commands()
         updated_states = self.menu.get_button_states()
-        self.menu_button_1.configure(
-            text = updated_texts[0],
-            command=updated_binds[0],
-            state = updated_states[0])
-        self.menu_button_2.configure(
-            text = updated_texts[1],
-            command=updated_binds[1],
-            state = updated_states[1])
-        self.menu_button_3.configure(
-            text = updated_texts[2],
-            command=updated_binds[2],
-            state = updated_states[2])
-        self.menu_button_4.configure(
-            text = updated_texts[3],
-            command=updated_binds[3],
-            state = updated_states[3])
+        menu_buttons = [self.menu_button_1, self.menu_button_2, self.menu_button_3, self.menu_button_4]
+        for button_i, menu_button in enumerate(menu_buttons):
+            if button_i < len(updated_texts):
+                menu_button.configure(
+                    text = updated_texts[button_i],
+                    command=updated_binds[button_i],
+                    state = updated_states[button_i])
+            else: # The menu has fewer than four buttons, leave the rest blank.
+                menu_button.configure(text = " ", command=lambda: None, state = "disabled")
     def previous_page(self, *_args):
         """Change the page (-)"""
         page_i = self.pdfs[self.pdf_id].page_i
@@ -672,37 +846,126 @@ class App():
             self.update_page(self.pdfs[self.pdf_id].page_i)
     def save_event(self, *_args):
         """Process a save event"""
-        self.save_path = save_pdf(self.pdfs[self.pdf_id], forced_save=False)
+        self.save_path = save_pdf(self.pdfs[self.pdf_id], forced_save=False, watcher=self.watcher)
         if self.save_path is not None:
             self.set_saved()
     def save_pdf(self, _event):
         """Save the modified pdf document"""
-        self.save_path = save_pdf(self.pdfs[self.pdf_id])
+        self.save_path = save_pdf(self.pdfs[self.pdf_id], watcher=self.watcher)
         if self.save_path is not None:
             self.set_saved()
     def open_new_pdf(self, *_args):
-        """Open a new PDF with the file selector"""
-        num_current_keys = len(list(self.pdfs.get_keys()))
-        result = open_pdf()
-
-        if result is not None: # Check that a file was actually selected.
-            file_path, doc, password = result
-            new_pdf = PdfDocInstance(file_path, doc, password)
-            new_id = self.pdfs.add_pdf(new_pdf)
-            self.pdf_id = new_id
-            self.file_selected = f"{new_id}"
-            self.update_file_select()
-            self.file_select_bar.configure(values=self.pdfs.get_keys())
+        """Open one or more new PDFs with the file selector"""
+        file_paths = gui_get_files(limit_filetypes=[("PDF",".pdf")])
+        if file_paths: # Check that a file was actually selected.
+            self.open_pdf_files(file_paths)
+
+    def open_pdf_files(self, file_paths):
+        """Open PDF files, validating and rendering several at once on the worker pool"""
+        memory_map = self.memory_map
+        if len(file_paths) == 1: # Nothing to overlap, open directly for the fastest first paint.
+            result = open_pdf(file_paths[0], memory_map=memory_map)
+            if result is not None:
+                self.add_opened_pdf(*result, time.perf_counter())
+            return
+        if self.open_pool is None: # Started once, spawning workers is slow.
+            self.open_pool = create_worker_pool(self.settings["open_workers"])
+        for file_path in file_paths:
+            self.pending_opens.append(
+                (self.open_pool.submit(prepare_pdf, file_path, self.scale), time.perf_counter()))
+        self.root.after(20, self.poll_pending_opens)
+
+    def poll_pending_opens(self):
+        """Add each PDF prepared by the worker pool as soon as it is ready"""
+        memory_map = self.memory_map
+        still_pending = []
+        for future, open_start in self.pending_opens:
+            if not future.done():
+                still_pending.append((future, open_start))
+                continue
+            try:
+                prepared = future.result()
+            except Exception as err: # The worker process itself failed.
+                prepared = {"file_path": "", "error": str(err), "encrypted": False}
+            file_name = os.path.basename(prepared["file_path"])
+            if prepared["error"] is not None:
+                self.create_popup("Open Failed", f"{file_name}: {prepared['error']}", "OK")
+            elif prepared["encrypted"]: # Asked for below, one prompt at a time.
+                self.password_queue.append((prepared["file_path"], open_start))
+            else:
+                file_path, doc, password, open_info = open_prepared_pdf(prepared, memory_map)
+                width, height, alpha, samples = prepared["first_page"]
+                colorspace = pymupdf.csRGB
+                first_page = pymupdf.Pixmap(colorspace, width, height, samples, alpha)
+                self.add_opened_pdf(
+                    file_path,
+                    doc,
+                    password,
+                    open_info,
+                    open_start,
+                    first_page=first_page,
+                    select=self.pdf_id is None,
+                    repaired=prepared["repaired_path"] is not None)
+        self.pending_opens = still_pending
+        if self.pending_opens:
+            self.root.after(20, self.poll_pending_opens)
+
+        # Password prompts wait their turn, the other files keep opening while one is shown.
+        if not self.password_prompt_active:
+            self.password_prompt_active = True
+            while self.password_queue:
+                file_path, open_start = self.password_queue.pop(0)
+                result = open_pdf(file_path, memory_map=memory_map)
+                if result is not None:
+                    self.add_opened_pdf(*result, open_start, select=self.pdf_id is None)
+            self.password_prompt_active = False
+
+    def add_opened_pdf(
+            self,
+            file_path,
+            doc,
+            password,
+            open_info,
+            open_start,
+            first_page=None,
+            select=True,
+            repaired=False):
+        """Add an opened PDF to the file selector, showing it if select is True"""
+        num_current_keys = len(self.pdfs)
+        new_pdf = PdfDocInstance(
+            file_path,
+            doc,
+            password,
+            history_depth=self.settings["undo_history_depth"],
+            memory_map=self.memory_map)
+        new_pdf.source_mapped = new_pdf.source_mapped and not repaired
+        self.load_document_index(new_pdf)
+        new_id = self.pdfs.add_pdf(new_pdf)
+        self.file_select_bar.insert(self.file_select_bar.len(), self.pdfs.get_label(new_id))
+        if self.watcher is not None:
+            self.watcher.watch(file_path, password)
+        if first_page is not None: # Rendered by a worker at the current scale.
+            self.prerendered[new_id] = (self.scale, first_page)
+        if num_current_keys < 1:
+            self.enable_all_buttons()
+            self.enable_all_keybinds()
+        if not select:
+            return
 
-            if num_current_keys < 1:
-                self.enable_all_buttons()
-                self.enable_all_keybinds()
-            num_pages = len(self.pdfs[self.pdf_id].doc)
-            self.quickset_canvas.config(scrollregion=(0, 0, 250, num_pages * 320))
-            self.quickset_scrollbar.set(0,(1/num_pages))
+        self.pdf_id = new_id
+        self.pdfs.select(self.pdf_id)
+        self.update_file_select()
+        num_pages = open_info["page_count"]
+        self.quickset_canvas.config(scrollregion=(0, 0, 250, num_pages * 320))
+        self.quickset_scrollbar.set(0,(1/num_pages))
 
-            self.update_page(self.pdfs[self.pdf_id].page_i)
-            self.load_quickset()
+        # Paint the first page before anything else, the thumbnails load in the background.
+        self.update_page(self.pdfs[self.pdf_id].page_i)
+        self.root.update_idletasks()
+        first_paint_ms = 1000 * (open_info["open_seconds"] + time.perf_counter() - open_start)
+        print(f"Opened {new_pdf.name}: {num_pages} pages, "
+              f"first page shown in {first_paint_ms:.0f} ms")
+        self.load_quickset()
 
     def load_quickset(self):
         """Use multithreading to load the quickset images on the fly, as large files take a while"""
@@ -711,16 +974,20 @@ class App():
 
     def open_blank_pdf(self, *_args):
         """Open a new PDF with one blank page"""
-        num_current_keys = len(list(self.pdfs.get_keys()))
+        num_current_keys = len(self.pdfs)
         file_path = "New File"
         doc = create_blank_pdf()
         password = ""
-        new_pdf = PdfDocInstance(file_path, doc, password)
+        new_pdf = PdfDocInstance(
+            file_path,
+            doc,
+            password,
+            history_depth=self.settings["undo_history_depth"])
         new_id = self.pdfs.add_pdf(new_pdf)
         self.pdf_id = new_id
-        self.file_selected = f"{new_id}"
+        self.pdfs.select(self.pdf_id)
+        self.file_select_bar.insert(self.file_select_bar.len(), self.pdfs.get_label(new_id))
         self.update_file_select()
-        self.file_select_bar.configure(values=self.pdfs.get_keys())
 
         if num_current_keys < 1:
             self.enable_all_buttons()
@@ -733,39 +1000,164 @@ class App():
         """Close the current PDF only"""
         if not self.has_open_pdf():
             return
-        current_keys_list = self.pdfs.get_keys()
-        num_current_keys = len(current_keys_list)
-        current_index = current_keys_list.index(self.file_selected)
-        self.pdfs.remove_pdf(self.pdf_id)
-
-        self.file_select_bar.destroy()
-        self.file_select_bar = ctk.CTkSegmentedButton(
-            self.file_menu,
-            command=self.file_selector_callback)
-        self.file_select_bar.grid(
-            row=0,
-            column=0,
-            padx=(0, 0),
-            pady=(10, 10),
-            columnspan=12,
-            sticky="ew")
-        self.file_select_bar.configure(values=self.pdfs.get_keys())
+        closed_id = self.pdf_id
+        next_id = self.pdfs.neighbor(closed_id)
+        if self.watcher is not None:
+            self.watcher.unwatch(self.pdfs[closed_id].save_path)
+        self.file_select_bar.delete(self.pdfs.get_label(closed_id))
+        self.pdfs.remove_pdf(closed_id)
+        self.prerendered.pop(closed_id, None)
+        self.saved_indices.discard(closed_id)
+        self.comparisons.pop(closed_id, None)
+        self.text_index_paths.pop(closed_id, None)
+        self.searches.pop(closed_id, None)
         self.quickset_canvas.delete("all") # Start with an empty canvas.
 
-        if num_current_keys <= 1: # Handle closing of last file.
+        self.selected_pages = set()
+        if next_id is None: # Handle closing of last file.
+            self.pdf_id = None
+            self.file_selected = ""
             self.page_count.configure(text="Page: 0/0")
             self.disable_all_buttons()
             self.disable_all_keybinds()
             self.pdf_canvas.delete('all')
-        else:
-            if current_index > 0: # Switch to the file to the left.
-                self.pdf_id = self.pdfs.get_keys()[current_index - 1].replace('*','')
-                self.update_page(self.pdfs[self.pdf_id].page_i) # Check.
-            else: # Switch to the file to the right.
-                self.pdf_id = self.pdfs.get_keys()[current_index].replace('*','')
-                self.update_page(self.pdfs[self.pdf_id].page_i)
-            self.update_file_select()
-            self.load_quickset()
+        else: # Switch to the file to the left (or to the right if the first file was closed).
+            self.file_selector_callback(self.pdfs.get_label(next_id))
+
+    def unlock_pdf(self, pdf_id):
+        """Ask for the password of a restored encrypted PDF, returning False if cancelled"""
+        pdf_instance = self.pdfs[pdf_id]
+        if pdf_instance.doc.is_encrypted:
+            password = ask_pdf_password(pdf_instance.doc, title=f"Open {pdf_instance.name}")
+            if password is None or not pdf_instance.unlock(password):
+                return False
+        if pdf_instance.restored_encryption == "ask": # Encrypted with Set Encryption last session.
+            pdf_instance.restored_encryption = None
+            pdf_instance.password = self.ask_new_password(f"Encryption of {pdf_instance.name}")
+            if pdf_instance.password is None:
+                self.create_popup(
+                    "Set Encryption",
+                    f"{pdf_instance.name} will be saved without encryption.",
+                    "OK")
+        return True
+
+    def restore_session(self):
+        """Add the PDFs of the last session to the file selector, selecting the last one used"""
+        session = load_session(
+            self.settings["cache_directory"],
+            history_depth=self.settings["undo_history_depth"],
+            memory_map=self.memory_map)
+        if session is None or not session[1]:
+            return
+        self.scale, restored = session
+        selected_id = None
+        for pdf_instance, selected in restored:
+            self.load_document_index(pdf_instance)
+            new_id = self.pdfs.add_pdf(pdf_instance)
+            self.file_select_bar.insert(self.file_select_bar.len(), self.pdfs.get_label(new_id))
+            if self.watcher is not None and not pdf_instance.changed_since_open:
+                self.watcher.watch(pdf_instance.save_path)
+            if selected or selected_id is None:
+                selected_id = new_id
+        self.enable_all_buttons()
+        self.enable_all_keybinds()
+        self.update_scale_display()
+        self.file_selector_callback(self.pdfs.get_label(selected_id))
+
+    def load_document_index(self, pdf_instance):
+        """Reuse the analysis index saved for the PDF file, if the file is unchanged since"""
+        if pdf_instance.changed_since_open or not os.path.isfile(pdf_instance.save_path):
+            return
+        index_path = get_index_path(self.settings["cache_directory"], pdf_instance.save_path)
+        saved_index = DocumentIndex.load(index_path, len(pdf_instance.index))
+        if saved_index is not None:
+            pdf_instance.index = saved_index
+
+    def index_documents(self):
+        """Analyse the open PDFs and index their text a few pages at a time, the current PDF first"""
+        pdf_ids = sorted(self.pdfs.queue, key=lambda pdf_id: pdf_id != self.pdf_id)
+        for pdf_id in pdf_ids:
+            pdf_instance = self.pdfs[pdf_id]
+            if pdf_instance.is_suspended():
+                continue # Suspended PDFs are analysed once they are selected again.
+            if pdf_instance.index.is_complete():
+                if self.index_text_step(pdf_id):
+                    self.root.after(1, self.index_documents)
+                    return
+                continue
+            if (pdf_instance.index.build_step(pdf_instance.doc)
+                and pdf_id not in self.saved_indices
+                and not pdf_instance.changed_since_open
+                and os.path.isfile(pdf_instance.save_path)):
+                # Complete for the file as it is on disk, keep it for the next time it is opened.
+                pdf_instance.index.save(
+                    get_index_path(self.settings["cache_directory"], pdf_instance.save_path))
+                self.saved_indices.add(pdf_id)
+            self.root.after(1, self.index_documents)
+            return
+        self.root.after(500, self.index_documents)
+
+    def index_text_step(self, pdf_id):
+        """Index the text of a few more pages of an analysed PDF, returning False if it is done"""
+        # The text index is cached under the content of the pages (whether or not they are saved),
+        # it is loaded for any PDF with the same pages and kept up to date as pages are edited.
+        pdf_instance = self.pdfs[pdf_id]
+        text_index = pdf_instance.text_index
+        page_hashes = text_index.get_page_hashes(pdf_instance.doc, pdf_instance.index)
+        index_path = get_text_index_path(self.settings["cache_directory"], page_hashes)
+        if self.text_index_paths.get(pdf_id) == index_path:
+            return False
+        if pdf_id not in self.text_index_paths and not text_index.page_words:
+            saved_index = TextIndex.load(index_path)
+            if saved_index is not None:
+                pdf_instance.text_index = saved_index
+                self.text_index_paths[pdf_id] = index_path
+                return True
+        if not text_index.build_step(pdf_instance.doc, pdf_instance.index):
+            return True
+        self.text_index_paths[pdf_id] = index_path
+        if not os.path.isfile(index_path):
+            # Written on a thread from a copy, compressing the index of a long PDF takes seconds.
+            saved_index = text_index.select(page_hashes)
+            self.run_in_background(
+                lambda: saved_index.save(index_path), lambda _result, _error: None)
+        return True
+
+    def poll_file_changes(self):
+        """Reload the pages of open PDFs whose files were changed by another program"""
+        for file_path, old_fingerprints, new_fingerprints in self.watcher.get_changes():
+            for pdf_id in list(self.pdfs.queue):
+                pdf_instance = self.pdfs[pdf_id]
+                if pdf_instance.save_path != file_path:
+                    continue
+                if pdf_instance.changed_since_open: # Never discard the user's own changes.
+                    self.create_popup(
+                        "File Changed",
+                        f"{pdf_instance.name} was changed by another program.\n"
+                        "It was not reloaded because it has changes of its own.",
+                        "OK")
+                    continue
+                old_page_count = len(pdf_instance.markup_loaded)
+                self.prerendered.pop(pdf_id, None)
+                self.saved_indices.discard(pdf_id)
+                changed_pages = reload_changed_pages(
+                    pdf_instance,
+                    old_fingerprints,
+                    new_fingerprints)
+                if pdf_id == self.pdf_id and (changed_pages or old_page_count != len(new_fingerprints)):
+                    # Unchanged thumbnails are served from the cache, only changed pages render.
+                    if (pdf_instance.page_i in changed_pages
+                        or old_page_count != len(new_fingerprints)):
+                        self.update_page(pdf_instance.page_i)
+                    self.load_quickset()
+        self.root.after(
+            int(self.settings["watch_interval_seconds"] * 1000),
+            self.poll_file_changes)
+
+    def save_current_session(self):
+        """Save the open PDFs as the session to restore on the next startup"""
+        if bool(self.settings["restore_session"]):
+            save_session(self.settings["cache_directory"], self.pdfs, self.pdf_id, self.scale)
 
     def scale_up(self, *_args):
         """Process a scale up event"""
@@ -789,9 +1181,14 @@ class App():
     # File Select Menu
     def file_selector_callback(self, value):
         """Change which PDF is being viewed currently"""
-        self.pdf_id = value.replace('*', '')
+        self.pdf_id = self.pdfs.get_id(value)
         self.file_selected = value
+        self.pdfs.select(self.pdf_id) # Resumes the document if it was suspended.
+        if not self.unlock_pdf(self.pdf_id): # Password prompt for a restored PDF was cancelled.
+            self.close_current_pdf()
+            return
         self.file_select_bar.set(value)
+        self.selected_pages = set()
         self.update_page(self.pdfs[self.pdf_id].page_i)
         self.load_quickset()
 
@@ -818,18 +1215,8 @@ class App():
             self.tkimgs = []
             for i in range(page_range):
                 page_i = i + start_page
-                page = self.pdfs[self.pdf_id].doc[page_i]
-                pix = page.get_pixmap()
-                if pix.alpha:
-                    mode = "RGBA"
-                else:
-                    mode = "RGB"
-                img = PIL.Image.frombytes(mode, [pix.width, pix.height], pix.samples)
-                # Resize and prepare the pdf page image.
-                img = img.resize(
-                    (_preview_width, int(pix.height * (_preview_width/pix.width))),
-                     resample=PIL.Image.Resampling.NEAREST
-                )
+                # Cached thumbnails are only rendered again once the page changes.
+                img = self.thumbnails.get(self.pdfs[self.pdf_id].doc, page_i)
                 tkimg = PIL.ImageTk.PhotoImage(img)
                 self.tkimgs.append(tkimg)
 
@@ -853,6 +1240,7 @@ class App():
                         tag="pdf_img"
                     ) # Add the image to the canvas.
             self.quickset_canvas.config(scrollregion=(0, 0, 250, num_pages * 320))
+            self.draw_page_selection(use_index=False)
         # Raised when the active PDF is switched while the thread is still running.
         except IndexError:
             return
@@ -882,21 +1270,11 @@ class App():
         print(visible_pages)
         for i in visible_pages: # Do this for the visible pages and the current page.
             page_i = i
+            self.pdfs[self.pdf_id].load_page_markup(page_i)
 
-            page = self.pdfs[self.pdf_id].doc[page_i]
-            pix = page.get_pixmap()
-            if pix.alpha:
-                mode = "RGBA"
-            else:
-                mode = "RGB"
-            img = PIL.Image.frombytes(mode, [pix.width, pix.height], pix.samples)
-             # Resize and prepare the pdf page image.
-            img = img.resize(
-                (_preview_width,
-                 int(pix.height * (_preview_width/pix.width))
-                ),
-                resample=PIL.Image.Resampling.NEAREST)
-            scale = _preview_width / pix.width
+            img = self.thumbnails.get(self.pdfs[self.pdf_id].doc, page_i)
+            page_rect = self.pdfs[self.pdf_id].index.get_rect(self.pdfs[self.pdf_id].doc, page_i)
+            scale = _preview_width / (page_rect[2] - page_rect[0])
 
             tkimg = PIL.ImageTk.PhotoImage(img)
 
@@ -916,6 +1294,7 @@ class App():
             self.update_quickset_freehand(page_i, scale, _preview_width, _preview_x)
             self.update_quickset_highlight(page_i, scale, _preview_width, _preview_x)
             self.update_quickset_redact(page_i, scale, _preview_width, _preview_x)
+        self.draw_page_selection()
 
     def update_quickset_freehand(self, page_i, scale, width_x, start_x):
         """Update the freehand drawings for the specified page on the quickset"""
@@ -976,17 +1355,64 @@ class App():
                     outline="yellow",
                     stipple="gray50")
 
-    def quickset_canvas_clicked(self, event):
-        """Process a click within the quickset canvas, select the correct page"""
+    def quickset_page_at(self, event):
+        """Get the page under a click within the quickset canvas, or None"""
         event_y = self.quickset_canvas.canvasy(event.y)
         if event_y <= 35:
             page = 0
         else:
             page = math.floor(event_y/320)
         if page >= len(self.pdfs[self.pdf_id].doc):
+            return None
+        return page
+    def quickset_canvas_clicked(self, event):
+        """Process a click within the quickset canvas, select the correct page"""
+        page = self.quickset_page_at(event)
+        if page is None:
             return
+        self.selected_pages = set()
         self.pdfs[self.pdf_id].page_i = page
         self.update_page(self.pdfs[self.pdf_id].page_i)
+    def quickset_canvas_ctrl_clicked(self, event):
+        """Add or remove a page from the page selection (Control-click)"""
+        page = self.quickset_page_at(event)
+        if page is None:
+            return
+        if not self.selected_pages: # Start the selection from the current page.
+            self.selected_pages.add(self.pdfs[self.pdf_id].page_i)
+        self.selected_pages ^= {page}
+        self.draw_page_selection()
+    def quickset_canvas_shift_clicked(self, event):
+        """Select every page from the current page to the clicked page (Shift-click)"""
+        page = self.quickset_page_at(event)
+        if page is None:
+            return
+        page_i = self.pdfs[self.pdf_id].page_i
+        self.selected_pages |= set(range(min(page, page_i), max(page, page_i) + 1))
+        self.draw_page_selection()
+    def draw_page_selection(self, use_index=True):
+        """Outline the selected pages in the quickset"""
+        # The quickset thread passes use_index=False, only the Tk thread analyses pages into the
+        # index (build_step() runs there while the thread draws).
+        self.quickset_canvas.delete("page_selection")
+        _preview_width = 200
+        _preview_x = (self.quickset_canvas.winfo_width() - _preview_width) / 2
+        pdf_instance = self.pdfs[self.pdf_id]
+        for page_i in sorted(self.selected_pages):
+            if use_index:
+                page_rect = pdf_instance.index.get_rect(pdf_instance.doc, page_i)
+            else:
+                page_rect = tuple(pdf_instance.doc[page_i].rect)
+            page_width, page_height = page_rect[2] - page_rect[0], page_rect[3] - page_rect[1]
+            preview_height = _preview_width * page_height / page_width
+            self.quickset_canvas.create_rectangle(
+                _preview_x - 4,
+                page_i * 320 + 31,
+                _preview_x + _preview_width + 4,
+                page_i * 320 + 39 + preview_height,
+                outline="#1F6AA5",
+                width=4,
+                tags="page_selection")
     def quickset_on_mousewheel(self, event):
         """Process a scroll event within the quickset canvas, adjust its position"""
         self.quickset_canvas.yview_scroll(int(-1*(event.delta/120)), "units")
@@ -996,24 +1422,29 @@ class App():
         self.set_menu(self.mode.get())
     def update_file_select(self):
         """Update the file selection menu bar"""
-        if f"*{self.pdf_id}" in self.pdfs.get_keys():
-            self.file_select_bar.set(f"*{self.pdf_id}")
-            self.file_selected = f"*{self.pdf_id}"
-        else:
-            self.file_select_bar.set(self.pdf_id)
-            self.file_selected = f"{self.pdf_id}"
+        self.file_selected = self.pdfs.get_label(self.pdf_id)
+        self.file_select_bar.set(self.file_selected)
+    def relabel_file_select(self, old_label, new_label):
+        """Rename one file selection button in place, without rebuilding the others"""
+        if old_label != new_label:
+            label_index = self.file_select_bar.index(old_label)
+            self.file_select_bar.delete(old_label)
+            self.file_select_bar.insert(label_index, new_label)
     def update_scale(self):
         """Update the zoom scale text"""
         self.update_page(self.pdfs[self.pdf_id].page_i)
+        self.update_scale_display()
+        if self.scale >= 1:
+            new_width = int(150 + 20 + self.img.size[0]*0.5 + self.scrollbar.cget("width"))
+            self.root.geometry(f"{new_width}x{self.root.winfo_height}")
+            self.root.minsize(int(new_width), 250)
+    def update_scale_display(self):
+        """Update the zoom scale label"""
         if self.scale < 1:
             # Has extra space (" ") to account for missing hundreds place digit.
             self.scale_display.configure(text=f"Zoom:  {self.scale * 100}%")
         else:
             self.scale_display.configure(text=f"Zoom: {self.scale * 100}%")
-        if self.scale >= 1:
-            new_width = int(150 + 20 + self.img.size[0]*0.5 + self.scrollbar.cget("width"))
-            self.root.geometry(f"{new_width}x{self.root.winfo_height}")
-            self.root.minsize(int(new_width), 250)
 
     def update_image(self, img, pix):
         """Compute and update the PDF page render"""
@@ -1065,22 +1496,54 @@ class App():
                 fill="black",
                 outline="black"
             )
+    def update_comparison(self, page_num):
+        """Redraw the changes found by Compare on the page"""
+        comparison = self.get_comparison()
+        if comparison is None:
+            return
+        if page_num in comparison["added_pages"]:
+            self.pdf_canvas.create_rectangle(
+                0, 0, self.pix.width, self.pix.height, outline="green", width=6)
+        for box in comparison["changed_pages"].get(page_num, ()):
+            self.pdf_canvas.create_rectangle(
+                [value * self.scale for value in box],
+                fill="red",
+                outline="red",
+                stipple="gray25"
+            )
+    def update_search_hits(self, page_num):
+        """Redraw the hits of Find on the page, filling the current hit"""
+        search = self.get_search()
+        if search is None:
+            return
+        # The index holds the words unrotated, as extracted.
+        rotation_matrix = self.pdfs[self.pdf_id].doc[page_num].rotation_matrix
+        for hit_i in search["page_hits"].get(page_num, ()):
+            for rect in search["hits"][hit_i][1]:
+                self.pdf_canvas.create_rectangle(
+                    list(pymupdf.Rect(rect) * rotation_matrix * self.scale),
+                    fill="orange" if hit_i == search["position"] else "",
+                    outline="orange",
+                    stipple="gray50",
+                    width=2
+                )
     def update_link_graphics(self, page_num):
         """Redraw all link bounding boxes"""
         link_i = 0
         self.link_images = []
-        for page_link in self.pdfs[self.pdf_id].doc[page_num].links():
+        pdf_instance = self.pdfs[self.pdf_id]
+        for link_from, link_uri in pdf_instance.index.get_links(pdf_instance.doc, page_num):
             try:
-                assert page_link["uri"] is not None
+                assert link_uri is not None
 
-                link_rect = [corner * self.scale for corner in list(page_link["from"])]
+                link_rect = [corner * self.scale for corner in list(link_from)]
                 link_id = self.pdf_canvas.create_rectangle(link_rect, outline="#333333", width=5)
                 self.pdf_canvas.tag_bind(
                     link_id,
                     '<Button-1>',
                     lambda event,
                     rect=link_rect,
-                    initial_url=page_link['uri']: self.link_edit_popup(
+                    initial_url=link_uri: self.link_edit_popup(
                         event,
                         f"{rect}",
                         f"{initial_url}"),
@@ -1125,7 +1588,7 @@ class App():
                     '<Button-1>',
                     lambda event,
                     rect=link_rect,
-                    initial_url=page_link['uri']: self.link_edit_popup(
+                    initial_url=link_uri: self.link_edit_popup(
                         event,
                         f"{rect}",
                         f"{initial_url}"),
@@ -1178,10 +1641,16 @@ class App():
 
     def update_page(self, page_num):
         """Update the entire GUI for a page change"""
+        # Import the page's existing annotations the first time it is shown.
+        self.pdfs[self.pdf_id].load_page_markup(page_num)
         # Select the page and load it as an image.
-        page = self.pdfs[self.pdf_id].doc[page_num]
-        mat = pymupdf.Matrix(self.scale, self.scale)
-        self.pix = page.get_pixmap(matrix=mat)
+        prerendered = self.prerendered.pop(self.pdf_id, None)
+        if prerendered is not None and page_num == 0 and prerendered[0] == self.scale:
+            self.pix = prerendered[1] # Rendered by a worker while the file was opened.
+        else:
+            page = self.pdfs[self.pdf_id].doc[page_num]
+            mat = pymupdf.Matrix(self.scale, self.scale)
+            self.pix = page.get_pixmap(matrix=mat)
         if self.pix.alpha:
             mode = "RGBA"
         else:
@@ -1229,63 +1698,148 @@ class App():
         self.update_drawings(page_num)
         self.update_highlights(page_num)
         self.update_redactions(page_num)
+        self.update_comparison(page_num)
+        self.update_search_hits(page_num)
         self.update_quickset(page_num)
         if self.link_editor_toggle:
             self.update_link_graphics(page_num)
 
 
     # MENU BUTTON FUNCTIONALITY
+    # Edit
+    def event_undo(self, *_args):
+        """Undo the most recent operation on the current PDF (Button Event)"""
+        if not self.has_open_pdf():
+            return
+        history_entry = self.pdfs[self.pdf_id].history.undo(self.pdfs[self.pdf_id])
+        if history_entry is not None:
+            self.show_history_entry(history_entry)
+    def event_redo(self, *_args):
+        """Redo the most recently undone operation on the current PDF (Button Event)"""
+        if not self.has_open_pdf():
+            return
+        history_entry = self.pdfs[self.pdf_id].history.redo(self.pdfs[self.pdf_id])
+        if history_entry is not None:
+            self.show_history_entry(history_entry)
+    def event_save_session(self, *_args):
+        """Save the open PDFs to be restored on the next startup (Button Event)"""
+        save_session(self.settings["cache_directory"], self.pdfs, self.pdf_id, self.scale)
+        self.create_popup("Session Saved", "The open PDF files will be restored on startup.", "OK")
+    def show_history_entry(self, history_entry):
+        """Show the page affected by an undo or redo"""
+        self.set_unsaved() # A modification has been made to the document.
+        self.selected_pages = set()
+        num_pages = len(self.pdfs[self.pdf_id].doc)
+        self.pdfs[self.pdf_id].page_i = max(0, min(history_entry.page_i, num_pages - 1))
+        self.update_page(self.pdfs[self.pdf_id].page_i)
+        if history_entry.changes_page_count or history_entry.changes_page_sizes:
+            self.load_quickset()
+    def event_duplicate(self, *_args):
+        """Insert a copy of the selected pages (or the current page) after each (Button Event)"""
+        self.apply_page_batch(lambda batch, pages: batch.duplicate(pages))
+    def apply_page_batch(self, plan, pages=None):
+        """Plan a PageBatch on the selected pages (or the current page), return True if applied"""
+        pdf_instance = self.pdfs[self.pdf_id]
+        if pages is None:
+            pages = sorted(self.selected_pages) or [pdf_instance.page_i]
+        batch = PageBatch(len(pdf_instance.doc), marked_pages=pages)
+        try:
+            plan(batch, pages)
+        except ValueError as err: # For example deleting every page.
+            self.create_popup("Pages", str(err), "OK")
+            return False
+        if batch.is_empty():
+            return False
+        self.set_unsaved() # A modification has been made to the document.
+        pdf_instance.history.record(batch.apply(pdf_instance))
+        # Keep the same pages selected (and shown) wherever they have moved to.
+        marked_pages = batch.get_marked_pages()
+        if self.selected_pages:
+            self.selected_pages = set(marked_pages)
+        if marked_pages:
+            pdf_instance.page_i = marked_pages[0]
+        pdf_instance.page_i = min(pdf_instance.page_i, len(pdf_instance.doc) - 1)
+        self.update_page(pdf_instance.page_i)
+        self.load_quickset()
+        return True
     # Pages
     def event_rotate_left(self, *_args):
         """Rotate the page left by 90 degrees"""
+        if self.selected_pages:
+            self.apply_page_batch(lambda batch, pages: batch.rotate(pages, -90))
+            return
         self.set_unsaved() # A modification has been made to the document.
-        rotater = PageRotatePDF(self.pdfs[self.pdf_id].doc, None)
+        rotater = PageRotatePDF(self.pdfs[self.pdf_id].doc, None, self.pdfs[self.pdf_id].index)
         rotater.rotate_l(self.pdfs[self.pdf_id].page_i)
         self.pdfs[self.pdf_id].doc = rotater.get()
+        self.pdfs[self.pdf_id].history.record(
+            PageRotateEntry(self.pdfs[self.pdf_id].page_i, -90))
         self.update_page(self.pdfs[self.pdf_id].page_i)
     def event_rotate_right(self, *_args):
         """Rotate the page right by 90 degrees"""
+        if self.selected_pages:
+            self.apply_page_batch(lambda batch, pages: batch.rotate(pages, 90))
+            return
         self.set_unsaved() # A modification has been made to the document.
-        rotater = PageRotatePDF(self.pdfs[self.pdf_id].doc, None)
+        rotater = PageRotatePDF(self.pdfs[self.pdf_id].doc, None, self.pdfs[self.pdf_id].index)
         rotater.rotate_r(self.pdfs[self.pdf_id].page_i)
         self.pdfs[self.pdf_id].doc = rotater.get()
+        self.pdfs[self.pdf_id].history.record(
+            PageRotateEntry(self.pdfs[self.pdf_id].page_i, 90))
         self.update_page(self.pdfs[self.pdf_id].page_i)
     def event_move_up(self, *_args):
         """Move the current page up (Button Event)"""
+        if self.selected_pages:
+            self.apply_page_batch(lambda batch, pages: batch.shift(pages, -1))
+            return
         self.set_unsaved() # A modification has been made to the document.
         if self.pdfs[self.pdf_id].page_i > 0:
             mover = PageMovePDF(self.pdfs[self.pdf_id].doc, None)
             mover.move(self.pdfs[self.pdf_id].page_i, self.pdfs[self.pdf_id].page_i - 1)
             self.pdfs[self.pdf_id].doc = mover.get()
+            self.pdfs[self.pdf_id].move_page_data(
+                self.pdfs[self.pdf_id].page_i,
+                self.pdfs[self.pdf_id].page_i - 1)
+            self.pdfs[self.pdf_id].history.record(
+                PageMoveEntry(self.pdfs[self.pdf_id].page_i, self.pdfs[self.pdf_id].page_i - 1))
             self.update_page(self.pdfs[self.pdf_id].page_i)
     def event_move_down(self, *_args):
         """Move the current page down (Button Event)"""
+        if self.selected_pages:
+            self.apply_page_batch(lambda batch, pages: batch.shift(pages, 1))
+            return
         self.set_unsaved() # A modification has been made to the document.
         if self.pdfs[self.pdf_id].page_i < len(self.pdfs[self.pdf_id].doc):
             mover = PageMovePDF(self.pdfs[self.pdf_id].doc, None)
             mover.move(self.pdfs[self.pdf_id].page_i+1, self.pdfs[self.pdf_id].page_i)
             self.pdfs[self.pdf_id].doc = mover.get()
+            self.pdfs[self.pdf_id].move_page_data(
+                self.pdfs[self.pdf_id].page_i + 1,
+                self.pdfs[self.pdf_id].page_i)
+            self.pdfs[self.pdf_id].history.record(
+                PageMoveEntry(self.pdfs[self.pdf_id].page_i + 1, self.pdfs[self.pdf_id].page_i))
             self.update_page(self.pdfs[self.pdf_id].page_i)
     # Encrypt & Compress
     def event_set_encryption(self, *_args):
         """Set Encryption Password for PDF (Button Event)"""
         self.set_unsaved() # A modification has been made to the document.
-        p1 = ""
-        p2 = ""
-        pass_dialog = ctk.CTkInputDialog(text="Password", title="Create Password")
-        p1 = pass_dialog.get_input()
-        if p1 is None:
-            return
-        pass_dialog2 = ctk.CTkInputDialog(text="Confirm Password", title="Create Password")
-        p2 = pass_dialog2.get_input()
-        if p2 is None:
-            return
-
-        if p1 == p2 and p1!= "":
-            self.pdfs[self.pdf_id].password = p1
+        password = self.ask_new_password("Create Password")
+        if password is not None:
+            self.pdfs[self.pdf_id].password = password
             self.menus["Encrypt & Compress"].states[0] = False
             self.menus["Encrypt & Compress"].states[1] = True
             self.update_page(self.pdfs[self.pdf_id].page_i)
+    def ask_new_password(self, title):
+        """Ask for a password twice, returning it if both match (None if cancelled or not)"""
+        pass_dialog = ctk.CTkInputDialog(text="Password", title=title)
+        p1 = pass_dialog.get_input()
+        if p1 is None:
+            return None
+        pass_dialog2 = ctk.CTkInputDialog(text="Confirm Password", title=title)
+        p2 = pass_dialog2.get_input()
+        if p1 == p2 and p1 != "":
+            return p1
+        return None
     def event_remove_encryption(self, *_args):
         """Remove Encryption Password for PDF (Button Event)"""
         self.set_unsaved() # A modification has been made to the document.
@@ -1323,14 +1877,20 @@ class App():
     def event_insert_pdf(self, *_args):
         """Insert another PDF (Button Event)"""
         self.set_unsaved() # A modification has been made to the document.
-        merge_fp = open_pdf()[1]
-        if merge_fp is not None and merge_fp != "":
-            for i in range(len(merge_fp)): # Add blank markup data.
+        merge_result = open_pdf(memory_map=self.memory_map)
+        if merge_result is not None:
+            merge_fp = merge_result[1]
+            merge_page_count = len(merge_fp)
+            for _i in range(merge_page_count): # Add blank markup data.
                 self.pdfs[self.pdf_id].add_page_data(self.pdfs[self.pdf_id].page_i)
-                self.pdfs[self.pdf_id].page_i -= 1
             merger = PdfMerger(self.pdfs[self.pdf_id].doc)
             merger.add_fitz_doc(merge_fp, self.pdfs[self.pdf_id].page_i)
             self.pdfs[self.pdf_id].doc = merger.get()
+            self.pdfs[self.pdf_id].history.record(
+                PdfInsertEntry(
+                    self.pdfs[self.pdf_id],
+                    self.pdfs[self.pdf_id].page_i,
+                    merge_page_count))
             self.update_page(self.pdfs[self.pdf_id].page_i)
             self.load_quickset()
     def event_insert_page(self, *_args):
@@ -1340,31 +1900,51 @@ class App():
         inserter.insert(self.pdfs[self.pdf_id].page_i)
         self.pdfs[self.pdf_id].doc = inserter.get()
         self.pdfs[self.pdf_id].add_page_data(self.pdfs[self.pdf_id].page_i)
+        self.pdfs[self.pdf_id].history.record(
+            PageInsertBlankEntry(self.pdfs[self.pdf_id].page_i))
         self.update_page(self.pdfs[self.pdf_id].page_i)
         self.load_quickset()
     def event_watermark_page(self, *_args):
         """Watermark the current page"""
+        source_image = gui_get_file(limit_filetypes=[("PNG",".png"), ("JPEG",".jpg")])[0]
+        if not source_image: # No image was selected.
+            return
         self.set_unsaved() # A modification has been made to the document.
-        watermarker = WatermarkPDF(self.pdfs[self.pdf_id].doc, None)
-        watermarker.watermark(
+        history_entry = WatermarkEntry(
+            self.pdfs[self.pdf_id],
             self.pdfs[self.pdf_id].page_i,
-            gui_get_file(limit_filetypes=[("PNG",".png"), ("JPEG",".jpg")])[0])
+            [self.pdfs[self.pdf_id].page_i])
+        watermarker = WatermarkPDF(self.pdfs[self.pdf_id].doc, None, self.pdfs[self.pdf_id].index)
+        watermarker.watermark(self.pdfs[self.pdf_id].page_i, source_image)
         self.pdfs[self.pdf_id].doc = watermarker.get()
+        history_entry.capture_result(self.pdfs[self.pdf_id])
+        self.pdfs[self.pdf_id].history.record(history_entry)
         self.update_page(self.pdfs[self.pdf_id].page_i)
     def event_watermark_document(self, *_args):
         """Watermark all pages"""
+        source_image = gui_get_file(limit_filetypes=[("PNG",".png"), ("JPEG",".jpg")])[0]
+        if not source_image: # No image was selected.
+            return
         self.set_unsaved() # A modification has been made to the document.
-        watermarker = WatermarkPDF(self.pdfs[self.pdf_id].doc, None)
-        watermarker.watermark(
+        history_entry = WatermarkEntry(
+            self.pdfs[self.pdf_id],
             self.pdfs[self.pdf_id].page_i,
-            gui_get_file(limit_filetypes=[("PNG",".png"), ("JPEG",".jpg")])[0],
-            all_pages=True)
+            list(range(len(self.pdfs[self.pdf_id].doc))))
+        watermarker = WatermarkPDF(self.pdfs[self.pdf_id].doc, None, self.pdfs[self.pdf_id].index)
+        watermarker.watermark(self.pdfs[self.pdf_id].page_i, source_image, all_pages=True)
         self.pdfs[self.pdf_id].doc = watermarker.get()
+        history_entry.capture_result(self.pdfs[self.pdf_id])
+        self.pdfs[self.pdf_id].history.record(history_entry)
         self.update_page(self.pdfs[self.pdf_id].page_i)
     # Extract
     def event_delete(self, *_args):
         """Delete the current page (Button Event)"""
+        if self.selected_pages:
+            self.apply_page_batch(lambda batch, pages: batch.delete(pages))
+            return
         self.set_unsaved() # A modification has been made to the document.
+        self.pdfs[self.pdf_id].history.record(
+            PageDeleteEntry(self.pdfs[self.pdf_id], self.pdfs[self.pdf_id].page_i))
         deleter = PageDeletePDF(self.pdfs[self.pdf_id].doc, None)
         deleter.delete(self.pdfs[self.pdf_id].page_i)
         self.pdfs[self.pdf_id].doc = deleter.get()
@@ -1375,38 +1955,130 @@ class App():
         self.update_page(self.pdfs[self.pdf_id].page_i)
         self.load_quickset()
     def event_extract_text(self, *_args):
-        """Extract text from the PDF to a .txt (Button Event)"""
-        self.set_unsaved() # A modification has been made to the document.
-        fname_dialog = ctk.CTkInputDialog(text="File Name", title="Extract Text")
+        """Extract text from the PDF (or a range of pages) to a .txt, .jsonl, or .md (Button Event)"""
+        fname_dialog = ctk.CTkInputDialog(
+            text="File Name (.txt, .jsonl for JSON lines, or .md for Markdown)",
+            title="Extract Text")
         fname = fname_dialog.get_input()
-        if fname is not None and fname.strip() != "":
-            extractor = PdfExtractor(self.pdfs[self.pdf_id].doc)
-            extractor.extract_text(fname)
-            # Open file explorer to the folder location.
-            subprocess.Popen(f'explorer "{os.getcwd()}"')
+        if fname is None or fname.strip() == "":
+            return
+        output_path = fname.strip()
+        if not os.path.splitext(output_path)[1]:
+            output_path += ".txt"
+        pdf_instance = self.pdfs[self.pdf_id]
+        ranges_dialog = ctk.CTkInputDialog(
+            text="Pages, such as 1-5, 8, 10- (empty for all)", title="Extract Text")
+        ranges_text = ranges_dialog.get_input()
+        if ranges_text is None:
+            return
+        try:
+            pages = parse_page_ranges(ranges_text, len(pdf_instance.doc))
+        except ValueError as err:
+            self.create_popup("Extract Text", str(err), "OK")
+            return
+        # The worker processes read the file (or a copy with the unsaved changes), the GUI stays
+        # responsive and shows the pages written so far.
+        source_path, password, is_temporary = get_worker_source(pdf_instance)
+        popup, progress_bar, cancel_event = self.create_progress_popup("Extracting Text")
+        progress = {"pages_done": 0, "finished": False}
+        def show_progress():
+            if progress["finished"]:
+                return
+            progress_bar.set(progress["pages_done"] / len(pages))
+            self.root.after(100, show_progress)
+        def extract_done(stats, error):
+            progress["finished"] = True
+            popup.destroy()
+            if is_temporary:
+                os.remove(source_path)
+            if error is not None:
+                self.create_popup("Extract Text Failed", str(error), "OK")
+            elif not stats["cancelled"]:
+                # Open file explorer to the folder location.
+                subprocess.Popen(f'explorer "{os.getcwd()}"')
+        self.run_in_background(
+            lambda: extract_text(
+                source_path,
+                output_path,
+                pages=pages,
+                password=password,
+                workers=self.settings["open_workers"],
+                progress=lambda pages_done, _page_count: progress.update(pages_done=pages_done),
+                cancel=cancel_event.is_set),
+            extract_done)
+        show_progress()
     def event_extract_images(self, *_args):
-        """Extract images from the PDF to a folder (Button Event)"""
-        self.set_unsaved() # A modification has been made to the document.
+        """Extract each image of the PDF once to a folder, with a manifest (Button Event)"""
         foldername_dialog = ctk.CTkInputDialog(text="Folder Name", title="Extract Images")
         foldername = foldername_dialog.get_input()
         if foldername is not None and foldername.strip() != "":
-            extractor = PdfExtractor(self.pdfs[self.pdf_id].doc)
-            extractor.extract_images(foldername)
+            extractor = PdfExtractor(self.pdfs[self.pdf_id].doc, self.pdfs[self.pdf_id].index)
+            extractor.extract_images(
+                foldername.strip(),
+                dedupe_content=True,
+                min_size=self.settings["extract_image_min_size"])
             # Open file explorer to the folder location.
             subprocess.Popen(f'explorer "{os.getcwd()}"')
-    def event_screenshot_page(self, *_args):
-        """Save a screenshot of the current PDF page (Button Event)"""
-        self.set_unsaved() # A modification has been made to the document.
-        fname_dialog = ctk.CTkInputDialog(text="File Name", title="Screenshot Page")
+    def event_export_pages(self, *_args):
+        """Render the current page (or a range of pages) to .png, .jpg, or .tif (Button Event)"""
+        fname_dialog = ctk.CTkInputDialog(
+            text="File Name (.png, .jpg, or .tif for one multi-page file)", title="Export Pages")
         fname = fname_dialog.get_input()
-        if fname is not None and fname.strip() != "":
-            fname.replace(".png", "").replace(".PNG", "")
-            fname += ".png"
-            page = self.pdfs[self.pdf_id].doc[self.pdfs[self.pdf_id].page_i]
-            pix = page.get_pixmap()
-            pix.save(fname)
-            # Open file explorer to the folder location.
-            subprocess.Popen(f'explorer "{os.getcwd()}"')
+        if fname is None or fname.strip() == "":
+            return
+        output_path = fname.strip()
+        if not os.path.splitext(output_path)[1]:
+            output_path += ".png"
+        pdf_instance = self.pdfs[self.pdf_id]
+        ranges_dialog = ctk.CTkInputDialog(
+            text="Pages, such as 1-5, 8, 10- (empty for this page)", title="Export Pages")
+        ranges_text = ranges_dialog.get_input()
+        if ranges_text is None:
+            return
+        try:
+            if ranges_text.strip():
+                pages = parse_page_ranges(ranges_text, len(pdf_instance.doc))
+            else:
+                pages = [pdf_instance.page_i]
+            get_image_format(output_path)
+        except ValueError as err:
+            self.create_popup("Export Pages", str(err), "OK")
+            return
+        source_path, password, is_temporary = get_worker_source(pdf_instance)
+        popup, progress_bar, cancel_event = self.create_progress_popup("Exporting Pages")
+        progress = {"pages_done": 0, "finished": False}
+        def show_progress():
+            if progress["finished"]:
+                return
+            progress_bar.set(progress["pages_done"] / len(pages))
+            self.root.after(100, show_progress)
+        def export_done(stats, error):
+            progress["finished"] = True
+            popup.destroy()
+            if is_temporary:
+                os.remove(source_path)
+            if error is not None:
+                self.create_popup("Export Pages Failed", str(error), "OK")
+            elif not stats["cancelled"]:
+                self.create_popup(
+                    "Export Pages",
+                    (f"{stats['pages']} pages ({stats['output_bytes'] / 1024 / 1024:.1f} MB) in "
+                     f"{stats['seconds']:.1f}s ({stats['pages_per_second']:.1f} pages/s)."),
+                    "OK")
+        self.run_in_background(
+            lambda: rasterize_pages(
+                source_path,
+                output_path,
+                pages=pages,
+                dpi=self.settings["export_dpi"],
+                grayscale=self.settings["export_grayscale"],
+                quality=self.settings["export_jpeg_quality"],
+                password=password,
+                workers=self.settings["open_workers"],
+                progress=lambda pages_done, _page_count: progress.update(pages_done=pages_done),
+                cancel=cancel_event.is_set),
+            export_done)
+        show_progress()
     # Meta Data
     def event_set_meta_author(self, *_args):
         """Set the metadata "author" tag"""
@@ -1414,6 +2086,8 @@ class App():
         author_dialog = ctk.CTkInputDialog(text="Set Meta Data", title="PDF Author: ")
         author = author_dialog.get_input()
         if author.strip() != "":
+            self.pdfs[self.pdf_id].history.record(
+                MetadataEntry(self.pdfs[self.pdf_id], "author", author.strip()))
             self.pdfs[self.pdf_id].custom_metadata["author"] = author.strip()
     def event_set_meta_title(self, *_args):
         """Set the metadata "title" tag"""
@@ -1421,6 +2095,8 @@ class App():
         title_dialog = ctk.CTkInputDialog(text="Set Meta Data", title="PDF Author: ")
         title = title_dialog.get_input()
         if title.strip() != "":
+            self.pdfs[self.pdf_id].history.record(
+                MetadataEntry(self.pdfs[self.pdf_id], "title", title.strip()))
             self.pdfs[self.pdf_id].custom_metadata["title"] = title.strip()
     def event_set_meta_subject(self, *_args):
         """Set the metadata "subject" tag"""
@@ -1428,6 +2104,8 @@ class App():
         subject_dialog = ctk.CTkInputDialog(text="Set Meta Data", title="PDF Subject: ")
         subject = subject_dialog.get_input()
         if subject.strip() != "":
+            self.pdfs[self.pdf_id].history.record(
+                MetadataEntry(self.pdfs[self.pdf_id], "subject", subject.strip()))
             self.pdfs[self.pdf_id].custom_metadata["subject"] = subject.strip()
     def event_set_meta_keywords(self, *_args):
         """Set the metadata "keywords" tag"""
@@ -1435,7 +2113,649 @@ class App():
         keywords_dialog = ctk.CTkInputDialog(text="Set Meta Data", title="PDF Keywords: ")
         keywords = keywords_dialog.get_input()
         if keywords.strip() != "":
+            self.pdfs[self.pdf_id].history.record(
+                MetadataEntry(self.pdfs[self.pdf_id], "keywords", keywords.strip()))
             self.pdfs[self.pdf_id].custom_metadata["keywords"] = keywords.strip()
+    # Batch
+    def run_in_background(self, work, on_done):
+        """Run work() on a thread, then on_done(result, error) on the GUI thread"""
+        outcome = {}
+        def run_work():
+            try:
+                outcome["result"] = work()
+            except Exception as err: # Reported through on_done().
+                outcome["error"] = err
+        work_thread = threading.Thread(target=run_work, daemon=True)
+        work_thread.start()
+        def poll_work():
+            if work_thread.is_alive():
+                self.root.after(100, poll_work)
+            else:
+                on_done(outcome.get("result"), outcome.get("error"))
+        self.root.after(100, poll_work)
+    def event_merge_files(self, *_args):
+        """Merge many PDF files into one, a chunk of pages at a time (Button Event)"""
+        file_paths = gui_get_files(limit_filetypes=[("PDF",".pdf")])
+        if not file_paths:
+            return
+        fname_dialog = ctk.CTkInputDialog(text="File Name", title="Merge Files")
+        fname = fname_dialog.get_input()
+        if fname is None or fname.strip() == "":
+            return
+        output_path = fname.strip()
+        if not output_path.lower().endswith(".pdf"):
+            output_path += ".pdf"
+        def merge_done(stats, error):
+            if error is not None:
+                self.create_popup("Merge Failed", str(error), "OK")
+                return
+            peak_rss = stats["process_peak_rss_mb"]
+            peak_rss = f"{peak_rss:.0f} MB" if peak_rss is not None else "unknown"
+            self.create_popup(
+                "Merge Complete",
+                (f"{stats['pages']} pages from {stats['sources']} files in "
+                 f"{stats['seconds']:.1f}s ({stats['pages_per_second']:.0f} pages/s), "
+                 f"process peak memory {peak_rss}."),
+                "OK")
+            self.open_pdf_files([output_path])
+        self.run_in_background(
+            lambda: merge_pdfs(
+                file_paths,
+                output_path,
+                chunk_pages=self.settings["merge_chunk_pages"],
+                max_handles=self.settings["merge_open_files"]),
+            merge_done)
+    def event_split_pdf(self, *_args):
+        """Split the PDF file into parts, written by the worker pool (Button Event)"""
+        pdf_instance = self.pdfs[self.pdf_id]
+        if pdf_instance.mods_made or not os.path.isfile(pdf_instance.save_path):
+            self.create_popup("Split PDF", "Save the PDF before splitting it.", "OK")
+            return
+        split_dialog = ctk.CTkInputDialog(
+            text="Pages per part, a part size such as 10MB, or \"bookmarks\"",
+            title="Split PDF")
+        split_by = split_dialog.get_input()
+        if split_by is None or split_by.strip() == "":
+            return
+        split_by = split_by.strip().lower()
+        split_args = {}
+        try:
+            if split_by in ("bookmarks", "outline"):
+                split_args["by_outline"] = True
+            elif split_by.endswith("mb"):
+                split_args["max_bytes"] = int(float(split_by[:-2]) * 1024 * 1024)
+            else:
+                split_args["pages_per_part"] = int(split_by)
+        except ValueError:
+            self.create_popup("Split PDF", f"Cannot split by \"{split_by}\".", "OK")
+            return
+        output_dir = os.path.splitext(pdf_instance.save_path)[0] + "_parts"
+        # After Save As the saved changes are not in save_path, the workers then get a copy.
+        source_path, password, is_temporary = get_worker_source(pdf_instance)
+        # split_pdf() runs on another thread, it gets its own copy of the index.
+        split_index = pdf_instance.index.select(range(len(pdf_instance.index)))
+        name_stem = os.path.splitext(pdf_instance.name)[0]
+        def split_done(stats, error):
+            if is_temporary:
+                os.remove(source_path)
+            if error is not None:
+                self.create_popup("Split Failed", str(error), "OK")
+                return
+            self.create_popup(
+                "Split Complete",
+                (f"{stats['pages']} pages split into {len(stats['part_paths'])} parts in "
+                 f"{stats['seconds']:.1f}s, saved to {output_dir}."),
+                "OK")
+        self.run_in_background(
+            lambda: split_pdf(
+                source_path,
+                output_dir,
+                password=password,
+                workers=self.settings["open_workers"],
+                index=split_index,
+                name_stem=name_stem,
+                **split_args),
+            split_done)
+    def event_text_watermark(self, *_args):
+        """Stamp a line of text on the selected pages (or every page) (Button Event)"""
+        text_dialog = ctk.CTkInputDialog(text="Watermark Text", title="Text Watermark")
+        text = text_dialog.get_input()
+        if text is None or text.strip() == "":
+            return
+        self.set_unsaved() # A modification has been made to the document.
+        pdf_instance = self.pdfs[self.pdf_id]
+        page_indices = sorted(self.selected_pages) or list(range(len(pdf_instance.doc)))
+        history_entry = WatermarkEntry(pdf_instance, pdf_instance.page_i, page_indices)
+        watermarker = WatermarkPDF(pdf_instance.doc, None, pdf_instance.index)
+        watermarker.stamp(create_text_stamp(text.strip()), page_indices)
+        history_entry.capture_result(pdf_instance)
+        pdf_instance.history.record(history_entry)
+        self.update_page(pdf_instance.page_i)
+    def event_mail_merge(self, *_args):
+        """Stamp each record of a CSV/JSON file onto a copy of the PDF file (Button Event)"""
+        pdf_instance = self.pdfs[self.pdf_id]
+        if pdf_instance.mods_made or not os.path.isfile(pdf_instance.save_path):
+            self.create_popup("Mail Merge", "Save the PDF before using it as a template.", "OK")
+            return
+        records_path = gui_get_file(
+            limit_filetypes=[("CSV", ".csv"), ("JSON", ".json"), ("JSON Lines", ".jsonl")])[0]
+        if not records_path:
+            return
+        fields_path = gui_get_file(limit_filetypes=[("Field layout (JSON)", ".json")])[0]
+        if not fields_path:
+            return
+        output_dir = os.path.splitext(pdf_instance.save_path)[0] + "_mailmerge"
+        # After Save As the saved changes are not in save_path, the template is then a copy.
+        template_path, password, is_temporary = get_worker_source(pdf_instance)
+        def mail_merge_done(stats, error):
+            if is_temporary:
+                os.remove(template_path)
+            if error is not None:
+                self.create_popup("Mail Merge Failed", str(error), "OK")
+                return
+            self.create_popup(
+                "Mail Merge Complete",
+                (f"{stats['documents']} documents in {stats['seconds']:.1f}s "
+                 f"({stats['documents_per_second']:.0f} documents/s), saved to {output_dir}."),
+                "OK")
+        self.run_in_background(
+            lambda: mail_merge(
+                template_path,
+                iter_records(records_path),
+                load_fields(fields_path),
+                output_pattern=os.path.join(output_dir, "{_index}.pdf"),
+                password=password,
+                workers=self.settings["open_workers"]),
+            mail_merge_done)
+    # Clean Up
+    def get_edit_state(self, pdf_instance):
+        """Get a value that changes whenever the PDF is edited, to tell if results are stale"""
+        # The page count of the markup model, len(pdf_instance.doc) would resume a suspended PDF.
+        history = pdf_instance.history
+        return (
+            len(pdf_instance.markup_loaded), history.undo_stack[-1] if history.undo_stack else None)
+    def run_page_scan(self, scan, on_done, title="Clean Up"):
+        """Run scan(source_path, password, page_count) in the background on a copy of the PDF"""
+        # on_done(result) runs only if the PDF is still selected and was left unchanged.
+        pdf_id = self.pdf_id
+        pdf_instance = self.pdfs[pdf_id]
+        source_path, password, is_temporary = get_worker_source(pdf_instance)
+        edit_state = self.get_edit_state(pdf_instance)
+        def scan_done(result, error):
+            if is_temporary:
+                os.remove(source_path)
+            if error is not None:
+                self.create_popup(f"{title} Failed", str(error), "OK")
+            elif self.pdf_id != pdf_id or self.get_edit_state(pdf_instance) != edit_state:
+                self.create_popup(title, "The PDF changed while it was checked, try again.", "OK")
+            else:
+                on_done(result)
+        page_count = len(pdf_instance.doc)
+        self.run_in_background(lambda: scan(source_path, password, page_count), scan_done)
+    def event_remove_blank_pages(self, *_args):
+        """Find the blank pages on the worker pool and delete them at once (Button Event)"""
+        def blank_pages_found(blank_pages):
+            if not blank_pages:
+                self.create_popup("Remove Blank Pages", "No blank pages were found.", "OK")
+                return
+            if not self.apply_page_batch(lambda batch, pages: batch.delete(pages), blank_pages):
+                return
+            self.create_popup(
+                "Remove Blank Pages",
+                f"Removed {len(blank_pages)} blank pages (Undo restores them).",
+                "OK")
+        self.run_page_scan(
+            lambda source_path, password, page_count: find_blank_pages(
+                source_path,
+                password,
+                page_count,
+                max_coverage=self.settings["blank_page_max_ink"],
+                workers=self.settings["open_workers"]),
+            blank_pages_found)
+    def event_auto_crop(self, *_args):
+        """Crop each page to its own content (Button Event)"""
+        self.auto_crop(uniform=False)
+    def event_auto_crop_uniform(self, *_args):
+        """Crop every page to one box around the content of all pages (Button Event)"""
+        self.auto_crop(uniform=True)
+    def auto_crop(self, uniform):
+        """Find each page's content box on the worker pool and crop the pages at once"""
+        def content_boxes_found(boxes):
+            crop_boxes = plan_crop_boxes(
+                *boxes,
+                margin=self.settings["auto_crop_margin"],
+                uniform=uniform)
+            pdf_instance = self.pdfs[self.pdf_id]
+            page_crops = {
+                page_i: tuple(crop_box) for page_i, crop_box in enumerate(crop_boxes.tolist())
+                if not any(math.isnan(value) for value in crop_box)
+                and max(abs(old_value - value) for old_value, value in zip(
+                    pdf_instance.doc[page_i].cropbox, crop_box)) > 0.5 # Already cropped.
+            }
+            if not page_crops:
+                self.create_popup("Auto Crop", "There are no margins to crop.", "OK")
+                return
+            self.set_unsaved() # A modification has been made to the document.
+            history_entry = PageCropEntry(pdf_instance.page_i, page_crops)
+            history_entry.redo(pdf_instance)
+            pdf_instance.history.record(history_entry)
+            self.update_page(pdf_instance.page_i)
+            self.load_quickset()
+        self.run_page_scan(
+            lambda source_path, password, page_count: find_content_boxes(
+                source_path,
+                password,
+                page_count,
+                workers=self.settings["open_workers"]),
+            content_boxes_found)
+    def event_remove_duplicates(self, *_args):
+        """Find the repeated copies of pages in a worker, then delete them once confirmed (Button Event)"""
+        # Every open PDF is checked, copies found in other PDFs are listed but left in place. The
+        # worker reads each PDF's file (a copy if it changed, the snapshot of a suspended PDF,
+        # which stays suspended) with a copy of its index. The raster hashes it renders are kept
+        # in the PDFs' indexes, so checking again after edits is quick.
+        pdf_id = self.pdf_id
+        edit_state = self.get_edit_state(self.pdfs[pdf_id])
+        open_pdfs = [] # (pdf_id, PdfDocInstance, edit state) of every open PDF.
+        worker_sources = [] # (pdf_id, source path, password, index copy) for the worker.
+        temporary_paths = []
+        for source_id, pdf_instance in self.pdfs.queue.items():
+            open_pdfs.append((source_id, pdf_instance, self.get_edit_state(pdf_instance)))
+            source_path, password, is_temporary = get_search_source(pdf_instance)
+            worker_sources.append((
+                source_id, source_path, password,
+                pdf_instance.index.select(range(len(pdf_instance.index)))))
+            if is_temporary:
+                temporary_paths.append(source_path)
+        def duplicates_found(result, error):
+            for source_path in temporary_paths:
+                os.remove(source_path)
+            if error is not None:
+                self.create_popup("Remove Duplicates Failed", str(error), "OK")
+                return
+            groups, raster_hashes = result
+            for source_id, pdf_instance, source_state in open_pdfs:
+                if (self.pdfs.queue.get(source_id) is pdf_instance
+                        and self.get_edit_state(pdf_instance) == source_state):
+                    index = pdf_instance.index
+                    for page_i, raster_hash in enumerate(raster_hashes[source_id]):
+                        if index.raster_hashes[page_i] is None:
+                            index.raster_hashes[page_i] = raster_hash
+            if pdf_id != self.pdf_id or self.get_edit_state(self.pdfs[pdf_id]) != edit_state:
+                self.create_popup(
+                    "Remove Duplicates", "The PDF changed while it was checked, try again.", "OK")
+                return
+            self.confirm_remove_duplicates(pdf_id, groups)
+        self.run_in_background(
+            lambda: find_duplicate_files_in_worker(worker_sources), duplicates_found)
+    def confirm_remove_duplicates(self, pdf_id, groups):
+        """List the duplicate pages found in the current PDF and delete them if the user agrees"""
+        pdf_instance = self.pdfs[pdf_id]
+        edit_state = self.get_edit_state(pdf_instance)
+        repeated_pages = []
+        copy_lines = []
+        shared_pages = []
+        for members in groups:
+            own_pages = [page_i for member_id, page_i in members if member_id == pdf_id]
+            repeated_pages += own_pages[1:] # Keep the first copy.
+            if len(own_pages) > 1:
+                copy_lines.append(
+                    f"Page {own_pages[0] + 1} is repeated as page "
+                    f"{', '.join(str(page_i + 1) for page_i in own_pages[1:])}.")
+            if own_pages and len(own_pages) < len(members):
+                shared_pages.append((own_pages[0], [
+                    f"{self.pdfs.labels[member_id]} page {page_i + 1}"
+                    for member_id, page_i in members if member_id != pdf_id]))
+        message = "".join(f"{copy_line}\n" for copy_line in copy_lines[:10])
+        if len(copy_lines) > 10:
+            message += f"{len(copy_lines) - 10} more pages are repeated.\n"
+        for page_i, copies in shared_pages[:10]:
+            message += f"Page {page_i + 1} is also {', '.join(copies[:3])}.\n"
+        if len(shared_pages) > 10:
+            message += f"{len(shared_pages) - 10} more pages are also in other open PDFs.\n"
+        if not repeated_pages:
+            self.create_popup(
+                "Remove Duplicates", message.strip() or "No duplicate pages were found.", "OK")
+            return
+        def remove_confirmed():
+            if self.pdf_id != pdf_id or self.get_edit_state(pdf_instance) != edit_state:
+                self.create_popup(
+                    "Remove Duplicates", "The PDF changed since it was checked, try again.", "OK")
+                return
+            if not self.apply_page_batch(
+                    lambda batch, pages: batch.delete(pages), sorted(repeated_pages)):
+                return
+            self.create_popup(
+                "Remove Duplicates",
+                f"Removed {len(repeated_pages)} duplicate pages (Undo restores them).",
+                "OK")
+        self.create_confirm_popup(
+            "Remove Duplicates",
+            message + f"Delete these {len(repeated_pages)} repeated pages (Undo restores them)?",
+            "Delete Pages",
+            remove_confirmed)
+    # Compare
+    def event_compare_file(self, *_args):
+        """Compare the PDF with another version of it, marking the changes on its pages"""
+        old_path = gui_get_file(limit_filetypes=[("PDF", ".pdf")])[0]
+        if not old_path:
+            return
+        pdf_instance = self.pdfs[self.pdf_id]
+        # A copy of the index (the background indexing keeps changing the original), so the
+        # worker only hashes the pages of the open PDF that were not analysed yet.
+        new_index = pdf_instance.index.select(range(len(pdf_instance.index)))
+        def comparison_done(stats):
+            changed_pages = {
+                new_i: boxes for _old_i, new_i, boxes in stats["pairs"] if new_i is not None and boxes}
+            added_pages = {new_i for old_i, new_i, _boxes in stats["pairs"] if old_i is None}
+            removed_pages = [old_i + 1 for old_i, new_i, _boxes in stats["pairs"] if new_i is None]
+            self.comparisons[self.pdf_id] = {
+                "edit_state": self.get_edit_state(pdf_instance),
+                "changed_pages": changed_pages,
+                "added_pages": added_pages,
+                "change_pages": sorted(set(changed_pages) | added_pages),
+            }
+            self.update_page(pdf_instance.page_i)
+            message = (
+                f"{len(changed_pages)} changed, {len(added_pages)} added, and "
+                f"{len(removed_pages)} removed pages ({stats['rendered_pages']} pages rendered "
+                f"in {stats['seconds']:.1f}s).")
+            if removed_pages:
+                message += f"\nRemoved pages of {os.path.basename(old_path)}: "
+                message += ", ".join(str(page) for page in removed_pages[:20])
+                message += ", ..." if len(removed_pages) > 20 else ""
+            self.create_popup("Compare", message, "OK")
+        self.run_page_scan(
+            lambda source_path, password, _page_count: compare_pdfs_in_worker(
+                old_path,
+                None,
+                source_path,
+                password,
+                cache_dir=self.settings["cache_directory"],
+                new_index=new_index),
+            comparison_done,
+            title="Compare")
+    def get_comparison(self):
+        """Get the changes found by Compare for the current PDF, forgetting them once it is edited"""
+        comparison = self.comparisons.get(self.pdf_id)
+        if comparison is not None and comparison["edit_state"] != self.get_edit_state(
+                self.pdfs[self.pdf_id]):
+            del self.comparisons[self.pdf_id] # The marks would no longer fit the pages.
+            return None
+        return comparison
+    def event_next_change(self, *_args):
+        """Show the next changed or added page"""
+        self.go_to_change(1)
+    def event_previous_change(self, *_args):
+        """Show the previous changed or added page"""
+        self.go_to_change(-1)
+    def go_to_change(self, step):
+        """Show the next (step 1) or previous (step -1) page marked by Compare"""
+        comparison = self.get_comparison()
+        if comparison is None:
+            self.create_popup("Compare", "Compare the PDF with another file first.", "OK")
+            return
+        page_i = self.pdfs[self.pdf_id].page_i
+        if step > 0:
+            change_pages = [change_i for change_i in comparison["change_pages"] if change_i > page_i]
+        else:
+            change_pages = [change_i for change_i in comparison["change_pages"] if change_i < page_i][::-1]
+        if not change_pages:
+            self.create_popup("Compare", "There are no more changes this way.", "OK")
+            return
+        self.pdfs[self.pdf_id].page_i = change_pages[0]
+        self.update_page(change_pages[0])
+    def event_clear_comparison(self, *_args):
+        """Remove the marks of Compare from the pages"""
+        if self.comparisons.pop(self.pdf_id, None) is not None:
+            self.update_page(self.pdfs[self.pdf_id].page_i)
+    # Search
+    def event_find(self, *_args):
+        """Find a word, phrase, or word start (such as calib*) and show its first hit (Button Event)"""
+        if not self.has_open_pdf():
+            return
+        query_dialog = ctk.CTkInputDialog(
+            text="Find a word, a phrase, or the start of a word (such as calib*), empty to clear",
+            title="Find")
+        query = query_dialog.get_input()
+        if query is None:
+            return
+        if query.strip() == "": # Remove the hits from the pages.
+            if self.searches.pop(self.pdf_id, None) is not None:
+                self.update_page(self.pdfs[self.pdf_id].page_i)
+            return
+        pdf_instance = self.pdfs[self.pdf_id]
+        # The index is built in the background, a few pages left over are indexed now.
+        complete = pdf_instance.text_index.build_step(
+            pdf_instance.doc, pdf_instance.index, max_pages=200)
+        search = {"query": query.strip()}
+        self.run_search(search)
+        self.searches[self.pdf_id] = search
+        note = "" if complete else "\nThe PDF is still being indexed, not every page was searched."
+        if not search["hits"]:
+            self.update_page(pdf_instance.page_i)
+            self.create_popup("Find", f"{search['query']!r} was not found.{note}", "OK")
+            return
+        # Start from the first hit on or after the page shown.
+        search["position"] = next(
+            (hit_i for hit_i, (page_i, _rects) in enumerate(search["hits"])
+             if page_i >= pdf_instance.page_i),
+            0)
+        self.go_to_hit(0)
+        if note:
+            self.create_popup("Find", note.strip(), "OK")
+    def run_search(self, search):
+        """Search the current PDF's text index for the query of a search, keeping its hits"""
+        pdf_instance = self.pdfs[self.pdf_id]
+        search["hits"] = pdf_instance.text_index.search(
+            pdf_instance.doc, pdf_instance.index, search["query"])
+        search["page_hits"] = {}
+        for hit_i, (page_i, _rects) in enumerate(search["hits"]):
+            search["page_hits"].setdefault(page_i, []).append(hit_i)
+        search["position"] = min(search.get("position", 0), max(len(search["hits"]) - 1, 0))
+        search["edit_state"] = self.get_edit_state(pdf_instance)
+    def get_search(self):
+        """Get the current PDF's last Find, searching again if the PDF was edited since"""
+        search = self.searches.get(self.pdf_id)
+        if search is not None and search["edit_state"] != self.get_edit_state(
+                self.pdfs[self.pdf_id]):
+            self.run_search(search) # Takes milliseconds, the pages are not read again.
+        return search
+    def event_find_next(self, *_args):
+        """Show the next hit of Find"""
+        self.go_to_hit(1)
+    def event_find_previous(self, *_args):
+        """Show the previous hit of Find"""
+        self.go_to_hit(-1)
+    def go_to_hit(self, step):
+        """Show the next (step 1) or previous (step -1) hit of Find, wrapping around the PDF"""
+        if not self.has_open_pdf():
+            return
+        search = self.get_search()
+        if search is None:
+            self.create_popup("Find", "Find a word or phrase first.", "OK")
+            return
+        if not search["hits"]:
+            self.create_popup("Find", f"{search['query']!r} was not found.", "OK")
+            return
+        search["position"] = (search["position"] + step) % len(search["hits"])
+        page_i = search["hits"][search["position"]][0]
+        self.pdfs[self.pdf_id].page_i = page_i
+        self.update_page(page_i)
+    def event_search_open_pdfs(self, *_args):
+        """Open a panel that searches every open PDF at once as the query is typed (Button Event)"""
+        if not self.has_open_pdf():
+            return
+        if self.search_panel is not None:
+            self.search_panel["window"].focus()
+            return
+        window = ctk.CTkToplevel(self.root)
+        window.title("PyPdfApp - Search Open PDFs")
+        query_entry = ctk.CTkEntry(
+            window, width=400, placeholder_text="A word, a phrase, or the start of a word (calib*)")
+        query_entry.pack(padx=10, pady=10, fill="x")
+        status_label = ctk.CTkLabel(window, text="")
+        status_label.pack(padx=10)
+        results_list = Listbox(window, width=60, height=20, activestyle="none")
+        results_list.pack(padx=10, pady=10, fill="both", expand=True)
+        self.search_panel = {
+            "window": window,
+            "entry": query_entry,
+            "status": status_label,
+            "list": results_list,
+            "query": "",
+            "search": None, # The ConcurrentSearch running for the query, if any.
+            "pool": None, # Created for the first PDF that is not indexed yet.
+            "sources": {}, # PDF id -> (edit state, file path, password, is_temporary).
+            "order": {}, # PDF id -> its place in the file selector when the search started.
+            "rows": [], # (order, page_i, pdf_id, hit count) of each listed page, sorted.
+            "pending": None, # The after() id of a search waiting for typing to stop.
+        }
+        query_entry.bind("<KeyRelease>", self.search_query_changed)
+        results_list.bind("<<ListboxSelect>>", self.search_result_selected)
+        window.protocol("WM_DELETE_WINDOW", self.close_search_panel)
+        query_entry.focus()
+    def search_query_changed(self, *_args):
+        """Search again once typing stops for a moment"""
+        panel = self.search_panel
+        if panel["pending"] is not None:
+            self.root.after_cancel(panel["pending"])
+        panel["pending"] = self.root.after(300, self.start_open_pdf_search)
+    def start_open_pdf_search(self):
+        """Search every open PDF for the panel's query, cancelling the search of the last query"""
+        panel = self.search_panel
+        panel["pending"] = None
+        query = panel["entry"].get().strip()
+        if query == panel["query"]:
+            return
+        panel["query"] = query
+        if panel["search"] is not None:
+            panel["search"].cancel()
+            panel["search"] = None
+        panel["rows"] = []
+        panel["list"].delete(0, END)
+        panel["status"].configure(text="")
+        if not query:
+            return
+        panel["order"] = {pdf_id: order for order, pdf_id in enumerate(self.pdfs.queue)}
+        worker_sources = []
+        for pdf_id, pdf_instance in self.pdfs.queue.items():
+            if (not pdf_instance.is_suspended() and pdf_instance.index.is_complete()
+                and pdf_instance.text_index.build_step(
+                    pdf_instance.doc, pdf_instance.index, max_pages=0)):
+                # Indexed in the background already, searched here in milliseconds.
+                hits = pdf_instance.text_index.search(pdf_instance.doc, pdf_instance.index, query)
+                self.add_search_results([(pdf_id, page_i, rects) for page_i, rects in hits])
+                continue
+            source_path, password = self.get_open_pdf_search_source(pdf_id)
+            worker_sources.append((pdf_id, source_path, password, len(pdf_instance.markup_loaded)))
+        if worker_sources:
+            if panel["pool"] is None:
+                panel["pool"] = create_worker_pool(self.settings["open_workers"])
+            panel["search"] = ConcurrentSearch(panel["pool"], worker_sources, query)
+            self.root.after(100, lambda: self.poll_open_pdf_search(panel["search"]))
+        self.update_search_status()
+    def get_open_pdf_search_source(self, pdf_id):
+        """Get (file path, password) the workers search for a PDF, copying it only once per edit"""
+        pdf_instance = self.pdfs[pdf_id]
+        edit_state = (pdf_instance.changed_since_open, len(pdf_instance.markup_loaded),
+                      pdf_instance.history.undo_stack[-1] if pdf_instance.history.undo_stack else None)
+        sources = self.search_panel["sources"]
+        if pdf_id not in sources or sources[pdf_id][0] != edit_state:
+            self.remove_search_source(sources.pop(pdf_id, None))
+            sources[pdf_id] = (edit_state, *get_search_source(pdf_instance))
+        return sources[pdf_id][1:3]
+    def remove_search_source(self, source):
+        """Delete a temporary copy searched by the workers"""
+        if source is not None and source[3]:
+            try:
+                os.remove(source[1])
+            except OSError: # Still open in a worker on Windows, the temporary folder keeps it.
+                pass
+    def poll_open_pdf_search(self, search):
+        """List the hits found by the workers so far, until the search is done or replaced"""
+        if self.search_panel is None or self.search_panel["search"] is not search:
+            return
+        self.add_search_results(search.poll())
+        self.update_search_status()
+        if not search.is_done():
+            self.root.after(100, lambda: self.poll_open_pdf_search(search))
+    def add_search_results(self, hits):
+        """Add one row per page with hits to the panel, keeping the rows in file selector order"""
+        panel = self.search_panel
+        page_hits = {}
+        for pdf_id, page_i, _rects in hits:
+            page_hits[(pdf_id, page_i)] = page_hits.get((pdf_id, page_i), 0) + 1
+        for (pdf_id, page_i), hit_count in page_hits.items():
+            if pdf_id not in self.pdfs.queue:
+                continue # Closed while it was searched.
+            row = (panel["order"][pdf_id], page_i, pdf_id, hit_count)
+            row_i = bisect.bisect(panel["rows"], row)
+            panel["rows"].insert(row_i, row)
+            panel["list"].insert(
+                row_i,
+                f"{self.pdfs.get_label(pdf_id)}    page {page_i + 1}"
+                + (f"    ({hit_count} hits)" if hit_count > 1 else ""))
+    def update_search_status(self):
+        """Show how much of the open PDFs the panel's search has covered"""
+        panel = self.search_panel
+        pdf_count = len({pdf_id for _order, _page_i, pdf_id, _count in panel["rows"]})
+        status = f"{len(panel['rows'])} pages in {pdf_count} PDFs"
+        search = panel["search"]
+        if search is not None and not search.is_done():
+            status += f", searching ({search.pages_done}/{search.page_count} pages)..."
+        if search is not None and search.failed_keys:
+            status += f", {len(search.failed_keys)} PDFs could not be searched"
+        panel["status"].configure(text=status)
+    def search_result_selected(self, *_args):
+        """Show the page of the selected row, with the hits of the query marked by Find"""
+        panel = self.search_panel
+        selection = panel["list"].curselection()
+        if not selection:
+            return
+        _order, page_i, pdf_id, _count = panel["rows"][selection[0]]
+        if pdf_id not in self.pdfs.queue:
+            panel["status"].configure(text="That PDF was closed.")
+            return
+        if pdf_id != self.pdf_id:
+            self.file_selector_callback(self.pdfs.get_label(pdf_id))
+            if self.pdf_id != pdf_id: # Its password prompt was cancelled.
+                return
+        pdf_instance = self.pdfs[pdf_id]
+        page_i = min(page_i, len(pdf_instance.doc) - 1) # Pages deleted since the search.
+        if pdf_instance.index.is_complete(): # Otherwise its pages are not all hashed yet.
+            search = {"query": panel["query"]}
+            self.run_search(search)
+            self.searches[pdf_id] = search
+            search["position"] = next(
+                (hit_i for hit_i, (hit_page, _rects) in enumerate(search["hits"])
+                 if hit_page == page_i),
+                0)
+        pdf_instance.page_i = page_i
+        self.update_page(page_i)
+    def close_search_panel(self):
+        """Cancel the panel's search, stop its workers, and close it"""
+        panel = self.search_panel
+        self.search_panel = None
+        if panel["pending"] is not None:
+            self.root.after_cancel(panel["pending"])
+        if panel["search"] is not None:
+            panel["search"].cancel()
+        if panel["pool"] is not None:
+            panel["pool"].shutdown(wait=False, cancel_futures=True)
+        for source in panel["sources"].values():
+            self.remove_search_source(source)
+        panel["window"].destroy()
+    def event_cache_statistics(self, *_args):
+        """Show how well the page text cache is working, to choose text_cache_mb (Button Event)"""
+        stats = TEXT_PAGES.get_stats()
+        lookups = stats["hits"] + stats["misses"]
+        self.create_popup(
+            "Cache Statistics",
+            (f"Page text cache: {stats['hit_rate']:.0%} hits ({stats['hits']} of {lookups} "
+             f"lookups)\n{stats['pages']} pages, {stats['bytes'] / 1024 / 1024:.1f} MB of "
+             f"{stats['budget_bytes'] / 1024 / 1024:.0f} MB, {stats['evictions']} evicted"),
+            "OK")
     # Signature
     def event_sign_pdf(self, *_args):
         """Sign a PDF with the current Signer Account key file and the necessary password"""
@@ -1444,7 +2764,8 @@ class App():
                 self.pdfs[self.pdf_id],
                 dialog_text = "Filename",
                 dialog_title="Save a Copy to Sign",
-                forced_save = True
+                forced_save = True,
+                watcher=self.watcher
             )
             self.set_saved()
 
@@ -1593,6 +2914,11 @@ class App():
             self.pdfs[self.pdf_id].freehand_points[
                 self.pdfs[self.pdf_id].page_i
             ].append(self.pdfs[self.pdf_id].active_stroke)
+            self.pdfs[self.pdf_id].history.record(
+                MarkupEntry(
+                    self.pdfs[self.pdf_id].page_i,
+                    "freehand_points",
+                    self.pdfs[self.pdf_id].active_stroke))
             scale_adjusted_stroke = [
                 (stroke[0]*self.scale, stroke[1]*self.scale)
                 for stroke in self.pdfs[self.pdf_id].active_stroke
@@ -1621,6 +2947,8 @@ class App():
                 self.pdf_canvas.canvasy(event.y)/self.scale
             )
             self.pdfs[self.pdf_id].redact_points[self.pdfs[self.pdf_id].page_i].append(rectlike)
+            self.pdfs[self.pdf_id].history.record(
+                MarkupEntry(self.pdfs[self.pdf_id].page_i, "redact_points", rectlike))
             rectlike  = tuple([n * self.scale for n in rectlike])
             self.active_redact_start = (None, None)
             self.pdf_canvas.create_rectangle(rectlike, fill="black", outline="black")
@@ -1647,6 +2975,8 @@ class App():
                 self.active_highlight_start = (None, None)
                 return
             self.pdfs[self.pdf_id].highlight_points[self.pdfs[self.pdf_id].page_i].append(rectlike)
+            self.pdfs[self.pdf_id].history.record(
+                MarkupEntry(self.pdfs[self.pdf_id].page_i, "highlight_points", rectlike))
             rectlike  = tuple([n * self.scale for n in rectlike])
             self.active_highlight_start = (None, None)
             self.pdf_canvas.create_rectangle(
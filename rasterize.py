@@ -0,0 +1,113 @@
+"""
+    Author: lefkovitj (https://lefkovitzj.com)
+    File Last Modified: 10/19/2026
+    Project Name: PyPdfApp
+    File Name: rasterize.py
+"""
+
+# Python Standard Library Imports.
+import io
+import os
+import time
+
+# Third-party Module Imports.
+import fitz
+from PIL import Image, TiffImagePlugin
+
+# Project Imports.
+from pagescan import get_pages, open_scan_source, stream_page_chunks
+
+# Image formats of rasterize_pages(), by output file extension.
+IMAGE_FORMATS = {".png": "png", ".jpg": "jpeg", ".jpeg": "jpeg", ".tif": "tiff", ".tiff": "tiff"}
+
+
+def get_image_format(output_path):
+    """Get the image format written to output_path, from its extension"""
+    extension = os.path.splitext(output_path)[1].lower()
+    if extension not in IMAGE_FORMATS:
+        raise ValueError("Export pages to a .png, .jpg, or .tif file")
+    return IMAGE_FORMATS[extension]
+
+def get_path_pattern(output_path, pages):
+    """Get the file name pattern of the pages, numbered with {page} if there are several"""
+    if len(pages) == 1:
+        return output_path.replace("{", "{{").replace("}", "}}")
+    stem, extension = os.path.splitext(output_path.replace("{", "{{").replace("}", "}}"))
+    digits = max(4, len(str(max(pages) + 1)))
+    return f"{stem}_{{page:0{digits}d}}{extension}"
+
+def render_page_chunk(source_path, password, pages, dpi, grayscale, image_format, quality,
+                      path_pattern):
+    """Render and encode a list of pages (run in a worker)"""
+    # PNG and JPEG pages are written to their files here, returning their sizes. TIFF pages are
+    # encoded here as single-page TIFF files, returned as bytes to be appended to the one TIFF
+    # file in page order.
+    source_doc = open_scan_source(source_path, password)
+    colorspace = fitz.csGRAY if grayscale else fitz.csRGB
+    results = []
+    try:
+        for page_i in pages:
+            pix = source_doc[page_i].get_pixmap(dpi=dpi, colorspace=colorspace, alpha=False)
+            if image_format == "tiff":
+                tiff_data = io.BytesIO()
+                Image.frombytes(
+                    "L" if grayscale else "RGB", (pix.width, pix.height), pix.samples
+                ).save(tiff_data, format="TIFF", compression="tiff_deflate", dpi=(dpi, dpi))
+                results.append(tiff_data.getvalue())
+                continue
+            page_path = path_pattern.format(page=page_i + 1)
+            if image_format == "jpeg": # Pillow's JPEG encoder is many times faster than MuPDF's.
+                Image.frombytes(
+                    "L" if grayscale else "RGB", (pix.width, pix.height), pix.samples
+                ).save(page_path, format="JPEG", quality=quality, dpi=(dpi, dpi))
+            else:
+                pix.set_dpi(dpi, dpi)
+                pix.save(page_path, output="png")
+            results.append(os.path.getsize(page_path))
+    finally:
+        source_doc.close()
+    return results
+
+def rasterize_pages(source_path, output_path, pages=None, dpi=150, grayscale=False, quality=85,
+                    password=None, workers=0, progress=None, cancel=None, max_chunk_pages=4):
+    """Render the pages to PNG or JPEG files, or one multi-page TIFF file, across the worker pool"""
+    # The format follows output_path's extension. With several pages, each PNG or JPEG page is
+    # written to output_path numbered with its page (such as scan_0001.png), by the worker that
+    # rendered it. TIFF pages are rendered and encoded by the workers, and their frames appended
+    # to the file here. Grayscale pages are a third of the size of RGB ones. Cancelling (see
+    # pagescan.stream_page_chunks()) keeps the pages written so far, except for a TIFF file,
+    # which is removed.
+    start_time = time.perf_counter()
+    image_format = get_image_format(output_path)
+    pages = get_pages(source_path, password, pages)
+    if not pages:
+        raise ValueError("There are no pages to export")
+    path_pattern = get_path_pattern(output_path, pages)
+    chunk_args = (dpi, grayscale, image_format, quality, path_pattern)
+    if image_format == "tiff":
+        with TiffImagePlugin.AppendingTiffWriter(output_path, new=True) as tiff_file:
+            def append_pages(encoded_pages):
+                for tiff_data in encoded_pages: # newFrame() fixes up the frame's offsets.
+                    tiff_file.write(tiff_data)
+                    tiff_file.newFrame()
+            pages_done, cancelled = stream_page_chunks(
+                render_page_chunk, chunk_args, source_path, password, pages, append_pages,
+                workers, progress, cancel, max_chunk_pages)
+        if cancelled:
+            os.remove(output_path)
+        output_bytes = 0 if cancelled else os.path.getsize(output_path)
+    else:
+        page_sizes = []
+        pages_done, cancelled = stream_page_chunks(
+            render_page_chunk, chunk_args, source_path, password, pages, page_sizes.extend,
+            workers, progress, cancel, max_chunk_pages)
+        output_bytes = sum(page_sizes)
+
+    seconds = time.perf_counter() - start_time
+    return {
+        "pages": pages_done,
+        "output_bytes": output_bytes,
+        "seconds": seconds,
+        "pages_per_second": pages_done / seconds if seconds else 0.0,
+        "cancelled": cancelled,
+    }
@@ -1,6 +1,6 @@
 """
     Author: lefkovitj (https://lefkovitzj.com)
-    File Last Modified: 8/28/2025
+    File Last Modified: 10/19/2026
     Project Name: PyPdfApp
     File Name: save.py
 """
@@ -12,12 +12,16 @@ from datetime import date
 import fitz
 import customtkinter as ctk
 
+# Project Imports.
+from utils import same_file
+
 def save_pdf(
         pdf_doc,
         password = None,
         dialog_text=None,
         dialog_title=None,
         forced_save = True,
+        watcher=None,
         *_args):
     """Save a PDF with encryption, markup, & compression handling"""
     file_path = None
@@ -48,24 +52,38 @@ def save_pdf(
     pdf_doc.custom_metadata["creationDate"] = str(date.today())
     pdf_doc.custom_metadata["modDate"] = str(date.today())
 
+    if pdf_doc.source_mapped and same_file(file_path, pdf_doc.save_path):
+        # The pages are still read from a map of this file, copy them before overwriting it.
+        pdf_doc.release_source_map()
     pdf_doc.doc.set_metadata(pdf_doc.custom_metadata)
     pdf_doc.doc.save(file_path, deflate = compress, garbage = garbage_num) # Save the document.
+    if garbage_num: # The open document's objects were renumbered.
+        pdf_doc.index.forget_xrefs()
 
+    added_annots = [] # (page_i, xref) of markup written only for this save.
+    redactions_applied = False
     for page_i, page in enumerate(pdf_doc.doc):
 
         # Freehand drawings.
         markings = pdf_doc.freehand_points[page_i]
-        page.add_ink_annot(markings)
+        if markings:
+            added_annots.append((page_i, page.add_ink_annot(markings).xref))
 
         # Redactions.
         for redaction_rectlike in pdf_doc.redact_points[page_i]:
             page.add_redact_annot(redaction_rectlike, fill=(0,0,0))
         page.apply_redactions()
+        # Applied redactions are now part of the page content itself.
+        if pdf_doc.redact_points[page_i]: # Its analysis and cached text no longer fit.
+            pdf_doc.index.invalidate(page_i)
+            redactions_applied = True
+        pdf_doc.redact_points[page_i] = []
 
         # Highlights.
         for highlight_rectlike in pdf_doc.highlight_points[page_i]:
             highlight = page.add_highlight_annot(highlight_rectlike)
             highlight.update()
+            added_annots.append((page_i, highlight.xref))
 
 
     if pdf_doc.password is not None and pdf_doc.password != "":
@@ -93,4 +111,17 @@ def save_pdf(
             file_path,
             deflate = compress,
             garbage = garbage_num)
+
+    # Redacted content is gone for good, undoing an earlier edit (such as a watermark, which
+    # restores the page's old /Contents) would bring it back, so the history ends here.
+    if redactions_applied:
+        pdf_doc.history.clear()
+
+    # The markup model stays the editable copy, remove the written annotations from the
+    # open document so that the next save does not add them a second time.
+    for page_i, xref in added_annots:
+        page = pdf_doc.doc[page_i]
+        page.delete_annot(page.load_annot(xref))
+    if watcher is not None: # Saving over a watched file is not a change by another program.
+        watcher.refresh(file_path, pdf_doc.password)
     return file_path
@@ -0,0 +1,90 @@
+"""
+    Author: lefkovitj (https://lefkovitzj.com)
+    File Last Modified: 10/19/2026
+    Project Name: PyPdfApp
+    File Name: search.py
+"""
+
+# Python Standard Library Imports.
+import os
+import shutil
+import tempfile
+
+# Project Imports.
+from pagescan import open_scan_source
+from textindex import TextIndex
+from workers import get_worker_source
+
+
+def get_search_source(pdf_doc):
+    """Get (file_path, password, is_temporary) of a file workers can search for an open PDF"""
+    # A suspended PDF changed since it was opened (saved or not) is copied from its snapshot,
+    # resuming it would undo the memory budget (and the snapshot is deleted once it is resumed).
+    if pdf_doc.is_suspended() and pdf_doc.snapshot_path is not None:
+        copy_fd, copy_path = tempfile.mkstemp(prefix="pypdfapp-", suffix=".pdf")
+        os.close(copy_fd)
+        shutil.copyfile(pdf_doc.snapshot_path, copy_path)
+        return copy_path, pdf_doc.open_password, True
+    return get_worker_source(pdf_doc)
+
+def search_page_chunk(source_path, password, pages, query):
+    """Find the query in a list of pages, as [(page_i, [rects])] (run in a worker)"""
+    source_doc = open_scan_source(source_path, password)
+    try:
+        text_index = TextIndex()
+        page_keys = [str(page_i) for page_i in pages]
+        for page_key, page_i in zip(page_keys, pages):
+            text_index.add_page(page_key, source_doc[page_i])
+        return [(pages[position], rects) for position, rects in text_index.search_pages(
+            page_keys, query)]
+    finally:
+        source_doc.close()
+
+
+class ConcurrentSearch():
+    """A search of many PDF files at once on a worker pool, polled for hits as they arrive"""
+    # sources is a list of (key, file_path, password, page_count). The chunks of the files are
+    # interleaved, so every file gets searched from its first pages on at once. Cancelling
+    # drops the chunks not yet started, the pool itself belongs to the caller.
+    def __init__(self, pool, sources, query, max_chunk_pages=25):
+        """Queue the chunks of every source on the pool"""
+        chunks = []
+        for source_i, (key, file_path, password, page_count) in enumerate(sources):
+            for chunk_i, chunk_start in enumerate(range(0, page_count, max_chunk_pages)):
+                chunk_pages = list(range(chunk_start, min(chunk_start + max_chunk_pages, page_count)))
+                chunks.append((chunk_i, source_i, key, file_path, password, chunk_pages))
+        chunks.sort(key=lambda chunk: chunk[:2])
+        self.page_count = sum(source[3] for source in sources)
+        self.pages_done = 0
+        self.failed_keys = set() # Files a worker could not open or read.
+        self.futures = [
+            (key, len(chunk_pages), pool.submit(
+                search_page_chunk, file_path, password, chunk_pages, query))
+            for _chunk_i, _source_i, key, file_path, password, chunk_pages in chunks
+        ]
+
+    def poll(self):
+        """Get the hits of the chunks finished since the last poll, as [(key, page_i, rects)]"""
+        hits = []
+        running = []
+        for key, chunk_size, future in self.futures:
+            if not future.done():
+                running.append((key, chunk_size, future))
+                continue
+            self.pages_done += chunk_size
+            if future.exception() is not None:
+                self.failed_keys.add(key)
+            else:
+                hits += [(key, page_i, rects) for page_i, rects in future.result()]
+        self.futures = running
+        return hits
+
+    def is_done(self):
+        """Return True once every chunk has been searched"""
+        return not self.futures
+
+    def cancel(self):
+        """Stop the search, chunks already running finish but are never polled"""
+        for _key, _chunk_size, future in self.futures:
+            future.cancel()
+        self.futures = []
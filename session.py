@@ -0,0 +1,91 @@
+"""
+    Author: lefkovitj (https://lefkovitzj.com)
+    File Last Modified: 10/19/2026
+    Project Name: PyPdfApp
+    File Name: session.py
+"""
+
+# Python Standard Library Imports.
+import json
+import os
+import shutil
+import uuid
+
+# Project Imports.
+from utils import PdfDocInstance
+
+SESSION_FILE_NAME = "session.json"
+SESSION_SNAPSHOT_DIR = "session-snapshots"
+
+
+def save_session(cache_dir, pdf_queue, selected_id, scale):
+    """Write the open PDFs' state to cache_dir, snapshotting only documents with changes"""
+    # Passwords are never written, encrypted documents ask for theirs again on first use (and
+    # for the one set with Set Encryption, if it is not the one the document was opened with).
+    snapshot_dir = os.path.abspath(os.path.join(cache_dir, SESSION_SNAPSHOT_DIR))
+    os.makedirs(snapshot_dir, exist_ok=True)
+    documents = []
+    used_snapshots = set()
+    for pdf_id in pdf_queue.queue:
+        pdf_instance = pdf_queue[pdf_id]
+        document = pdf_instance.get_state()
+        document["selected"] = pdf_id == selected_id
+        document["snapshot"] = None
+
+        snapshot_path = os.path.join(snapshot_dir, f"{uuid.uuid4().hex}.pdf")
+        if (pdf_instance.snapshot_path is not None
+            and os.path.dirname(os.path.abspath(pdf_instance.snapshot_path)) == snapshot_dir):
+            # Restored from the last session and not opened since, the snapshot is still valid.
+            document["snapshot"] = os.path.abspath(pdf_instance.snapshot_path)
+        elif pdf_instance.snapshot_path is not None: # Suspended by the memory governor.
+            shutil.copyfile(pdf_instance.snapshot_path, snapshot_path)
+            document["snapshot"] = snapshot_path
+        elif pdf_instance.changed_since_open or not os.path.isfile(pdf_instance.save_path):
+            pdf_instance.write_snapshot(snapshot_path)
+            document["snapshot"] = snapshot_path
+        if document["snapshot"] is not None:
+            used_snapshots.add(os.path.basename(document["snapshot"]))
+        documents.append(document)
+
+    session_path = os.path.join(cache_dir, SESSION_FILE_NAME)
+    with open(session_path + ".tmp", "w", encoding="utf-8") as session_file:
+        json.dump({"scale": scale, "documents": documents}, session_file)
+    os.replace(session_path + ".tmp", session_path) # Never leave a half-written session.
+
+    # Remove the snapshots of documents that are no longer part of the session.
+    for file_name in os.listdir(snapshot_dir):
+        if file_name not in used_snapshots:
+            try:
+                os.remove(os.path.join(snapshot_dir, file_name))
+            except OSError:
+                pass
+    return session_path
+
+def load_session(cache_dir, history_depth=50, memory_map=False):
+    """Read the last session, returning (scale, [(PdfDocInstance, selected), ...]) or None"""
+    session_path = os.path.join(cache_dir, SESSION_FILE_NAME)
+    if not os.path.isfile(session_path):
+        return None
+    try:
+        with open(session_path, "r", encoding="utf-8") as session_file:
+            session = json.load(session_file)
+    except (OSError, ValueError): # Unreadable session, start without it.
+        return None
+
+    restored = []
+    for document in session["documents"]:
+        snapshot_path = document["snapshot"]
+        if snapshot_path is not None and not os.path.isfile(snapshot_path):
+            continue
+        if snapshot_path is None and not os.path.isfile(document["save_path"]):
+            continue # The file was moved or deleted since the session was saved.
+        # No document is opened here, each one is opened the first time it is selected.
+        pdf_instance = PdfDocInstance(
+            document["save_path"],
+            None,
+            None,
+            history_depth,
+            memory_map=memory_map)
+        pdf_instance.set_state(document, snapshot_path)
+        restored.append((pdf_instance, document["selected"]))
+    return session["scale"], restored
@@ -0,0 +1,156 @@
+"""
+    Author: lefkovitj (https://lefkovitzj.com)
+    File Last Modified: 10/19/2026
+    Project Name: PyPdfApp
+    File Name: split.py
+"""
+
+# Python Standard Library Imports.
+import os
+import time
+
+# Third-party Module Imports.
+import fitz
+
+# Project Imports.
+from manipulate import PageSplitPDF
+from workers import create_worker_pool
+
+PAGE_OVERHEAD_BYTES = 300 # Page dictionary and cross-reference entries, roughly.
+
+
+def plan_split_by_pages(page_count, pages_per_part):
+    """Get (start_page, end_page) ranges of at most pages_per_part pages"""
+    if pages_per_part < 1:
+        raise ValueError("Each part must have at least one page")
+    return [
+        (start_page, min(start_page + pages_per_part, page_count) - 1)
+        for start_page in range(0, page_count, pages_per_part)
+    ]
+
+def plan_split_by_outline(fitz_doc):
+    """Get (start_page, end_page) ranges starting at each top-level bookmark"""
+    page_count = len(fitz_doc)
+    start_pages = sorted({
+        page_number - 1 for level, _title, page_number in fitz_doc.get_toc(simple=True)
+        if level == 1 and 0 < page_number <= page_count
+    })
+    if not start_pages:
+        raise ValueError("The PDF has no top-level bookmarks to split at")
+    start_pages[0] = 0 # Pages before the first bookmark go with it.
+    end_pages = [start_page - 1 for start_page in start_pages[1:]] + [page_count - 1]
+    return list(zip(start_pages, end_pages))
+
+def get_stream_length(fitz_doc, xref):
+    """Get the stored (compressed) length of a stream object without reading it"""
+    value_type, value = fitz_doc.xref_get_key(xref, "Length")
+    if value_type == "xref": # Indirect length, stored in an object of its own.
+        value = fitz_doc.xref_object(int(value.split()[0]))
+    try:
+        return int(value)
+    except ValueError:
+        return len(fitz_doc.xref_stream_raw(xref) or b"")
+
+def estimate_page_sizes(fitz_doc, index=None):
+    """Estimate each page's bytes in a part of its own, as (page_bytes, {resource xref: bytes})"""
+    # Resources (images, fonts) are listed separately, a part stores each of them only once.
+    resource_sizes = {}
+    page_sizes = []
+    for page_i in range(len(fitz_doc)):
+        page = fitz_doc[page_i]
+        page_bytes = PAGE_OVERHEAD_BYTES + sum(
+            get_stream_length(fitz_doc, xref) for xref in page.get_contents())
+        if index is not None:
+            image_xrefs = index.get_image_xrefs(fitz_doc, page_i)
+            font_xrefs = index.get_font_xrefs(fitz_doc, page_i)
+        else:
+            image_xrefs = [image[0] for image in page.get_images()]
+            font_xrefs = [font[0] for font in page.get_fonts()]
+        for xref in image_xrefs:
+            if xref not in resource_sizes:
+                resource_sizes[xref] = get_stream_length(fitz_doc, xref)
+        for xref in font_xrefs:
+            if xref not in resource_sizes: # The font program, uncompressed (an overestimate).
+                resource_sizes[xref] = len(fitz_doc.extract_font(xref)[3]) + PAGE_OVERHEAD_BYTES
+        page_sizes.append((page_bytes, {
+            xref: resource_sizes[xref] for xref in image_xrefs + font_xrefs}))
+    return page_sizes
+
+def plan_split_by_size(fitz_doc, max_bytes, index=None):
+    """Get (start_page, end_page) ranges whose estimated size stays under max_bytes"""
+    # A page too large on its own still gets a part of its own.
+    ranges = []
+    start_page = 0
+    part_bytes = 0
+    part_resources = set()
+    for page_i, (page_bytes, resources) in enumerate(estimate_page_sizes(fitz_doc, index)):
+        added_bytes = page_bytes + sum(
+            size for xref, size in resources.items() if xref not in part_resources)
+        if page_i > start_page and part_bytes + added_bytes > max_bytes:
+            ranges.append((start_page, page_i - 1))
+            start_page = page_i
+            part_bytes = page_bytes + sum(resources.values())
+            part_resources = set(resources)
+        else:
+            part_bytes += added_bytes
+            part_resources.update(resources)
+    ranges.append((start_page, len(fitz_doc) - 1))
+    return ranges
+
+def get_part_paths(source_path, output_dir, part_count, name_stem=None):
+    """Name each part after name_stem (or the source file), numbered from 1"""
+    stem = name_stem or os.path.splitext(os.path.basename(source_path))[0]
+    digits = max(3, len(str(part_count)))
+    return [
+        os.path.join(output_dir, f"{stem}_part{part_i + 1:0{digits}d}.pdf")
+        for part_i in range(part_count)
+    ]
+
+def write_split_part(source_path, password, start_page, end_page, part_path):
+    """Write one part of the source file (run in a worker process)"""
+    source_doc = fitz.open(source_path)
+    try:
+        if source_doc.needs_pass and not source_doc.authenticate(password or ""):
+            raise ValueError(f"Wrong password for {source_path}")
+        PageSplitPDF(source_doc, part_path).write_part(start_page, end_page, part_path)
+    finally:
+        source_doc.close()
+    return os.path.getsize(part_path)
+
+def split_pdf(source_path, output_dir, pages_per_part=None, max_bytes=None,
+              by_outline=False, password=None, workers=0, index=None, name_stem=None):
+    """Split a PDF file by page count, estimated part size, or top-level bookmarks"""
+    # index is an optional analysis.DocumentIndex of the file as it is on disk. name_stem names
+    # the parts when source_path is a temporary copy of the document.
+    start_time = time.perf_counter()
+    with fitz.open(source_path) as source_doc:
+        if source_doc.needs_pass and not source_doc.authenticate(password or ""):
+            raise ValueError(f"Wrong password for {source_path}")
+        if by_outline:
+            ranges = plan_split_by_outline(source_doc)
+        elif max_bytes:
+            ranges = plan_split_by_size(source_doc, max_bytes, index)
+        elif pages_per_part:
+            ranges = plan_split_by_pages(len(source_doc), pages_per_part)
+        else:
+            raise ValueError("Give pages_per_part, max_bytes, or by_outline to split by")
+    os.makedirs(output_dir, exist_ok=True)
+    part_paths = get_part_paths(source_path, output_dir, len(ranges), name_stem)
+
+    # Every part is written by its own worker, each copying the objects its pages use once.
+    with create_worker_pool(workers, len(ranges)) as pool:
+        part_sizes = list(pool.map(
+            write_split_part,
+            [source_path] * len(ranges),
+            [password] * len(ranges),
+            [start_page for start_page, _end_page in ranges],
+            [end_page for _start_page, end_page in ranges],
+            part_paths))
+
+    seconds = time.perf_counter() - start_time
+    return {
+        "part_paths": part_paths,
+        "part_bytes": part_sizes,
+        "pages": ranges[-1][1] + 1,
+        "seconds": seconds,
+    }
@@ -0,0 +1,35 @@
+"""
+    Author: lefkovitj (https://lefkovitzj.com)
+    File Last Modified: 10/19/2026
+    Project Name: PyPdfApp
+    File Name: conftest.py
+"""
+
+# Python Standard Library Imports.
+import os
+import sys
+
+# Third-party Module Imports.
+import fitz
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+INVOICE_TEXTS = ("Invoice 1001 total 500", "Invoice 1002 total 900")
+
+
+@pytest.fixture
+def form_pages_doc():
+    """A document whose two pages have the same content stream, "q /fzFrm0 Do Q", and only
+    differ in the Form XObject that holds their text"""
+    source_doc = fitz.open()
+    for text in INVOICE_TEXTS:
+        source_doc.new_page().insert_text((72, 72), text)
+    fitz_doc = fitz.open()
+    for page_i in range(len(source_doc)):
+        page = fitz_doc.new_page()
+        page.show_pdf_page(page.rect, source_doc, page_i)
+    assert fitz_doc[0].read_contents() == fitz_doc[1].read_contents()
+    yield fitz_doc
+    fitz_doc.close()
+    source_doc.close()
@@ -0,0 +1,41 @@
+"""
+    Author: lefkovitj (https://lefkovitzj.com)
+    File Last Modified: 10/19/2026
+    Project Name: PyPdfApp
+    File Name: test_analysis.py
+"""
+
+# Third-party Module Imports.
+import fitz
+
+# Project Imports.
+from analysis import DocumentIndex, find_duplicate_pages
+
+
+def get_duplicates(fitz_doc):
+    """Find the duplicate pages of a single document"""
+    return find_duplicate_pages([("a", fitz_doc, DocumentIndex(len(fitz_doc)))])
+
+def test_form_xobject_pages_are_not_duplicates(form_pages_doc):
+    assert get_duplicates(form_pages_doc) == []
+
+def test_annotated_copy_is_not_a_duplicate():
+    fitz_doc = fitz.open()
+    for _page_i in range(2):
+        fitz_doc.new_page().insert_text((72, 72), "Cover sheet")
+    assert get_duplicates(fitz_doc) == [[("a", 0), ("a", 1)]]
+    fitz_doc[1].add_text_annot((100, 100), "Approved")
+    assert get_duplicates(fitz_doc) == []
+
+def test_copied_pages_are_duplicates(form_pages_doc):
+    form_pages_doc.fullcopy_page(0)
+    assert get_duplicates(form_pages_doc) == [[("a", 0), ("a", 2)]]
+
+def test_hash_follows_garbage_save(form_pages_doc, tmp_path):
+    index = DocumentIndex(len(form_pages_doc))
+    content_hashes = [index.get_content_hash(form_pages_doc, page_i) for page_i in range(2)]
+    form_pages_doc.delete_page(0)
+    form_pages_doc.save(tmp_path / "saved.pdf", garbage=4)
+    index.remove_page(0)
+    index.forget_xrefs()
+    assert index.get_content_hash(form_pages_doc, 0) == content_hashes[1]
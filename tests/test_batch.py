@@ -0,0 +1,58 @@
+"""
+    Author: lefkovitj (https://lefkovitzj.com)
+    File Last Modified: 10/19/2026
+    Project Name: PyPdfApp
+    File Name: test_batch.py
+"""
+
+# Third-party Module Imports.
+import fitz
+import pytest
+
+# Project Imports.
+from batch import PageBatch
+from utils import PdfDocInstance
+
+
+def get_pages(pdf_doc):
+    """Get the (text, rotation) of every page"""
+    return [(page.get_text().strip(), page.rotation) for page in pdf_doc.doc]
+
+@pytest.fixture
+def pdf_doc():
+    """An open PdfDocInstance of five pages numbered in their text"""
+    fitz_doc = fitz.open()
+    for page_i in range(5):
+        fitz_doc.new_page().insert_text((72, 72), f"Page {page_i + 1}")
+    return PdfDocInstance("numbered.pdf", fitz_doc, None)
+
+@pytest.mark.parametrize("plan, expected_texts", [
+    (lambda batch: batch.delete([1, 3]), ["Page 1", "Page 3", "Page 5"]),
+    (lambda batch: batch.permute([4, 3, 2, 1, 0]),
+     ["Page 5", "Page 4", "Page 3", "Page 2", "Page 1"]),
+    (lambda batch: batch.move([0, 1], 3), ["Page 3", "Page 4", "Page 5", "Page 1", "Page 2"]),
+    (lambda batch: batch.shift([2], -1), ["Page 1", "Page 3", "Page 2", "Page 4", "Page 5"]),
+    (lambda batch: batch.rotate([0, 4], 90), ["Page 1", "Page 2", "Page 3", "Page 4", "Page 5"]),
+    (lambda batch: batch.duplicate([0]),
+     ["Page 1", "Page 1", "Page 2", "Page 3", "Page 4", "Page 5"]),
+])
+def test_apply_and_undo_batch(pdf_doc, plan, expected_texts):
+    original_pages = get_pages(pdf_doc)
+    batch = PageBatch(len(pdf_doc.doc))
+    plan(batch)
+    batch_entry = batch.apply(pdf_doc)
+    assert [text for text, _rotation in get_pages(pdf_doc)] == expected_texts
+    assert len(pdf_doc.markup_loaded) == len(expected_texts)
+    batch_entry.undo(pdf_doc)
+    assert get_pages(pdf_doc) == original_pages
+    assert len(pdf_doc.markup_loaded) == len(original_pages)
+    batch_entry.redo(pdf_doc)
+    assert [text for text, _rotation in get_pages(pdf_doc)] == expected_texts
+
+def test_rotated_pages_are_undone(pdf_doc):
+    batch = PageBatch(len(pdf_doc.doc))
+    batch.rotate([1], 270)
+    batch_entry = batch.apply(pdf_doc)
+    assert pdf_doc.doc[1].rotation == 270
+    batch_entry.undo(pdf_doc)
+    assert pdf_doc.doc[1].rotation == 0
@@ -0,0 +1,45 @@
+"""
+    Author: lefkovitj (https://lefkovitzj.com)
+    File Last Modified: 10/19/2026
+    Project Name: PyPdfApp
+    File Name: test_cache.py
+"""
+
+# Third-party Module Imports.
+import fitz
+import pytest
+
+# Project Imports.
+from analysis import DocumentIndex
+from cache import TEXT_PAGES
+from manipulate import PdfExtractor
+
+
+@pytest.fixture
+def text_cache():
+    """The shared text cache, with room for the test's pages and emptied afterwards"""
+    TEXT_PAGES.set_budget(8)
+    yield TEXT_PAGES
+    TEXT_PAGES.set_budget(0)
+
+def test_extract_text_of_form_xobject_pages(form_pages_doc, text_cache, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    extractor = PdfExtractor(form_pages_doc, DocumentIndex(len(form_pages_doc)))
+    _done, text_path = extractor.extract_text(str(tmp_path / "invoices.txt"))
+    with open(text_path, "r", encoding="utf-8") as text_file:
+        assert text_file.read() == "Invoice 1001 total 500\n\x0cInvoice 1002 total 900\n\x0c"
+    assert text_cache.get_stats()["pages"] == 2
+
+def test_documents_share_only_pages_with_the_same_text(form_pages_doc, text_cache):
+    other_doc = fitz.open()
+    other_doc.insert_pdf(form_pages_doc, from_page=1, to_page=1)
+    other_doc.insert_pdf(form_pages_doc, from_page=0, to_page=0)
+    hits = text_cache.get_stats()["hits"]
+    for fitz_doc in (form_pages_doc, other_doc):
+        index = DocumentIndex(len(fitz_doc))
+        page_texts = [
+            text_cache.get(fitz_doc[page_i], index.get_content_hash(fitz_doc, page_i)).text
+            for page_i in range(len(fitz_doc))
+        ]
+        assert page_texts == [fitz_doc[page_i].get_text() for page_i in range(len(fitz_doc))]
+    assert text_cache.get_stats()["hits"] == hits + 2
@@ -0,0 +1,37 @@
+"""
+    Author: lefkovitj (https://lefkovitzj.com)
+    File Last Modified: 10/19/2026
+    Project Name: PyPdfApp
+    File Name: test_compare.py
+"""
+
+# Third-party Module Imports.
+import fitz
+
+# Project Imports.
+from compare import compare_pdfs
+
+
+def save_form_pages(file_path, texts):
+    """Save a PDF with a page per text, each drawn from a Form XObject with show_pdf_page()"""
+    source_doc = fitz.open()
+    for text in texts:
+        source_doc.new_page().insert_text((72, 72), text)
+    fitz_doc = fitz.open()
+    for page_i in range(len(source_doc)):
+        page = fitz_doc.new_page()
+        page.show_pdf_page(page.rect, source_doc, page_i)
+    fitz_doc.save(file_path)
+    fitz_doc.close()
+    source_doc.close()
+
+def test_changed_form_xobject_page_is_rendered(tmp_path):
+    old_path = str(tmp_path / "old.pdf")
+    new_path = str(tmp_path / "new.pdf")
+    save_form_pages(old_path, ["Invoice 1001 total 500", "Invoice 1002 total 900"])
+    save_form_pages(new_path, ["Invoice 1001 total 500", "Invoice 1002 total 950"])
+    result = compare_pdfs(old_path, None, new_path, None)
+    assert result["rendered_pages"] == 1
+    (old_0, new_0, boxes_0), (old_1, new_1, boxes_1) = result["pairs"]
+    assert (old_0, new_0, boxes_0) == (0, 0, [])
+    assert (old_1, new_1) == (1, 1) and boxes_1
@@ -0,0 +1,36 @@
+"""
+    Author: lefkovitj (https://lefkovitzj.com)
+    File Last Modified: 10/19/2026
+    Project Name: PyPdfApp
+    File Name: test_history.py
+"""
+
+# Third-party Module Imports.
+import fitz
+import pytest
+
+# Project Imports.
+from history import JournalEntry, PageRotateEntry
+from utils import PdfDocInstance
+
+
+def test_entries_must_implement_undo_and_redo():
+    class UndoOnlyEntry(JournalEntry):
+        def undo(self, pdf_doc):
+            pass
+    with pytest.raises(TypeError):
+        JournalEntry(0)
+    with pytest.raises(TypeError):
+        UndoOnlyEntry(0)
+
+def test_undo_and_redo_through_the_journal():
+    fitz_doc = fitz.open()
+    fitz_doc.new_page()
+    pdf_doc = PdfDocInstance("rotate.pdf", fitz_doc, None)
+    entry = PageRotateEntry(0, 90)
+    entry.redo(pdf_doc)
+    pdf_doc.history.record(entry)
+    pdf_doc.history.undo(pdf_doc)
+    assert pdf_doc.doc[0].rotation == 0
+    pdf_doc.history.redo(pdf_doc)
+    assert pdf_doc.doc[0].rotation == 90
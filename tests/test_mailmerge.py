@@ -0,0 +1,60 @@
+"""
+    Author: lefkovitj (https://lefkovitzj.com)
+    File Last Modified: 10/19/2026
+    Project Name: PyPdfApp
+    File Name: test_mailmerge.py
+"""
+
+# Third-party Module Imports.
+import fitz
+import pytest
+
+# Project Imports.
+from mailmerge import write_record_batch
+
+NAME_FIELDS = [{"name": "name", "point": [72, 144]}]
+
+
+def save_template(template_path, password=None):
+    """Save a one page template, encrypted with password if given"""
+    template_doc = fitz.open()
+    template_doc.new_page().insert_text((72, 72), "Dear")
+    if password:
+        template_doc.save(
+            template_path, encryption=fitz.PDF_ENCRYPT_AES_256, owner_pw=password, user_pw=password)
+    else:
+        template_doc.save(template_path)
+
+def test_encrypted_template(tmp_path):
+    template_path = str(tmp_path / "template.pdf")
+    output_path = str(tmp_path / "letter.pdf")
+    save_template(template_path, "secret")
+    write_record_batch(template_path, NAME_FIELDS, [{"name": "Ada"}], [output_path],
+                       password="secret")
+    with fitz.open(output_path) as output_doc:
+        assert output_doc[0].get_text().split() == ["Dear", "Ada"]
+
+def test_encrypted_template_needs_its_password(tmp_path):
+    template_path = str(tmp_path / "template.pdf")
+    save_template(template_path, "secret")
+    with pytest.raises(ValueError):
+        write_record_batch(template_path, NAME_FIELDS, [{"name": "Ada"}],
+                           [str(tmp_path / "letter.pdf")], password="wrong")
+
+def test_combined_records_keep_their_own_images(tmp_path):
+    template_path = str(tmp_path / "template.pdf")
+    save_template(template_path)
+    records = []
+    for record_i in range(4):
+        image_path = str(tmp_path / f"photo{record_i}.png")
+        pixmap = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 8 + record_i, 8), False)
+        pixmap.clear_with(40 * record_i)
+        pixmap.save(image_path)
+        records.append({"name": f"Person {record_i}", "photo": image_path})
+    fields = NAME_FIELDS + [{"name": "photo", "type": "image", "rect": [72, 200, 150, 280]}]
+    combined_path = str(tmp_path / "letters.pdf")
+    write_record_batch(template_path, fields, records, combined_path=combined_path)
+    with fitz.open(combined_path) as combined_doc:
+        assert [len(page.get_images()) for page in combined_doc] == [1, 1, 1, 1]
+        font_xrefs = {font[0] for page in combined_doc for font in page.get_fonts()}
+        assert len(font_xrefs) == 1 # The template's font is still stored once.
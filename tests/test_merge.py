@@ -0,0 +1,28 @@
+"""
+    Author: lefkovitj (https://lefkovitzj.com)
+    File Last Modified: 10/19/2026
+    Project Name: PyPdfApp
+    File Name: test_merge.py
+"""
+
+# Third-party Module Imports.
+import fitz
+
+# Project Imports.
+from merge import merge_pdfs
+
+
+def test_chunks_are_appended_to_the_output(tmp_path):
+    source_paths = []
+    for source_i in range(3):
+        source_doc = fitz.open()
+        for page_i in range(2):
+            source_doc.new_page().insert_text((72, 72), f"source {source_i} page {page_i}")
+        source_paths.append(str(tmp_path / f"source{source_i}.pdf"))
+        source_doc.save(source_paths[-1])
+    output_path = str(tmp_path / "merged.pdf")
+    stats = merge_pdfs(source_paths, output_path, chunk_pages=2)
+    assert stats["pages"] == 6 and stats["sources"] == 3
+    with fitz.open(output_path) as output_doc:
+        assert [page.get_text().strip() for page in output_doc] == [
+            f"source {source_i} page {page_i}" for source_i in range(3) for page_i in range(2)]
@@ -0,0 +1,32 @@
+"""
+    Author: lefkovitj (https://lefkovitzj.com)
+    File Last Modified: 10/19/2026
+    Project Name: PyPdfApp
+    File Name: test_rasterize.py
+"""
+
+# Third-party Module Imports.
+import fitz
+from PIL import Image, ImageSequence
+
+# Project Imports.
+from rasterize import rasterize_pages
+
+
+def test_tiff_frames_are_appended_in_page_order(tmp_path):
+    source_doc = fitz.open()
+    for page_i in range(3):
+        source_doc.new_page(width=100 + 10 * page_i, height=150).insert_text(
+            (10, 40), f"page {page_i}", fontsize=20)
+    source_path = str(tmp_path / "source.pdf")
+    source_doc.save(source_path)
+    output_path = str(tmp_path / "pages.tif")
+    stats = rasterize_pages(source_path, output_path, dpi=72, grayscale=True, workers=2,
+                            max_chunk_pages=1)
+    assert stats["pages"] == 3
+    with Image.open(output_path) as tiff_image:
+        for page_i, frame in enumerate(ImageSequence.Iterator(tiff_image)):
+            pix = source_doc[page_i].get_pixmap(dpi=72, colorspace=fitz.csGRAY, alpha=False)
+            assert frame.size == (pix.width, pix.height)
+            assert frame.tobytes() == pix.samples
+        assert tiff_image.n_frames == 3
@@ -0,0 +1,53 @@
+"""
+    Author: lefkovitj (https://lefkovitzj.com)
+    File Last Modified: 10/19/2026
+    Project Name: PyPdfApp
+    File Name: test_save.py
+"""
+
+# Third-party Module Imports.
+import fitz
+
+# Project Imports.
+import save
+from history import MarkupEntry, PageRotateEntry
+from utils import PdfDocInstance
+
+
+class FileNameDialog():
+    """Stands in for the file name prompt of save_pdf()"""
+    file_path = None
+    def __init__(self, **_kwargs):
+        pass
+    def get_input(self):
+        return self.file_path
+
+def test_applied_redactions_end_the_history(tmp_path, monkeypatch):
+    FileNameDialog.file_path = str(tmp_path / "redacted.pdf")
+    monkeypatch.setattr(save.ctk, "CTkInputDialog", FileNameDialog)
+    fitz_doc = fitz.open()
+    fitz_doc.new_page().insert_text((72, 72), "Account 1234")
+    pdf_doc = PdfDocInstance(str(tmp_path / "account.pdf"), fitz_doc, None)
+    rotate_entry = PageRotateEntry(0, 90)
+    rotate_entry.redo(pdf_doc)
+    pdf_doc.history.record(rotate_entry)
+    redact_entry = MarkupEntry(0, "redact_points", (60, 50, 200, 80))
+    redact_entry.redo(pdf_doc)
+    pdf_doc.history.record(redact_entry)
+
+    save.save_pdf(pdf_doc)
+    assert "1234" not in pdf_doc.doc[0].get_text()
+    assert not pdf_doc.history.can_undo()
+
+def test_saving_without_redactions_keeps_the_history(tmp_path, monkeypatch):
+    FileNameDialog.file_path = str(tmp_path / "rotated.pdf")
+    monkeypatch.setattr(save.ctk, "CTkInputDialog", FileNameDialog)
+    fitz_doc = fitz.open()
+    fitz_doc.new_page().insert_text((72, 72), "Account 1234")
+    pdf_doc = PdfDocInstance(str(tmp_path / "account.pdf"), fitz_doc, None)
+    rotate_entry = PageRotateEntry(0, 90)
+    rotate_entry.redo(pdf_doc)
+    pdf_doc.history.record(rotate_entry)
+
+    save.save_pdf(pdf_doc)
+    assert pdf_doc.history.can_undo()
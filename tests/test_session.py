@@ -0,0 +1,60 @@
+"""
+    Author: lefkovitj (https://lefkovitzj.com)
+    File Last Modified: 10/19/2026
+    Project Name: PyPdfApp
+    File Name: test_session.py
+"""
+
+# Third-party Module Imports.
+import fitz
+
+# Project Imports.
+from session import load_session, save_session
+from utils import PdfDocInstance, PdfQueue
+
+
+def save_and_restore(tmp_path, pdf_doc):
+    """Save a session of the one PDF and restore it, returning the restored PdfDocInstance"""
+    pdf_queue = PdfQueue()
+    pdf_id = pdf_queue.add_pdf(pdf_doc)
+    save_session(str(tmp_path / "cache"), pdf_queue, pdf_id, 1.0)
+    _scale, restored = load_session(str(tmp_path / "cache"))
+    return restored[0][0]
+
+def open_pdf(tmp_path, password=None):
+    """Save a one page PDF (encrypted with password, if given) and open it"""
+    file_path = str(tmp_path / "document.pdf")
+    fitz_doc = fitz.open()
+    fitz_doc.new_page().insert_text((72, 72), "Confidential")
+    if password:
+        fitz_doc.save(
+            file_path, encryption=fitz.PDF_ENCRYPT_AES_256, owner_pw=password, user_pw=password)
+    else:
+        fitz_doc.save(file_path)
+    open_doc = fitz.open(file_path)
+    if password:
+        open_doc.authenticate(password)
+    return PdfDocInstance(file_path, open_doc, password)
+
+def test_restored_encrypted_pdf_stays_encrypted(tmp_path):
+    pdf_doc = save_and_restore(tmp_path, open_pdf(tmp_path, "secret"))
+    assert pdf_doc.password is None
+    assert pdf_doc.doc.is_encrypted
+    assert pdf_doc.unlock("secret")
+    assert pdf_doc.password == "secret"
+
+def test_removed_encryption_stays_removed(tmp_path):
+    pdf_doc = open_pdf(tmp_path, "secret")
+    pdf_doc.password = None # Remove Encryption.
+    pdf_doc = save_and_restore(tmp_path, pdf_doc)
+    assert pdf_doc.doc.is_encrypted
+    assert pdf_doc.unlock("secret")
+    assert pdf_doc.password is None
+
+def test_new_encryption_is_asked_for_again(tmp_path):
+    pdf_doc = open_pdf(tmp_path)
+    pdf_doc.password = "new secret" # Set Encryption.
+    pdf_doc = save_and_restore(tmp_path, pdf_doc)
+    assert not pdf_doc.doc.is_encrypted
+    assert pdf_doc.restored_encryption == "ask"
+    assert pdf_doc.get_state()["encryption"] == "ask" # Kept by the next session until asked.
@@ -0,0 +1,34 @@
+"""
+    Author: lefkovitj (https://lefkovitzj.com)
+    File Last Modified: 10/19/2026
+    Project Name: PyPdfApp
+    File Name: test_split.py
+"""
+
+# Python Standard Library Imports.
+import os
+
+# Third-party Module Imports.
+import fitz
+
+# Project Imports.
+from split import get_part_paths, split_pdf
+
+
+def test_parts_are_named_after_the_name_stem():
+    part_paths = get_part_paths("/tmp/tmpab12cd.pdf", "out", 2, name_stem="report")
+    assert part_paths == [os.path.join("out", "report_part001.pdf"),
+                          os.path.join("out", "report_part002.pdf")]
+    assert get_part_paths("/tmp/report.pdf", "out", 1) == [os.path.join("out", "report_part001.pdf")]
+
+def test_split_by_pages(tmp_path):
+    source_doc = fitz.open()
+    for _page_i in range(5):
+        source_doc.new_page()
+    source_path = str(tmp_path / "tmpcopy.pdf")
+    source_doc.save(source_path)
+    stats = split_pdf(source_path, str(tmp_path / "parts"), pages_per_part=2, workers=1,
+                      name_stem="report")
+    assert [os.path.basename(path) for path in stats["part_paths"]] == [
+        "report_part001.pdf", "report_part002.pdf", "report_part003.pdf"]
+    assert [len(fitz.open(path)) for path in stats["part_paths"]] == [2, 2, 1]
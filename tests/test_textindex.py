@@ -0,0 +1,52 @@
+"""
+    Author: lefkovitj (https://lefkovitzj.com)
+    File Last Modified: 10/19/2026
+    Project Name: PyPdfApp
+    File Name: test_textindex.py
+"""
+
+# Third-party Module Imports.
+import fitz
+
+# Project Imports.
+from analysis import DocumentIndex
+from textindex import TextIndex, get_text_index_path
+
+
+def build_text_index(fitz_doc):
+    """Get a complete text index of the document, and its analysis index"""
+    document_index = DocumentIndex(len(fitz_doc))
+    text_index = TextIndex()
+    while not text_index.build_step(fitz_doc, document_index):
+        pass
+    return text_index, document_index
+
+def get_hit_pages(text_index, fitz_doc, document_index, query):
+    """Get the page of every hit of the query"""
+    return [page_i for page_i, _rects in text_index.search(fitz_doc, document_index, query)]
+
+def test_form_xobject_pages_are_indexed_separately(form_pages_doc, tmp_path):
+    text_index, document_index = build_text_index(form_pages_doc)
+    assert len(text_index.page_words) == 2
+    assert get_hit_pages(text_index, form_pages_doc, document_index, "1001") == [0]
+    assert get_hit_pages(text_index, form_pages_doc, document_index, "1002") == [1]
+
+    page_hashes = text_index.get_page_hashes(form_pages_doc, document_index)
+    index_path = get_text_index_path(str(tmp_path), page_hashes)
+    text_index.save(index_path)
+    saved_index = TextIndex.load(index_path)
+    assert get_hit_pages(saved_index, form_pages_doc, document_index, "total 900") == [1]
+
+def test_saved_index_is_not_reused_for_other_forms(form_pages_doc, tmp_path):
+    other_doc = fitz.open()
+    other_doc.insert_pdf(form_pages_doc, from_page=1, to_page=1)
+    other_doc.insert_pdf(form_pages_doc, from_page=1, to_page=1)
+    assert [page.read_contents() for page in other_doc] == [
+        page.read_contents() for page in form_pages_doc]
+    text_index, document_index = build_text_index(form_pages_doc)
+    other_index, other_document_index = build_text_index(other_doc)
+    assert get_text_index_path(
+        str(tmp_path), text_index.get_page_hashes(form_pages_doc, document_index)
+    ) != get_text_index_path(
+        str(tmp_path), other_index.get_page_hashes(other_doc, other_document_index))
+    assert get_hit_pages(other_index, other_doc, other_document_index, "1002") == [0, 1]
@@ -0,0 +1,29 @@
+"""
+    Author: lefkovitj (https://lefkovitzj.com)
+    File Last Modified: 10/19/2026
+    Project Name: PyPdfApp
+    File Name: test_utils.py
+"""
+
+# Third-party Module Imports.
+import fitz
+import pytest
+
+# Project Imports.
+from utils import MARKUP_ANNOT_TYPES, PdfDocInstance, open_mapped_pdf
+
+
+@pytest.mark.parametrize("memory_map", [False, True])
+def test_resume_strips_imported_markup(tmp_path, memory_map):
+    file_path = str(tmp_path / "marked.pdf")
+    fitz_doc = fitz.open()
+    fitz_doc.new_page().add_highlight_annot(fitz.Rect(72, 72, 200, 90))
+    fitz_doc.save(file_path)
+    open_doc = open_mapped_pdf(file_path) if memory_map else fitz.open(file_path)
+    pdf_doc = PdfDocInstance(file_path, open_doc, None, memory_map=memory_map)
+    pdf_doc.load_page_markup(0)
+    assert len(pdf_doc.highlight_points[0]) == 1
+
+    pdf_doc.suspend()
+    assert not list(pdf_doc.doc[0].annots(types=MARKUP_ANNOT_TYPES))
+    assert len(pdf_doc.highlight_points[0]) == 1
@@ -0,0 +1,65 @@
+"""
+    Author: lefkovitj (https://lefkovitzj.com)
+    File Last Modified: 10/19/2026
+    Project Name: PyPdfApp
+    File Name: test_watcher.py
+"""
+
+# Python Standard Library Imports.
+import os
+import time
+
+# Third-party Module Imports.
+import fitz
+
+# Project Imports.
+from watcher import FileWatcher
+
+
+def write_pdf(file_path, texts):
+    fitz_doc = fitz.open()
+    for text in texts:
+        fitz_doc.new_page().insert_text((72, 72), text)
+    fitz_doc.save(file_path)
+    fitz_doc.close()
+    os.utime(file_path, ns=(time.time_ns(), time.time_ns() + 10**9)) # A new mtime, always.
+
+def wait_for_changes(watcher, seconds=2.0):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        changes = watcher.get_changes()
+        if changes:
+            return changes
+        time.sleep(0.02)
+    return []
+
+def test_baseline_is_taken_when_watching(tmp_path):
+    file_path = str(tmp_path / "watched.pdf")
+    write_pdf(file_path, ["one", "two"])
+    watcher = FileWatcher(interval=0.02)
+    watcher.watch(file_path)
+    assert len(watcher.watched[file_path]["fingerprints"]) == 2
+
+    write_pdf(file_path, ["one", "three"]) # Changed before the first poll.
+    watcher.start()
+    try:
+        changes = wait_for_changes(watcher)
+    finally:
+        watcher.stop()
+    assert len(changes) == 1
+    _file_path, old_fingerprints, new_fingerprints = changes[0]
+    assert old_fingerprints[0] == new_fingerprints[0]
+    assert old_fingerprints[1] != new_fingerprints[1]
+
+def test_refreshed_saves_are_not_changes(tmp_path):
+    file_path = str(tmp_path / "watched.pdf")
+    write_pdf(file_path, ["one"])
+    watcher = FileWatcher(interval=0.02)
+    watcher.watch(file_path)
+    watcher.start()
+    try:
+        write_pdf(file_path, ["saved"])
+        watcher.refresh(file_path)
+        assert wait_for_changes(watcher, 0.3) == []
+    finally:
+        watcher.stop()
@@ -0,0 +1,36 @@
+"""
+    Author: lefkovitj (https://lefkovitzj.com)
+    File Last Modified: 10/19/2026
+    Project Name: PyPdfApp
+    File Name: test_workers.py
+"""
+
+# Python Standard Library Imports.
+import os
+
+# Third-party Module Imports.
+import fitz
+
+# Project Imports.
+from utils import PdfDocInstance
+from workers import get_worker_source
+
+
+def test_worker_source_after_save_as(tmp_path):
+    file_path = str(tmp_path / "original.pdf")
+    fitz_doc = fitz.open()
+    fitz_doc.new_page().insert_text((72, 72), "Original")
+    fitz_doc.save(file_path)
+    pdf_doc = PdfDocInstance(file_path, fitz.open(file_path), None)
+    assert get_worker_source(pdf_doc) == (file_path, None, False)
+
+    pdf_doc.doc[0].insert_text((72, 144), "Edited")
+    pdf_doc.changed_since_open = True
+    pdf_doc.mods_made = False # Saved, but to another file, save_path is still the original.
+    source_path, _password, is_temporary = get_worker_source(pdf_doc)
+    try:
+        assert is_temporary
+        with fitz.open(source_path) as source_doc:
+            assert "Edited" in source_doc[0].get_text()
+    finally:
+        os.remove(source_path)
@@ -0,0 +1,215 @@
+"""
+    Author: lefkovitj (https://lefkovitzj.com)
+    File Last Modified: 10/19/2026
+    Project Name: PyPdfApp
+    File Name: textindex.py
+"""
+
+# Python Standard Library Imports.
+import bisect
+import hashlib
+import os
+import string
+import zipfile
+
+# Third-party Module Imports.
+import numpy as np
+
+# Project Imports.
+from cache import TEXT_PAGES
+
+# Stripped from both ends of words, "(Section" and "Section," are both indexed as "section".
+PUNCTUATION = string.punctuation + "‘’“”«»…–—"
+
+
+def normalize_term(word):
+    """Get the indexed form of a word, in lower case without surrounding punctuation"""
+    return word.strip(PUNCTUATION).casefold()
+
+def get_document_key(page_hashes):
+    """Hash the content hashes of every page, in order, into a key for the whole document"""
+    return hashlib.sha1("\n".join(page_hashes).encode("utf-8")).hexdigest()
+
+def get_text_index_path(cache_dir, page_hashes):
+    """Get the cache file used for the text index of a document with these page hashes"""
+    return os.path.join(cache_dir, "text", f"{get_document_key(page_hashes)}.npz")
+
+
+class TextIndex():
+    """Full-text index of a document's words and their rects, stored per page content hash"""
+    # Pages are keyed by their analysis.DocumentIndex content hash, so inserting, deleting, or
+    # moving pages never extracts a page again, only pages with new content are. Queries scan flat
+    # NumPy arrays of every word's term id in page order, rebuilt when the page order changes.
+    def __init__(self):
+        """Initialize an index with no pages"""
+        self.terms = [] # Term id -> term.
+        self.term_ids = {} # Term -> term id.
+        self.page_words = {} # Content hash -> (term ids, (n, 4) array of word rects).
+        self.next_page = 0 # Where build_step() continues from.
+        self._sorted_terms = None # (Sorted terms, their ids) for prefix queries, None if stale.
+        self._flat = None # (Page hashes, term ids, page indices, rects) of the page order.
+
+    def add_page(self, content_hash, page):
+        """Index the words of a page"""
+        page_text = TEXT_PAGES.get(page, content_hash)
+        term_ids = []
+        kept_words = []
+        for word_i, word in enumerate(page_text.get_word_strings()):
+            term = normalize_term(word)
+            if not term:
+                continue
+            if term not in self.term_ids:
+                self.term_ids[term] = len(self.terms)
+                self.terms.append(term)
+                self._sorted_terms = None
+            term_ids.append(self.term_ids[term])
+            kept_words.append(word_i)
+        self.page_words[content_hash] = (
+            np.array(term_ids, dtype=np.int32), page_text.word_rects[kept_words])
+
+    def build_step(self, fitz_doc, document_index, max_pages=20):
+        """Index up to max_pages more pages, returning True once every page is indexed"""
+        page_count = len(fitz_doc)
+        for page_offset in range(page_count):
+            page_i = (self.next_page + page_offset) % page_count
+            content_hash = document_index.get_content_hash(fitz_doc, page_i)
+            if content_hash and content_hash not in self.page_words:
+                if max_pages == 0:
+                    self.next_page = page_i
+                    return False
+                self.add_page(content_hash, fitz_doc[page_i])
+                max_pages -= 1
+        self.next_page = 0
+        return True
+
+    def get_page_hashes(self, fitz_doc, document_index):
+        """Get the content hash of every page, in order"""
+        return tuple(
+            document_index.get_content_hash(fitz_doc, page_i) for page_i in range(len(fitz_doc)))
+
+    def _get_flat(self, page_hashes):
+        """Get (term ids, page indices, rects) of every indexed word, in page order"""
+        if self._flat is None or self._flat[0] != page_hashes:
+            page_words = [
+                (page_i, self.page_words[content_hash])
+                for page_i, content_hash in enumerate(page_hashes)
+                if content_hash in self.page_words
+            ]
+            if page_words:
+                flat_ids = np.concatenate([term_ids for _page_i, (term_ids, _rects) in page_words])
+                flat_pages = np.concatenate([
+                    np.full(len(term_ids), page_i, dtype=np.int32)
+                    for page_i, (term_ids, _rects) in page_words
+                ])
+                flat_rects = np.concatenate([rects for _page_i, (_term_ids, rects) in page_words])
+            else:
+                flat_ids = np.zeros(0, dtype=np.int32)
+                flat_pages = np.zeros(0, dtype=np.int32)
+                flat_rects = np.zeros((0, 4), dtype=np.float32)
+            self._flat = (page_hashes, flat_ids, flat_pages, flat_rects)
+        return self._flat[1:]
+
+    def get_query_ids(self, query_word):
+        """Get the term ids a query word matches, every term starting with it if it ends with *"""
+        if not query_word.endswith("*"):
+            term_id = self.term_ids.get(normalize_term(query_word))
+            return np.array([] if term_id is None else [term_id], dtype=np.int32)
+        prefix = normalize_term(query_word.rstrip("*"))
+        if self._sorted_terms is None:
+            term_order = sorted(range(len(self.terms)), key=self.terms.__getitem__)
+            self._sorted_terms = (
+                [self.terms[term_id] for term_id in term_order],
+                np.array(term_order, dtype=np.int32))
+        sorted_terms, sorted_ids = self._sorted_terms
+        start = bisect.bisect_left(sorted_terms, prefix)
+        end = bisect.bisect_left(sorted_terms, prefix + "\U0010ffff")
+        return sorted_ids[start:end]
+
+    def search(self, fitz_doc, document_index, query):
+        """Find a word, phrase, or prefix (word*) in the indexed pages, as [(page_i, [rects])]"""
+        return self.search_pages(self.get_page_hashes(fitz_doc, document_index), query)
+
+    def search_pages(self, page_hashes, query):
+        """Find the query in the pages with these hashes, as [(position in page_hashes, [rects])]"""
+        # A phrase matches words that follow each other on one page, each hit's rects are those
+        # of its words (unrotated, as get_text() gives them).
+        query_ids = [self.get_query_ids(query_word) for query_word in query.split()]
+        if not query_ids or any(len(term_ids) == 0 for term_ids in query_ids):
+            return []
+        flat_ids, flat_pages, flat_rects = self._get_flat(tuple(page_hashes))
+        start_count = len(flat_ids) - len(query_ids) + 1
+        if start_count <= 0:
+            return []
+        matches = np.ones(start_count, dtype=bool)
+        for word_i, term_ids in enumerate(query_ids):
+            word_ids = flat_ids[word_i:word_i + start_count]
+            if len(term_ids) == 1:
+                matches &= word_ids == term_ids[0]
+            else:
+                matches &= np.isin(word_ids, term_ids)
+            if word_i:
+                matches &= flat_pages[word_i:word_i + start_count] == flat_pages[:start_count]
+        return [
+            (int(flat_pages[start]), flat_rects[start:start + len(query_ids)].tolist())
+            for start in np.flatnonzero(matches)
+        ]
+
+    def select(self, page_hashes):
+        """Get an index sharing the words of only the listed pages (for saving it elsewhere)"""
+        index = TextIndex()
+        index.terms = list(self.terms)
+        index.term_ids = dict(self.term_ids)
+        index.page_words = {
+            content_hash: self.page_words[content_hash]
+            for content_hash in page_hashes if content_hash in self.page_words
+        }
+        return index
+
+    def save(self, index_path):
+        """Write the index to a compressed .npz file"""
+        page_words = list(self.page_words.items())
+        encoded_terms = [term.encode("utf-8") for term in self.terms]
+        os.makedirs(os.path.dirname(index_path), exist_ok=True)
+        with open(index_path + ".tmp", "wb") as index_file:
+            np.savez_compressed(
+                index_file,
+                terms=np.frombuffer(b"".join(encoded_terms), dtype=np.uint8),
+                term_ends=np.cumsum([len(term) for term in encoded_terms], dtype=np.int64),
+                content_hashes=np.array(
+                    [content_hash for content_hash, _words in page_words], dtype="S40"),
+                word_counts=np.array(
+                    [len(term_ids) for _content_hash, (term_ids, _rects) in page_words],
+                    dtype=np.int64),
+                term_ids=np.concatenate(
+                    [term_ids for _content_hash, (term_ids, _rects) in page_words]
+                    or [np.zeros(0, dtype=np.int32)]),
+                rects=np.concatenate(
+                    [rects for _content_hash, (_term_ids, rects) in page_words]
+                    or [np.zeros((0, 4), dtype=np.float32)]))
+        os.replace(index_path + ".tmp", index_path)
+
+    @classmethod
+    def load(cls, index_path):
+        """Read an index written by save(), returning None if it is missing or unreadable"""
+        try:
+            with np.load(index_path) as index_data:
+                term_data = index_data["terms"].tobytes()
+                term_ends = index_data["term_ends"]
+                content_hashes = index_data["content_hashes"]
+                word_ends = np.cumsum(index_data["word_counts"])[:-1]
+                term_ids = np.split(index_data["term_ids"], word_ends)
+                rects = np.split(index_data["rects"], word_ends)
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            return None
+        index = cls()
+        term_starts = [0] + term_ends[:-1].tolist()
+        index.terms = [
+            term_data[start:end].decode("utf-8")
+            for start, end in zip(term_starts, term_ends.tolist())
+        ]
+        index.term_ids = {term: term_id for term_id, term in enumerate(index.terms)}
+        index.page_words = {
+            content_hash.decode("ascii"): (page_term_ids, page_rects)
+            for content_hash, page_term_ids, page_rects in zip(content_hashes, term_ids, rects)
+        }
+        return index
@@ -1,134 +1,449 @@
 """
     Author: lefkovitj (https://lefkovitzj.com)
-    File Last Modified: 8/28/2025
+    File Last Modified: 10/19/2026
     Project Name: PyPdfApp
     File Name: utils.py
 """
 
+# Python Standard Library Imports.
+from collections import OrderedDict
+import heapq
+import itertools
+import mmap
 import os
+import tempfile
+
+# Third-party Module Imports.
+import fitz
+
+# Project Imports.
+from analysis import DocumentIndex
+from history import OperationJournal
+from textindex import TextIndex
+
+# Annotation types that are imported into (and re-exported from) the markup model.
+MARKUP_ANNOT_TYPES = [fitz.PDF_ANNOT_INK, fitz.PDF_ANNOT_HIGHLIGHT, fitz.PDF_ANNOT_REDACT]
+# Rough resident size of a page for documents that have no file on disk to measure.
+PAGE_MEMORY_ESTIMATE = 100 * 1024
+
+
+def open_mapped_pdf(file_path):
+    """Open a PDF file through a read-only memory map, so MuPDF reads the pages in place"""
+    # The file must not be rewritten in place while it is open, reading a truncated map kills the
+    # process with SIGBUS (see the memory_map_files setting).
+    with open(file_path, "rb") as pdf_file:
+        try:
+            mapping = mmap.mmap(pdf_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError: # Empty files cannot be mapped, let MuPDF report the error.
+            return fitz.open(file_path)
+    # The document keeps the memoryview (and so the mapping) alive until it is released.
+    return fitz.open(stream=memoryview(mapping), filetype="pdf")
+
+def remove_markup_annots(page):
+    """Delete the page's annotations of the types held by the markup model"""
+    markup_xrefs = [annot.xref for annot in page.annots(types=MARKUP_ANNOT_TYPES)]
+    for xref in markup_xrefs:
+        page.delete_annot(page.load_annot(xref))
+
+def same_file(path_a, path_b):
+    """Return True if both paths name the same file"""
+    return os.path.normcase(os.path.abspath(path_a)) == os.path.normcase(os.path.abspath(path_b))
 
 class PdfDocInstance():
     """ Class to represent an instance in the GUI of a single PDF document. """
-    def __init__(self, file_path, doc, password ):
+    def __init__(self, file_path, doc, password, history_depth=50, memory_map=False):
         """Initialize the PDF Document Instance object."""
         self.save_path = file_path
-        self.doc = doc
+        self._doc = doc
+        self.memory_map = memory_map # Reopen file_path with open_mapped_pdf().
+        self.source_mapped = memory_map and doc is not None # doc reads from a map of the file.
         self.password = password
+        self.open_password = password # Needed to reopen the file after a suspend.
+        # Encryption of a restored session ("open_password" or "ask"), until the document is unlocked.
+        self.restored_encryption = None
+        self.snapshot_path = None
+        self.snapshot_is_temporary = True # False for snapshots owned by a saved session.
+        self.markup_strip_pending = False
+        self.changed_since_open = False
+        self.name_suffix = 0 # Set by PdfQueue to tell apart open files with the same name.
 
         self.name = os.path.split(self.save_path)[-1]
         self.compress_basic = False
         self.compress_max = False
         self.page_i = 0
         self.custom_metadata = {"creator": "PyPdfApp", "producer": "PyPdfApp", "title": None}
-        self.freehand_points = [[] for i in range(len(self.doc))]
-        self.redact_points = [[] for i in range(len(self.doc))]
-        self.highlight_points = [[] for i in range(len(self.doc))]
+        page_count = len(doc) if doc is not None else 0 # None for a restored session.
+        self.freehand_points = [[] for i in range(page_count)]
+        self.redact_points = [[] for i in range(page_count)]
+        self.highlight_points = [[] for i in range(page_count)]
+        # Existing annotations are imported lazily, the first time each page is shown.
+        self.markup_loaded = [False for i in range(page_count)]
         self.active_stroke = []
         self.mods_made = False
+        self.history = OperationJournal(history_depth)
+        self.index = DocumentIndex(page_count) # Built in the background by the GUI.
+        self.text_index = TextIndex() # Keyed by page content, so it survives page edits.
+
+    @property
+    def doc(self):
+        """The fitz.Document, transparently resumed if the instance was suspended"""
+        if self._doc is None:
+            self.resume()
+        return self._doc
+
+    @doc.setter
+    def doc(self, fitz_doc):
+        self._doc = fitz_doc
+
+    def is_suspended(self):
+        """Return True if the fitz.Document has been released by suspend()"""
+        return self._doc is None
+
+    def estimate_memory(self):
+        """Estimate the memory held by the open document in bytes"""
+        if not self.changed_since_open and os.path.isfile(self.save_path):
+            return os.path.getsize(self.save_path)
+        return len(self._doc) * PAGE_MEMORY_ESTIMATE
+
+    def suspend(self):
+        """Release the fitz.Document, keeping everything needed to resume it later"""
+        if self._doc is None:
+            return
+        if self.changed_since_open or not os.path.isfile(self.save_path):
+            # Modified (or never saved) documents are kept in a temporary snapshot.
+            snapshot_fd, self.snapshot_path = tempfile.mkstemp(prefix="pypdfapp-", suffix=".pdf")
+            os.close(snapshot_fd)
+            self.snapshot_is_temporary = True
+            self.write_snapshot(self.snapshot_path)
+        self._doc.close()
+        self._doc = None
+        self.source_mapped = False
+
+    def release_source_map(self):
+        """Copy a memory-mapped document into memory, so its own file can be overwritten"""
+        if not self.source_mapped or self._doc is None:
+            return
+        # Object numbers are kept (no garbage collection) so the undo history stays valid.
+        self._doc = fitz.open(stream=self._doc.tobytes(), filetype="pdf")
+        self.source_mapped = False
+        if self._doc.is_encrypted:
+            self._doc.authenticate(self.open_password)
+
+    def write_snapshot(self, snapshot_path):
+        """Write the open document as it is now, to be reopened by resume()"""
+        # Object numbers are preserved (no garbage collection) so the undo history stays valid.
+        if self.open_password:
+            self._doc.save(
+                snapshot_path,
+                deflate = True,
+                encryption = fitz.PDF_ENCRYPT_AES_256,
+                owner_pw = self.open_password,
+                user_pw = self.open_password)
+        else:
+            self._doc.save(snapshot_path, deflate = True)
+
+    def resume(self):
+        """Reopen the fitz.Document released by suspend()"""
+        if self.snapshot_path is not None:
+            self._doc = fitz.open(self.snapshot_path)
+            self.discard_snapshot()
+        else:
+            if self.memory_map:
+                self._doc = open_mapped_pdf(self.save_path)
+                self.source_mapped = True
+            else:
+                self._doc = fitz.open(self.save_path)
+            # The file still holds the annotations that were imported into the markup model.
+            self.markup_strip_pending = True
+        self.unlock(self.open_password)
+
+    def unlock(self, password):
+        """Authenticate the document if it is encrypted, returning True once it is readable"""
+        if self._doc.is_encrypted:
+            if not password or not self._doc.authenticate(password):
+                return False
+            self.open_password = password
+        if self.restored_encryption == "open_password" and self.open_password:
+            self.restored_encryption = None
+            self.password = self.open_password # Saved encrypted again, as before the session.
+        if self.markup_strip_pending:
+            self.markup_strip_pending = False
+            for page_i, page_loaded in enumerate(self.markup_loaded):
+                if page_loaded:
+                    self.remove_markup_annots(self._doc[page_i])
+        return True
+
+    def discard_snapshot(self):
+        """Delete the temporary snapshot file, if there is one"""
+        if self.snapshot_path is not None:
+            if self.snapshot_is_temporary:
+                try:
+                    os.remove(self.snapshot_path)
+                except OSError:
+                    pass
+            self.snapshot_path = None
+
+    def get_state(self):
+        """Get the JSON-serializable state that set_state() restores"""
+        # Passwords are never part of it, only whether the document is encrypted with the one it
+        # is opened with ("open_password"), or with another one that is asked for again ("ask").
+        if self.restored_encryption is not None: # Restored but not unlocked since.
+            encryption = self.restored_encryption
+        elif not self.password:
+            encryption = None
+        elif self.password == self.open_password:
+            encryption = "open_password"
+        else:
+            encryption = "ask"
+        return {
+            "save_path": self.save_path,
+            "page_i": self.page_i,
+            "compress_basic": self.compress_basic,
+            "compress_max": self.compress_max,
+            "custom_metadata": self.custom_metadata,
+            "mods_made": self.mods_made,
+            "changed_since_open": self.changed_since_open,
+            "freehand_points": self.freehand_points,
+            "redact_points": self.redact_points,
+            "highlight_points": self.highlight_points,
+            "markup_loaded": self.markup_loaded,
+            "encryption": encryption,
+        }
+
+    def set_state(self, state, snapshot_path=None):
+        """Restore a state from get_state(), leaving the document suspended until first use"""
+        self.page_i = state["page_i"]
+        self.compress_basic = state["compress_basic"]
+        self.compress_max = state["compress_max"]
+        self.custom_metadata = state["custom_metadata"]
+        self.mods_made = state["mods_made"]
+        self.changed_since_open = state["changed_since_open"]
+        self.freehand_points = state["freehand_points"]
+        self.redact_points = state["redact_points"]
+        self.highlight_points = state["highlight_points"]
+        self.markup_loaded = state["markup_loaded"]
+        self.restored_encryption = state.get("encryption") # Not in sessions of older versions.
+        self.index = DocumentIndex(len(self.markup_loaded))
+        if snapshot_path is not None:
+            self.snapshot_path = snapshot_path
+            self.snapshot_is_temporary = False
 
-    def add_page_data(self, at_index):
+    def add_page_data(self, at_index, page_data=None):
         """Add a new page's data at the specified index"""
-        self.freehand_points.insert(at_index, [])
-        self.redact_points.insert(at_index, [])
-        self.highlight_points.insert(at_index, [])
+        if page_data is None:
+            page_data = ([], [], [], False) # Inserted pages may carry annotations.
+        self.freehand_points.insert(at_index, page_data[0])
+        self.redact_points.insert(at_index, page_data[1])
+        self.highlight_points.insert(at_index, page_data[2])
+        self.markup_loaded.insert(at_index, page_data[3])
+        self.index.insert_pages(at_index)
+
+    def get_page_data(self, at_index):
+        """Get the page's data at the specified index, in the format used by add_page_data"""
+        return (
+            self.freehand_points[at_index],
+            self.redact_points[at_index],
+            self.highlight_points[at_index],
+            self.markup_loaded[at_index])
 
     def remove_page_data(self, at_index):
         """Remove the page's data at the specified index"""
         del self.freehand_points[at_index]
         del self.redact_points[at_index]
         del self.highlight_points[at_index]
+        del self.markup_loaded[at_index]
+        self.index.remove_page(at_index)
+
+    def move_page_data(self, from_index, to_index):
+        """Move the page's data so that it ends up at the specified index"""
+        page_data = self.get_page_data(from_index)
+        self.remove_page_data(from_index)
+        self.add_page_data(to_index, page_data)
+
+    def load_page_markup(self, page_i):
+        """Move the page's existing ink, highlight, and redaction annotations into the markup"""
+        if self.markup_loaded[page_i]:
+            return
+        self.markup_loaded[page_i] = True
+        page = self.doc[page_i]
+        for annot in page.annots(types=MARKUP_ANNOT_TYPES):
+            annot_type = annot.type[0]
+            if annot_type == fitz.PDF_ANNOT_INK:
+                for stroke in annot.vertices:
+                    if len(stroke) > 1:
+                        self.freehand_points[page_i].append([tuple(point) for point in stroke])
+            elif annot_type == fitz.PDF_ANNOT_HIGHLIGHT:
+                # Highlights are stored as quads (4 points each), use one rect-like per quad.
+                vertices = annot.vertices or []
+                for quad_i in range(0, len(vertices) - 3, 4):
+                    quad_rect = fitz.Quad(vertices[quad_i:quad_i + 4]).rect
+                    self.highlight_points[page_i].append(tuple(quad_rect))
+                if not vertices:
+                    self.highlight_points[page_i].append(tuple(annot.rect))
+            else:
+                self.redact_points[page_i].append(tuple(annot.rect))
+        # Remove the originals so that save_pdf does not write them out a second time.
+        self.remove_markup_annots(page)
+
+    def remove_markup_annots(self, page):
+        """Delete the page's annotations of the types held by the markup model"""
+        remove_markup_annots(page)
 
     def __str__(self):
         return self.name
 
+class MemoryGovernor():
+    """Suspend the least-recently-selected documents once a memory budget is exceeded"""
+    def __init__(self, budget_mb=0):
+        """Initialize the governor, a budget of 0 disables suspending"""
+        self.budget = budget_mb * 1024 * 1024
+        self.recent = OrderedDict() # PdfDocInstance -> None, most recently selected last.
+
+    def touch(self, pdf_instance):
+        """Mark the document as the most recently selected"""
+        self.recent[pdf_instance] = None
+        self.recent.move_to_end(pdf_instance)
+
+    def forget(self, pdf_instance):
+        """Stop tracking a closed document"""
+        self.recent.pop(pdf_instance, None)
+
+    def enforce(self):
+        """Suspend documents, least recently selected first, until under the budget"""
+        if self.budget <= 0:
+            return
+        selected = next(reversed(self.recent), None)
+        resident_total = sum(
+            inst.estimate_memory() for inst in self.recent if not inst.is_suspended())
+        suspended_any = False
+        for pdf_instance in list(self.recent):
+            if resident_total <= self.budget:
+                break
+            if pdf_instance is selected or pdf_instance.is_suspended():
+                continue
+            resident_total -= pdf_instance.estimate_memory()
+            pdf_instance.suspend()
+            suspended_any = True
+        if suspended_any: # Release MuPDF's cached resources of the suspended documents.
+            fitz.TOOLS.store_shrink(100)
+
 class PdfQueue():
     """ Hold and process a queue of PdfDocInstance objects. """
-    def __init__(self):
-        self.queue = {}
+    def __init__(self, memory_budget_mb=0):
+        self.queue = {} # Stable id -> PdfDocInstance, in the order the PDFs were added.
+        self.labels = {} # Stable id -> display name, e.g. "name.pdf" or "name.pdf | 2".
+        self.label_ids = {} # Display name -> stable id.
+        self.unsaved = {} # Stable ids of PDFs with unsaved changes (ordered set).
+        # Duplicate numbering per file name (0 is displayed without the " | n" suffix).
+        self.free_suffixes = {} # Name -> heap of duplicate numbers freed by closed PDFs.
+        self.next_suffix = {} # Name -> next duplicate number that has never been used.
+        # Neighbouring ids in display order, used to pick the next PDF after a close.
+        self.prev_ids = {}
+        self.next_ids = {}
+        self.last_id = None
+        self.id_counter = itertools.count(1)
+        self.governor = MemoryGovernor(memory_budget_mb)
 
     def is_empty(self):
         """ Check whether the queue is empty. """
         return not self.queue
 
     def add_pdf(self, pdf_instance):
-        """Add the PDF to the queue"""
-        if isinstance(pdf_instance, PdfDocInstance):
-            if pdf_instance.name not in self.queue.keys():
-                self.queue[pdf_instance.name] = pdf_instance
-                return pdf_instance.name
-            else:
-                duplicate_name_i = 1
-                # Find the displayable name in the format of "pdf_instance.name | duplicate_name_i"
-                # such that it is unique in the dictionary keys.
-                while f"{pdf_instance.name} | {duplicate_name_i}" in self.queue.keys():
-                    duplicate_name_i += 1
-                self.queue[f"{pdf_instance.name} | {duplicate_name_i}"] = pdf_instance
-                return f"{pdf_instance.name} | {duplicate_name_i}"
-        else:
+        """Add the PDF to the queue, returning its stable id"""
+        if not isinstance(pdf_instance, PdfDocInstance):
             raise TypeError("PdfQueue cannot add objects of type other than PdfDocInstance.")
+        pdf_id = next(self.id_counter)
+        self.governor.touch(pdf_instance)
 
-    def remove_pdf(self, pdf_instance_key):
-        """Remove PDF from the queue, process each item's key, updating duplicate names as needed"""
-        removed_pdf = self.queue[pdf_instance_key]
-        name_to_check = removed_pdf.name
-        removed_key_parts = pdf_instance_key.split(" |")
-        if len(removed_key_parts) > 1:
-            removed_i = int(removed_key_parts[-1])
+        # Find the lowest duplicate number not displayed for another PDF of the same name.
+        name = pdf_instance.name
+        if self.free_suffixes.get(name):
+            suffix = heapq.heappop(self.free_suffixes[name])
         else:
-            removed_i = 0
-
-        updated_queue = {}
-        for instance_key, instance_pdf in self.queue.items():
-            instance_key_parts = instance_key.split(" | ")
-            if len(instance_key_parts) == 1: # Initial item, lacks identifying number, use 0.
-                instance_key_parts.append("0")
-            if instance_key_parts[0] == name_to_check:
-                # The instance key needs updated  (identifying number is greater than the removed).
-                if int(instance_key_parts[-1]) > removed_i:
-                    if int(instance_key_parts[-1]) - 1 < 1:
-                        updated_queue[f"{instance_key_parts[0]}"] = instance_pdf
-                    else:
-                        updated_queue[
-                            f"{instance_key_parts[0]} | {int(instance_key_parts[-1]) - 1}"
-                        ] = instance_pdf
-                # The instance key matches exactly, don't add the item to the new queue.
-                elif int(instance_key_parts[-1]) == removed_i:
-                    pass
-                # The instance key does not need updated (identifying number < removed).
-                else:
-                    updated_queue[instance_key] = instance_pdf
-            # The instance does not share the duplicate name.
-            else:
-                updated_queue[instance_key] = instance_pdf
+            suffix = self.next_suffix.get(name, 0)
+            self.next_suffix[name] = suffix + 1
+        label = name if suffix == 0 else f"{name} | {suffix}"
+        while label in self.label_ids: # A file whose name already ends in " | n".
+            suffix = self.next_suffix[name]
+            self.next_suffix[name] = suffix + 1
+            label = f"{name} | {suffix}"
+        pdf_instance.name_suffix = suffix
+
+        self.queue[pdf_id] = pdf_instance
+        self.labels[pdf_id] = label
+        self.label_ids[label] = pdf_id
+        self.prev_ids[pdf_id] = self.last_id
+        self.next_ids[pdf_id] = None
+        if self.last_id is not None:
+            self.next_ids[self.last_id] = pdf_id
+        self.last_id = pdf_id
+        if pdf_instance.mods_made:
+            self.unsaved[pdf_id] = None
+        return pdf_id
+
+    def remove_pdf(self, pdf_id):
+        """Remove PDF from the queue, freeing its display name for reuse"""
+        removed_pdf = self.queue.pop(pdf_id)
+        self.governor.forget(removed_pdf)
+        removed_pdf.discard_snapshot()
+        del self.label_ids[self.labels.pop(pdf_id)]
+        self.unsaved.pop(pdf_id, None)
+        heapq.heappush(
+            self.free_suffixes.setdefault(removed_pdf.name, []),
+            removed_pdf.name_suffix)
+
+        prev_id = self.prev_ids.pop(pdf_id)
+        next_id = self.next_ids.pop(pdf_id)
+        if prev_id is not None:
+            self.next_ids[prev_id] = next_id
+        if next_id is not None:
+            self.prev_ids[next_id] = prev_id
+        else:
+            self.last_id = prev_id
+
+    def neighbor(self, pdf_id):
+        """Get the id of the PDF to the left of the given one, or to its right if it is first"""
+        if self.prev_ids[pdf_id] is not None:
+            return self.prev_ids[pdf_id]
+        return self.next_ids[pdf_id]
 
-        self.queue = updated_queue
+    def select(self, pdf_id):
+        """Mark the PDF as selected, suspending others if the memory budget is exceeded"""
+        self.governor.touch(self.queue[pdf_id])
+        self.governor.enforce()
 
-    def set_unsaved(self, pdf_instance_key):
+    def set_unsaved(self, pdf_id):
         """Format to denote that the PDF's current state has not been saved"""
-        self.queue[pdf_instance_key].mods_made = True
+        self.queue[pdf_id].mods_made = True
+        self.queue[pdf_id].changed_since_open = True
+        self.unsaved[pdf_id] = None
 
-    def set_saved(self, pdf_instance_key):
+    def set_saved(self, pdf_id):
         """Format to denote that the PDF's current state has been saved"""
-        self.queue[pdf_instance_key].mods_made = False
+        self.queue[pdf_id].mods_made = False
+        self.unsaved.pop(pdf_id, None)
+
+    def get_label(self, pdf_id):
+        """Get the PDF's display name, with a leading "*" if it has unsaved changes"""
+        if pdf_id in self.unsaved:
+            return f"*{self.labels[pdf_id]}"
+        return self.labels[pdf_id]
+
+    def get_id(self, label):
+        """Get the stable id of the PDF shown with the given display name"""
+        return self.label_ids[label[1:] if label.startswith("*") else label]
 
     def get_keys(self):
-        """Get the keys of the queue attribute as a list of strings"""
-        return_keys = []
-        for key, value in self.queue.items():
-            if value.mods_made:
-                return_keys.append(f"*{key}")
-            else:
-                return_keys.append(key)
-        return return_keys
+        """Get the display names of all PDFs as a list of strings"""
+        return [self.get_label(pdf_id) for pdf_id in self.queue]
 
     def get_unsaved(self):
-        """Get the keys of the queue attribute as a list of strings"""
-        return_keys = []
-        for key, value in self.queue.items():
-            if value.mods_made:
-                return_keys.append(key)
-        return return_keys
-
-    def __getitem__(self, key):
+        """Get the display names of the PDFs with unsaved changes as a list of strings"""
+        return [self.labels[pdf_id] for pdf_id in self.unsaved]
+
+    def __len__(self):
+        return len(self.queue)
+
+    def __getitem__(self, pdf_id):
         """Allow for queue access via [...] syntax"""
-        return self.queue[key]
+        return self.queue[pdf_id]
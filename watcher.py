@@ -0,0 +1,181 @@
+"""
+    Author: lefkovitj (https://lefkovitzj.com)
+    File Last Modified: 10/19/2026
+    Project Name: PyPdfApp
+    File Name: watcher.py
+"""
+
+# Python Standard Library Imports.
+import os
+import queue
+import threading
+
+# Third-party Module Imports.
+import fitz
+
+# Project Imports.
+from analysis import DocumentIndex
+from cache import page_fingerprint
+from utils import same_file
+
+
+def get_stat_key(file_path):
+    """Get the (modification time, size) of a file, or None if it cannot be read"""
+    try:
+        file_stat = os.stat(file_path)
+    except OSError:
+        return None
+    return (file_stat.st_mtime_ns, file_stat.st_size)
+
+def get_file_fingerprints(file_path, password=None):
+    """Get the fingerprint of every page of the PDF file on disk"""
+    fitz_doc = fitz.open(file_path)
+    try:
+        if fitz_doc.is_encrypted:
+            fitz_doc.authenticate(password or "")
+        object_hashes = {} # Shared resources (fonts, forms) are hashed once per file.
+        return [
+            page_fingerprint(fitz_doc, page_i, object_hashes) for page_i in range(len(fitz_doc))]
+    finally:
+        fitz_doc.close()
+
+def reload_changed_pages(pdf_instance, old_fingerprints, new_fingerprints):
+    """Switch the PdfDocInstance to the new version of its file, returning the changed pages"""
+    # Unchanged pages keep their markup (even if they moved), changed pages start over from
+    # the file and have their annotations imported again when they are next shown.
+    old_indices = {}
+    for old_i, fingerprint in enumerate(old_fingerprints):
+        old_indices.setdefault(fingerprint, []).append(old_i)
+    page_data = []
+    changed_pages = []
+    for new_i, fingerprint in enumerate(new_fingerprints):
+        if old_indices.get(fingerprint):
+            page_data.append(pdf_instance.get_page_data(old_indices[fingerprint].pop(0)))
+        else:
+            page_data.append(([], [], [], False))
+            changed_pages.append(new_i)
+    pdf_instance.freehand_points = [data[0] for data in page_data]
+    pdf_instance.redact_points = [data[1] for data in page_data]
+    pdf_instance.highlight_points = [data[2] for data in page_data]
+    pdf_instance.markup_loaded = [data[3] for data in page_data]
+    pdf_instance.index = DocumentIndex(len(new_fingerprints)) # Analysed again in the background.
+    pdf_instance.history.clear() # Entries refer to the pages of the old version.
+    pdf_instance.page_i = max(0, min(pdf_instance.page_i, len(new_fingerprints) - 1))
+
+    if not pdf_instance.is_suspended(): # Suspended documents reopen the new file on resume.
+        old_doc = pdf_instance.doc
+        pdf_instance.doc = None
+        old_doc.close()
+        pdf_instance.resume()
+    return changed_pages
+
+
+class FileWatcher():
+    """Poll the files behind the open PDFs and queue the ones that changed on disk"""
+    def __init__(self, interval=2.0):
+        """Initialize the watcher, checking every interval seconds once started"""
+        self.interval = interval
+        # File path -> {"count", "stat", "fingerprints", "password", "generation"}, the generation
+        # going up whenever refresh() records a version of the file saved by this program.
+        self.watched = {}
+        self.lock = threading.Lock()
+        self.changes = queue.Queue()
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        """Start polling in a background thread"""
+        self.thread.start()
+
+    def stop(self):
+        """Stop polling"""
+        self.stop_event.set()
+
+    def watch(self, file_path, password=None):
+        """Start watching a file (files opened more than once are watched once)"""
+        if not os.path.isfile(file_path):
+            return
+        with self.lock:
+            if file_path in self.watched:
+                self.watched[file_path]["count"] += 1
+                return
+        # The baseline is the file as it was opened, not as the first poll finds it.
+        stat_key = get_stat_key(file_path)
+        try:
+            fingerprints = get_file_fingerprints(file_path, password)
+        except Exception: # Unreadable, so there is nothing to reload it from either.
+            return
+        with self.lock:
+            if file_path in self.watched:
+                self.watched[file_path]["count"] += 1
+            else:
+                self.watched[file_path] = {
+                    "count": 1,
+                    "stat": stat_key,
+                    "fingerprints": fingerprints,
+                    "password": password,
+                    "generation": 0}
+
+    def refresh(self, file_path, password=None):
+        """Record a version of a watched file saved by this program, so it is not a change"""
+        with self.lock:
+            watched_paths = [path for path in self.watched if same_file(path, file_path)]
+        if not watched_paths:
+            return
+        stat_key = get_stat_key(file_path)
+        try:
+            fingerprints = get_file_fingerprints(file_path, password)
+        except Exception: # Left to the polling thread.
+            return
+        with self.lock:
+            for watched_path in watched_paths:
+                entry = self.watched.get(watched_path)
+                if entry is not None:
+                    entry["stat"] = stat_key
+                    entry["fingerprints"] = fingerprints
+                    entry["password"] = password
+                    entry["generation"] += 1
+
+    def unwatch(self, file_path):
+        """Stop watching a file once every PDF using it has been closed"""
+        with self.lock:
+            if file_path in self.watched:
+                self.watched[file_path]["count"] -= 1
+                if self.watched[file_path]["count"] <= 0:
+                    del self.watched[file_path]
+
+    def get_changes(self):
+        """Get the queued (file path, old fingerprints, new fingerprints) changes"""
+        changes = []
+        while not self.changes.empty():
+            file_path, generation, old_fingerprints, new_fingerprints = self.changes.get()
+            with self.lock:
+                entry = self.watched.get(file_path)
+                if entry is None or entry["generation"] != generation:
+                    continue # Found before a refresh(), likely while this program was saving.
+            changes.append((file_path, old_fingerprints, new_fingerprints))
+        return changes
+
+    def _run(self):
+        """Polling loop, only stat calls unless a file has changed"""
+        while not self.stop_event.is_set():
+            with self.lock:
+                watched_items = [
+                    (file_path, entry, entry["stat"], entry["password"], entry["generation"])
+                    for file_path, entry in self.watched.items()]
+            for file_path, entry, old_stat_key, password, generation in watched_items:
+                try:
+                    stat_key = get_stat_key(file_path)
+                    if stat_key is None or stat_key == old_stat_key:
+                        continue
+                    new_fingerprints = get_file_fingerprints(file_path, password)
+                except Exception: # Still being written, try again on the next poll.
+                    continue
+                with self.lock:
+                    if entry["generation"] != generation: # Refreshed while it was being read.
+                        continue
+                    entry["stat"] = stat_key
+                    self.changes.put(
+                        (file_path, generation, entry["fingerprints"], new_fingerprints))
+                    entry["fingerprints"] = new_fingerprints
+            self.stop_event.wait(self.interval)
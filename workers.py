@@ -0,0 +1,106 @@
+"""
+    Author: lefkovitj (https://lefkovitzj.com)
+    File Last Modified: 10/19/2026
+    Project Name: PyPdfApp
+    File Name: workers.py
+"""
+
+# Python Standard Library Imports.
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import os
+import sys
+import tempfile
+try: # Not available on Windows.
+    import resource
+except ImportError:
+    resource = None
+
+# Third-party Module Imports.
+import fitz
+
+# Project Imports.
+from utils import remove_markup_annots
+
+
+def get_worker_count(requested=0, job_count=None):
+    """Get the number of worker processes to use, 0 meaning one per CPU"""
+    worker_count = int(requested) if requested and int(requested) > 0 else (os.cpu_count() or 1)
+    if job_count is not None:
+        worker_count = min(worker_count, job_count)
+    return max(1, worker_count)
+
+def get_peak_rss_mb():
+    """Get the peak resident memory of this process in MB, or None where it cannot be measured"""
+    if resource is not None:
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == "darwin": # Bytes on macOS, kilobytes elsewhere.
+            return peak_rss / (1024 * 1024)
+        return peak_rss / 1024
+    try: # Optional, psutil reports the peak working set on Windows.
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+    except (ImportError, AttributeError):
+        return None
+
+def create_worker_pool(requested=0, job_count=None):
+    """Create a process pool for page work"""
+    # Spawned (not forked) workers, forking a process that runs Tk and render threads is unsafe.
+    return ProcessPoolExecutor(
+        max_workers=get_worker_count(requested, job_count),
+        mp_context=multiprocessing.get_context("spawn"))
+
+def get_worker_source(pdf_doc):
+    """Get (file_path, password, is_temporary) of a file worker processes can open for the PDF"""
+    # changed_since_open, not mods_made: after Save As the changes are saved, but to another file.
+    if not pdf_doc.changed_since_open and os.path.isfile(pdf_doc.save_path):
+        return pdf_doc.save_path, pdf_doc.open_password, False
+    # Changed since it was opened, workers get a (decrypted) copy of the document as it is now.
+    copy_fd, copy_path = tempfile.mkstemp(prefix="pypdfapp-", suffix=".pdf")
+    os.close(copy_fd)
+    pdf_doc.doc.save(copy_path)
+    return copy_path, None, True
+
+def prepare_pdf(file_path, scale=1.0):
+    """Validate, repair, and render the first page of a PDF file (run in a worker process)"""
+    prepared = {
+        "file_path": file_path,
+        "error": None,
+        "encrypted": False,
+        "repaired_path": None, # Repaired copy for the GUI to open instead of repairing again.
+        "page_count": 0,
+        "first_page": None, # (width, height, alpha, samples) of the page render at scale.
+    }
+    try:
+        fitz_doc = fitz.open(file_path)
+    except Exception as err: # Missing, unreadable, or not a document at all.
+        prepared["error"] = str(err)
+        return prepared
+    try:
+        if not fitz_doc.is_pdf:
+            prepared["error"] = "Not a PDF file"
+            return prepared
+        if fitz_doc.is_encrypted: # The password is asked for by the GUI.
+            prepared["encrypted"] = True
+            return prepared
+        prepared["page_count"] = fitz_doc.page_count
+        if fitz_doc.page_count == 0:
+            prepared["error"] = "The PDF has no pages"
+            return prepared
+        if fitz_doc.is_repaired:
+            repaired_fd, prepared["repaired_path"] = tempfile.mkstemp(
+                prefix="pypdfapp-",
+                suffix=".pdf")
+            os.close(repaired_fd)
+            fitz_doc.save(prepared["repaired_path"])
+
+        # Render the first page as the GUI will show it, with the markup annotations removed.
+        page = fitz_doc[0]
+        remove_markup_annots(page)
+        pix = page.get_pixmap(matrix=fitz.Matrix(scale, scale))
+        prepared["first_page"] = (pix.width, pix.height, pix.alpha, pix.samples)
+    except Exception as err:
+        prepared["error"] = str(err)
+    finally:
+        fitz_doc.close()
+    return prepared